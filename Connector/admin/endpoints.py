@@ -1,10 +1,10 @@
 #!/usr/bin/python
 from aiohttp import web
-import json
 from logger.logger import Logger
 from httputils.app import appModule
 from httputils.router import Router
 from httputils import httputils, error
+from utils import jsoncodec
 from .constants import *
 from . import adminutils
 
@@ -39,7 +39,7 @@ async def addCoin(request):
         raise error.BadRequestError(message=err.message)
 
     return web.Response(
-        text=json.dumps(response)
+        body=jsoncodec.dumps(response)
     )
 
 
@@ -70,7 +70,7 @@ async def removeCoin(request):
         raise error.BadRequestError(message=err.message)
 
     return web.Response(
-        text=json.dumps(response)
+        body=jsoncodec.dumps(response)
     )
 
 
@@ -101,7 +101,7 @@ async def getCoin(request):
         raise error.BadRequestError(message=err.message)
 
     return web.Response(
-        text=json.dumps(response)
+        body=jsoncodec.dumps(response)
     )
 
 
@@ -133,7 +133,7 @@ async def updateCoin(request):
         raise error.BadRequestError(message=err.message)
 
     return web.Response(
-        text=json.dumps(response)
+        body=jsoncodec.dumps(response)
     )
 
 
@@ -8,8 +8,10 @@ from rpcutils import error
 from rpcutils.rpcconnector import RPCConnector
 from . import utils
 from .constants import *
-from utils import utils as globalUtils
-import time
+from utils import addresshistory, historycursor, utils as globalUtils
+from utils.chaintip import ChainTipTracker
+from utils.immutablecache import ImmutableCache
+from utils.prevoutcache import PrevoutCache
 
 
 @RpcRouteTableDef.rpc(currency=COIN_SYMBOL)
@@ -24,60 +26,26 @@ async def getAddressHistory(id, params, config):
     if err is not None:
         raise error.RpcBadRequestError(id=id, message=err.message)
 
-    addrHistory = await RPCConnector.request(
-        endpoint=config.electronCashRpcEndpoint,
-        id=id,
-        method=GET_ADDRESS_HISTORY_METHOD,
-        params=[params["address"]]
-    )
-
-    txs = [item["tx_hash"] for item in addrHistory[::-1]]
-    firstConfirmedTx = -1
-
-    if "status" in params and params["status"] in ["pending", "confirmed"]:
-
-        (left, right) = (0, len(txs) - 1)
-
-        while left <= right:
-
-            mid = (left + right) // 2
-
-            tx = await getTransaction(
-                id=int(time.time()),
-                params={
-                    "txHash": txs[mid]
-                },
-                config=config
-            )
+    try:
+        cursor = historycursor.decodeElementsCursor(params["cursor"]) if params.get("cursor", "") else None
+    except ValueError as err:
+        raise error.RpcBadRequestError(id=id, message=str(err))
 
-            if tx["transaction"]["blockNumber"]:
-                firstConfirmedTx = mid
-                right = mid - 1
-            else:
-                left = mid + 1
+    async def fetchHistory():
 
-        if firstConfirmedTx == -1 and params["status"] == "confirmed":
-            txs = []
-        else:
-            txs = txs[:firstConfirmedTx] if params["status"] == "pending" else txs[firstConfirmedTx:]
+        addrHistory = await RPCConnector.request(
+            endpoint=config.electronCashRpcEndpoint,
+            id=id,
+            method=GET_ADDRESS_HISTORY_METHOD,
+            params=[params["address"]]
+        )
 
-    leftSide = "order" not in params or params["order"] == "desc"
+        return addresshistory.sortAddressHistory(params, addrHistory)
 
-    paginatedTxs = globalUtils.paginate(
-        elements=txs,
-        page=params["page"] if "page" in params else None,
-        pageSize=params["pageSize"] if "pageSize" in params else None,
-        side="left" if leftSide else "right"
-    )
+    owner = addresshistory.getAddressHistoryOwner(config, params)
+    txs, snapshotId = await historycursor.loadSnapshot(owner, cursor, fetchHistory)
 
-    response = {
-        "address": params["address"],
-        "txHashes": paginatedTxs if leftSide else paginatedTxs[::-1],
-        "maxPage": globalUtils.getMaxPage(
-            numElements=len(txs),
-            pageSize=params["pageSize"] if "pageSize" in params else None
-        )
-    }
+    response = addresshistory.parseAddressHistory(params, txs, snapshotId, cursor, owner)
 
     err = httputils.validateJSONSchema(response, responseSchema)
     if err is not None:
@@ -231,7 +199,7 @@ async def getAddressUnspent(id, params, config):
                 "txHash": tx["tx_hash"],
                 "vout": str(tx["tx_pos"]),
                 "status": {
-                    "confirmed": tx["height"] != 0,
+                    "confirmed": not addresshistory.isPendingHeight(tx["height"]),
                     "blockHeight": str(tx["height"])
                 },
                 "value": str(tx["value"])
@@ -423,20 +391,15 @@ async def getHeight(id, params, config):
             message=err.message
         )
 
-    latestBlockHeight = int(
-        await RPCConnector.request(
-            endpoint=config.bitcoinabcRpcEndpoint,
-            id=id,
-            method=GET_BLOCK_COUNT_METHOD,
-            params=[]
+    try:
+        latestBlockHeight, latestBlockHash = await ChainTipTracker().getOrFetch(
+            coin=config.coin,
+            network=config.networkName,
+            function=lambda: getChainTip(id, config)
         )
-    )
-    latestBlockHash = await RPCConnector.request(
-        endpoint=config.bitcoinabcRpcEndpoint,
-        id=id,
-        method=GET_BLOCK_HASH_METHOD,
-        params=[latestBlockHeight]
-    )
+    except error.RpcError as err:
+        # Chain tip polls are shared between callers, so errors are returned with the id of each one
+        raise err.withId(id)
 
     response = {
         "latestBlockIndex": str(latestBlockHeight),
@@ -453,6 +416,18 @@ async def getHeight(id, params, config):
     return response
 
 
+async def getChainTip(id, config):
+
+    blockchainInfo = await RPCConnector.request(
+        endpoint=config.bitcoinabcRpcEndpoint,
+        id=id,
+        method=GET_BLOCKCHAIN_INFO,
+        params=[]
+    )
+
+    return blockchainInfo["blocks"], blockchainInfo["bestblockhash"]
+
+
 """Returns raw transaction (hex)"""
 
 
@@ -490,6 +465,29 @@ async def getTransactionHex(id, params, config):
     return response
 
 
+async def getTransactionOutputs(id, txHash, config):
+
+    transaction = await RPCConnector.request(
+        endpoint=config.bitcoinabcRpcEndpoint,
+        id=id,
+        method=GET_TRANSACTION_METHOD,
+        params=[
+            txHash,
+            True,
+            True
+        ]
+    )
+
+    return [
+        (
+            output["n"],
+            output["scriptPubKey"]["addresses"][0] if "addresses" in output["scriptPubKey"] else None,
+            output["value"]
+        )
+        for output in transaction["decoded"]["vout"]
+    ]
+
+
 @RpcRouteTableDef.rpc(currency=COIN_SYMBOL)
 @HttpRouteTableDef.post(currency=COIN_SYMBOL)
 async def getTransaction(id, params, config):
@@ -505,6 +503,16 @@ async def getTransaction(id, params, config):
             message=err.message
         )
 
+    response = ImmutableCache().get(
+        coin=config.coin,
+        network=config.networkName,
+        hash=params["txHash"],
+        kind=TRANSACTION_CACHE_KIND
+    )
+
+    if response is not None:
+        return response
+
     try:
         # Parameters: TransactionId, include_watchonly, verbose
         transaction = await RPCConnector.request(
@@ -523,22 +531,17 @@ async def getTransaction(id, params, config):
 
         if "generated" not in transaction:
 
-            for vin in transaction["decoded"]["vin"]:
-                inputTransaction = await RPCConnector.request(
-                    endpoint=config.bitcoinabcRpcEndpoint,
-                    id=id,
-                    method=GET_TRANSACTION_METHOD,
-                    params=[
-                        vin["txid"],
-                        True,
-                        True
-                    ]
-                )
+            prevouts = await PrevoutCache().resolve(
+                coin=config.coin,
+                network=config.networkName,
+                outpoints=[(vin["txid"], vin["vout"]) for vin in transaction["decoded"]["vin"]],
+                fetch=lambda txid: getTransactionOutputs(id, txid, config)
+            )
 
-                transactionAmount += inputTransaction["decoded"]["vout"][vin["vout"]]["value"]
-                address = inputTransaction["decoded"]["vout"][vin["vout"]]["scriptPubKey"]["addresses"][0]
-                value = inputTransaction["decoded"]["vout"][vin["vout"]]["value"]
-                vinAddressBalances[address] = value
+            for address, value in prevouts:
+                transactionAmount += value
+                if address is not None:
+                    vinAddressBalances[address] = value
 
         response = {
             "transaction": {
@@ -567,6 +570,16 @@ async def getTransaction(id, params, config):
             message=err.message
         )
 
+    ImmutableCache().put(
+        coin=config.coin,
+        network=config.networkName,
+        hash=params["txHash"],
+        value=response,
+        confirmations=transaction["confirmations"],
+        kind=TRANSACTION_CACHE_KIND,
+        blockHashes=[transaction.get("blockhash", None)]
+    )
+
     return response
 
 
@@ -594,7 +607,7 @@ async def getAddressTransactionCount(id, params, config):
 
     pending = 0
     for tx in txs:
-        if tx["height"] == 0:
+        if addresshistory.isPendingHeight(tx["height"]):
             pending += 1
 
     response = {
@@ -11,12 +11,14 @@ class Config:
 
         self._bitcoinabcRpcEndpoint = ""
         self._electronCashRpcEndpoint = ""
+        self._bitcoinabcZmqEndpoint = ""
 
     def loadConfig(self, config):
 
         try:
             self.bitcoinabcRpcEndpoint = config["bitcoinabcRpcEndpoint"]
             self.electronCashRpcEndpoint = config["electronCashRpcEndpoint"]
+            self.bitcoinabcZmqEndpoint = config.get("bitcoinabcZmqEndpoint", "")
         except KeyError:
             return False, "Can not load config"
 
@@ -50,6 +52,14 @@ class Config:
     def electronCashRpcEndpoint(self, value):
         self._electronCashRpcEndpoint = value
 
+    @property
+    def bitcoinabcZmqEndpoint(self):
+        return self._bitcoinabcZmqEndpoint
+
+    @bitcoinabcZmqEndpoint.setter
+    def bitcoinabcZmqEndpoint(self, value):
+        self._bitcoinabcZmqEndpoint = value
+
     def jsonEncode(self):
         return ConfigEncoder().encode(self)
 
@@ -58,5 +68,6 @@ class ConfigEncoder(JSONEncoder):
     def encode(self, o):
         return {
             "bitcoinabcRpcEndpoint": o.bitcoinabcRpcEndpoint,
-            "electronCashRpcEndpoint": o.electronCashRpcEndpoint
+            "electronCashRpcEndpoint": o.electronCashRpcEndpoint,
+            "bitcoinabcZmqEndpoint": o.bitcoinabcZmqEndpoint
         }
@@ -7,6 +7,7 @@ GET_ADDRESS_UNSPENT_METHOD = "getaddressunspent"
 GET_BLOCK_METHOD = "getblock"
 GET_BLOCK_HASH_METHOD = "getblockhash"
 GET_BLOCK_COUNT_METHOD = "getblockcount"
+GET_BLOCK_HEADER_METHOD = "getblockheader"
 ESTIMATE_SMART_FEE_METHOD = "estimatesmartfee"
 GET_ADDRESSES_UNSPENT = "getaddressesunspent"
 GET_TRANSACTION_METHOD = "gettransaction"
@@ -44,6 +45,11 @@ GET_ADDRESSES_TRANSACTION_COUNT = "getaddressestransactioncount"
 GET_TRANSACTION_HEX = "gettransactionhex"
 GET_ADDRESSES_HISTORY = "getaddresseshistory"
 NOTIFY = "notify"
+NEW_HASH_BLOCK_ZMQ_TOPIC = "hashblock"
+BLOCK_TIME = 600  # Seconds
 
 SUBSCRIBE_ADDRESS_BALANCE = "subscribetoaddressbalance"
 UNSUBSCRIBE_ADDRESS_BALANCE = "unsubscribefromaddressbalance"
+
+TRANSACTION_CACHE_KIND = "transaction"
+BLOCK_CACHE_KIND = "block"
@@ -3,6 +3,8 @@ from httputils.router import CurrencyHandler
 from httputils import httpmethod, httputils, error as httpError
 from rpcutils import rpcmethod, error
 from logger.logger import Logger
+from utils.chaintip import ChainTipTracker
+from .blocknotifier import BlockNotifier
 from .config import Config
 from .constants import COIN_SYMBOL
 from . import utils
@@ -14,6 +16,7 @@ class Handler:
     def __init__(self, coin):
         self._coin = coin
         self._networksConfig = {}
+        self._blockNotifiers = {}  # Network -> BlockNotifier
 
     def addConfig(self, network, config):
 
@@ -39,6 +42,9 @@ class Handler:
 
         self.networksConfig[network] = pkgConfig
 
+        self.blockNotifiers[network] = BlockNotifier(config=pkgConfig)
+        self.blockNotifiers[network].start()
+
         return True, None
 
     def getConfig(self, network):
@@ -63,6 +69,9 @@ class Handler:
             Logger.printWarning(f"Configuration {network} not added for {self.coin}")
             return False, "Configuration not added"
 
+        await self.blockNotifiers.pop(network).stop()
+        ChainTipTracker().remove(self.coin, network)
+
         del self.networksConfig[network]
 
         return True, None
@@ -84,6 +93,9 @@ class Handler:
             Logger.printError(f"Can not load config for {network} for {self.coin}: {err}")
             return ok, err
 
+        await self.blockNotifiers[network].stop()
+        self.blockNotifiers[network].start()
+
         return True, None
 
     async def handleRPCRequest(self, network, standard, request):
@@ -123,5 +135,9 @@ class Handler:
     def networksConfig(self, value):
         self._networksConfig = value
 
+    @property
+    def blockNotifiers(self):
+        return self._blockNotifiers
+
 
 Handler(COIN_SYMBOL)
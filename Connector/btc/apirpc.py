@@ -8,9 +8,11 @@ from rpcutils import error
 from rpcutils.rpcconnector import RPCConnector
 from rpcutils.rpcsocketconnector import RPCSocketConnector
 from . import utils
-from utils import utils as globalUtils
+from utils import addresshistory, historycursor, utils as globalUtils
+from utils.addresscache import AddressCache
+from utils.chaintip import ChainTipTracker
+from utils.immutablecache import ImmutableCache
 from .constants import *
-import time
 
 
 @RpcRouteTableDef.rpc(currency=COIN_SYMBOL)
@@ -31,62 +33,27 @@ async def getAddressHistory(id, params, config):
         Logger.printError(f"Can not parse address {params['address']} to scriptHash")
         raise error.RpcBadRequestError(id=id, message="Address not valid")
 
-    addrHistory = await RPCSocketConnector.request(
-        endpoint=config.electrsEndpoint,
-        id=id,
-        method=GET_HISTORY_METHOD,
-        params=[scriptHash]
-    )
-
-    txs = [item["tx_hash"] for item in addrHistory[::-1]]
-    firstConfirmedTx = -1
-
-    if "status" in params and params["status"] in ["pending", "confirmed"]:
-
-        (left, right) = (0, len(txs) - 1)
-
-        while left <= right:
-
-            mid = (left + right) // 2
-
-            tx = await asyncio.ensure_future(
-                getTransaction(
-                    id=int(time.time()),
-                    params={
-                        "txHash": txs[mid]
-                    },
-                    config=config
-                )
-            )
+    try:
+        cursor = historycursor.decodeElementsCursor(params["cursor"]) if params.get("cursor", "") else None
+    except ValueError as err:
+        raise error.RpcBadRequestError(id=id, message=str(err))
 
-            if tx["transaction"]["blockNumber"]:
-                firstConfirmedTx = mid
-                right = mid - 1
-            else:
-                left = mid + 1
+    async def fetchHistory():
 
-        if firstConfirmedTx == -1 and params["status"] == "confirmed":
-            txs = []
-        else:
-            txs = txs[:firstConfirmedTx] if params["status"] == "pending" else txs[firstConfirmedTx:]
+        addrHistory = await AddressCache().request(
+            config=config,
+            endpoint=config.electrsEndpoint,
+            id=id,
+            method=GET_HISTORY_METHOD,
+            scriptHash=scriptHash
+        )
 
-    leftSide = "order" not in params or params["order"] == "desc"
+        return addresshistory.sortAddressHistory(params, addrHistory)
 
-    paginatedTxs = globalUtils.paginate(
-        elements=txs,
-        page=params["page"] if "page" in params else None,
-        pageSize=params["pageSize"] if "pageSize" in params else None,
-        side="left" if leftSide else "right"
-    )
+    owner = addresshistory.getAddressHistoryOwner(config, params)
+    txs, snapshotId = await historycursor.loadSnapshot(owner, cursor, fetchHistory)
 
-    response = {
-        "address": params["address"],
-        "txHashes": paginatedTxs if leftSide else paginatedTxs[::-1],
-        "maxPage": globalUtils.getMaxPage(
-            numElements=len(txs),
-            pageSize=params["pageSize"] if "pageSize" in params else None
-        )
-    }
+    response = addresshistory.parseAddressHistory(params, txs, snapshotId, cursor, owner)
 
     err = httputils.validateJSONSchema(response, responseSchema)
     if err is not None:
@@ -107,22 +74,22 @@ async def getAddressesHistory(id, params, config):
     if err is not None:
         raise error.RpcBadRequestError(id=id, message=err.message)
 
+    scriptHashes = utils.addressesToScriptHashes(id, params["addresses"])
+
+    addrHistories = await AddressCache().requestBatch(
+        config=config,
+        endpoint=config.electrsEndpoint,
+        id=id,
+        method=GET_HISTORY_METHOD,
+        scriptHashes=scriptHashes
+    )
+
     _params = {param: params[param] for param in params if param != "addresses"}
-    tasks = []
+    response = []
 
-    for address in params["addresses"]:
+    for address, addrHistory in zip(params["addresses"], addrHistories):
         _params["address"] = address
-        tasks.append(
-            asyncio.ensure_future(
-                getAddressHistory(
-                    id=id,
-                    params=dict(_params),
-                    config=config
-                )
-            )
-        )
-
-    response = await asyncio.gather(*tasks)
+        response.append(addresshistory.parseAddressHistory(_params, addresshistory.sortAddressHistory(_params, addrHistory)))
 
     err = httputils.validateJSONSchema(response, responseSchema)
     if err is not None:
@@ -149,20 +116,15 @@ async def getAddressBalance(id, params, config):
         Logger.printError(f"Can not parse address {params['address']} to scriptHash")
         raise error.RpcBadRequestError(id=id, message="Address not valid")
 
-    connResponse = await RPCSocketConnector.request(
-        id=id,
+    connResponse = await AddressCache().request(
+        config=config,
         endpoint=config.electrsEndpoint,
+        id=id,
         method=GET_BALANCE_METHOD,
-        params=[scriptHash]
+        scriptHash=scriptHash
     )
 
-    response = {
-        "address": params["address"],
-        "balance": {
-            "confirmed": str(connResponse["confirmed"]),
-            "unconfirmed": str(connResponse["unconfirmed"])
-        }
-    }
+    response = utils.parseAddressBalance(params["address"], connResponse)
 
     err = httputils.validateJSONSchema(response, responseSchema)
     if err is not None:
@@ -183,21 +145,19 @@ async def getAddressesBalance(id, params, config):
     if err is not None:
         raise error.RpcBadRequestError(id=id, message=err.message)
 
-    tasks = []
+    scriptHashes = utils.addressesToScriptHashes(id, params["addresses"])
 
-    for address in params["addresses"]:
-        tasks.append(
-            asyncio.ensure_future(
-                getAddressBalance(
-                    id=id,
-                    params={
-                        "address": address
-                    },
-                    config=config
-                )
-            )
-        )
-    response = await asyncio.gather(*tasks)
+    balances = await AddressCache().requestBatch(
+        config=config,
+        endpoint=config.electrsEndpoint,
+        id=id,
+        method=GET_BALANCE_METHOD,
+        scriptHashes=scriptHashes
+    )
+
+    response = [
+        utils.parseAddressBalance(address, balance) for address, balance in zip(params["addresses"], balances)
+    ]
 
     err = httputils.validateJSONSchema(response, responseSchema)
     if err is not None:
@@ -224,31 +184,15 @@ async def getAddressUnspent(id, params, config):
     except ValueError:
         raise error.RpcBadRequestError(id=id, message="Bad request")
 
-    connResponse = await RPCSocketConnector.request(
+    connResponse = await AddressCache().request(
+        config=config,
         endpoint=config.electrsEndpoint,
         id=id,
         method=LIST_UNSPENT_METHOD,
-        params=[scriptHash]
+        scriptHash=scriptHash
     )
 
-    outputs = []
-    for tx in connResponse:
-        outputs.append(
-            {
-                "txHash": tx["tx_hash"],
-                "vout": str(tx["tx_pos"]),
-                "status": {
-                    "confirmed": tx["height"] != 0,
-                    "blockHeight": str(tx["height"])
-                },
-                "value": str(tx["value"])
-            }
-        )
-
-    response = {
-        "address": params["address"],
-        "outputs": outputs
-    }
+    response = utils.parseAddressUnspent(params["address"], connResponse)
 
     err = httputils.validateJSONSchema(response, responseSchema)
     if err is not None:
@@ -272,22 +216,19 @@ async def getAddressesUnspent(id, params, config):
             message=err.message
         )
 
-    tasks = []
+    scriptHashes = utils.addressesToScriptHashes(id, params["addresses"])
 
-    for address in params["addresses"]:
-        tasks.append(
-            asyncio.ensure_future(
-                getAddressUnspent(
-                    id=id,
-                    params={
-                        "address": address
-                    },
-                    config=config
-                )
-            )
-        )
+    unspents = await AddressCache().requestBatch(
+        config=config,
+        endpoint=config.electrsEndpoint,
+        id=id,
+        method=LIST_UNSPENT_METHOD,
+        scriptHashes=scriptHashes
+    )
 
-    response = await asyncio.gather(*tasks)
+    response = [
+        utils.parseAddressUnspent(address, unspent) for address, unspent in zip(params["addresses"], unspents)
+    ]
 
     err = httputils.validateJSONSchema(response, responseSchema)
     if err is not None:
@@ -311,16 +252,43 @@ async def getBlockByHash(id, params, config):
     if err is not None:
         raise error.RpcBadRequestError(id=id, message=err.message)
 
-    block = await RPCConnector.request(
-        endpoint=config.bitcoincoreRpcEndpoint,
-        id=id,
-        method=GET_BLOCK_METHOD,
-        params=[
-            params["blockHash"],
-            params["verbosity"] if "verbosity" in params else VERBOSITY_MORE_MODE
-        ]
+    verbosity = params["verbosity"] if "verbosity" in params else VERBOSITY_MORE_MODE
+
+    block = ImmutableCache().get(
+        coin=config.coin,
+        network=config.networkName,
+        hash=params["blockHash"],
+        kind=f"{BLOCK_CACHE_KIND}{verbosity}"
     )
 
+    if block is not None:
+        block["confirmations"] = await getBlockConfirmations(id, block["height"], config)
+    else:
+
+        block = await RPCConnector.request(
+            endpoint=config.bitcoincoreRpcEndpoint,
+            id=id,
+            method=GET_BLOCK_METHOD,
+            params=[
+                params["blockHash"],
+                verbosity
+            ]
+        )
+
+        # Blocks with the lowest verbosity are plain hex strings without confirmations, so they are not cached.
+        # Confirmations keep growing, so they are computed again on every read, and the next block hash changes
+        # if the block after this one is reorganized.
+        if isinstance(block, dict):
+            ImmutableCache().put(
+                coin=config.coin,
+                network=config.networkName,
+                hash=params["blockHash"],
+                value={key: value for key, value in block.items() if key != "confirmations"},
+                confirmations=block.get("confirmations", None),
+                kind=f"{BLOCK_CACHE_KIND}{verbosity}",
+                blockHashes=[params["blockHash"], block.get("nextblockhash", None)]
+            )
+
     response = {"block": block}
 
     err = httputils.validateJSONSchema(response, responseSchema)
@@ -419,20 +387,15 @@ async def getHeight(id, params, config):
     if err is not None:
         raise error.RpcBadRequestError(id=id, message=err.message)
 
-    latestBlockHeight = int(
-        await RPCConnector.request(
-            endpoint=config.bitcoincoreRpcEndpoint,
-            id=id,
-            method=GET_BLOCK_COUNT_METHOD,
-            params=[]
+    try:
+        latestBlockHeight, latestBlockHash = await ChainTipTracker().getOrFetch(
+            coin=config.coin,
+            network=config.networkName,
+            function=lambda: getChainTip(id, config)
         )
-    )
-    latestBlockHash = await RPCConnector.request(
-        endpoint=config.bitcoincoreRpcEndpoint,
-        id=id,
-        method=GET_BLOCK_HASH_METHOD,
-        params=[latestBlockHeight]
-    )
+    except error.RpcError as err:
+        # Chain tip polls are shared between callers, so errors are returned with the id of each one
+        raise err.withId(id)
 
     response = {
         "latestBlockIndex": str(latestBlockHeight),
@@ -446,6 +409,86 @@ async def getHeight(id, params, config):
     return response
 
 
+async def getChainTip(id, config):
+
+    blockchainInfo = await RPCConnector.request(
+        endpoint=config.bitcoincoreRpcEndpoint,
+        id=id,
+        method=GET_BLOCKCHAIN_INFO,
+        params=[]
+    )
+
+    return blockchainInfo["blocks"], blockchainInfo["bestblockhash"]
+
+
+async def getVerboseTransaction(id, txHash, config):
+
+    # The verbose transaction carries the confirmations needed to cache it
+    transaction = await RPCConnector.request(
+        endpoint=config.bitcoincoreRpcEndpoint,
+        id=id,
+        method=GET_RAW_TRANSACTION_METHOD,
+        params=[
+            txHash,
+            True
+        ]
+    )
+
+    confirmations = transaction.get("confirmations", None)
+
+    # Cached transactions keep the height of their block, so their confirmations are computed from the chain tip
+    if ImmutableCache().enabled and confirmations is not None and confirmations >= ImmutableCache().minConfirmations:
+
+        header = await RPCConnector.request(
+            endpoint=config.bitcoincoreRpcEndpoint,
+            id=id,
+            method=GET_BLOCK_HEADER_METHOD,
+            params=[transaction["blockhash"]]
+        )
+
+        value = {key: value for key, value in transaction.items() if key != "confirmations"}
+        value["blockheight"] = header["height"]
+
+        ImmutableCache().put(
+            coin=config.coin,
+            network=config.networkName,
+            hash=txHash,
+            value=value,
+            confirmations=confirmations,
+            kind=TRANSACTION_CACHE_KIND,
+            blockHashes=[transaction["blockhash"]]
+        )
+
+    return transaction
+
+
+async def getStoredTransaction(id, txHash, config):
+
+    transaction = ImmutableCache().get(
+        coin=config.coin,
+        network=config.networkName,
+        hash=txHash,
+        kind=TRANSACTION_CACHE_KIND
+    )
+
+    # Cached transactions come without confirmations, for callers that only read what is already in the block
+    if transaction is None:
+        transaction = await getVerboseTransaction(id, txHash, config)
+
+    return transaction
+
+
+async def getBlockConfirmations(id, blockHeight, config):
+
+    latestBlock = await getHeight(
+        id=id,
+        params={},
+        config=config
+    )
+
+    return int(latestBlock["latestBlockIndex"]) - blockHeight + 1
+
+
 """Returns raw transaction (hex)"""
 
 
@@ -461,19 +504,35 @@ async def getTransactionHex(id, params, config):
     if err is not None:
         raise error.RpcBadRequestError(id=id, message=err.message)
 
-    rawTransaction = await asyncio.ensure_future(
-        RPCConnector.request(
-            endpoint=config.bitcoincoreRpcEndpoint,
-            id=id,
-            method=GET_RAW_TRANSACTION_METHOD,
-            params=[
-                params["txHash"],
-                False if "verbose" not in params else params["verbose"]
-            ]
-        )
+    verbose = False if "verbose" not in params else params["verbose"]
+
+    transaction = ImmutableCache().get(
+        coin=config.coin,
+        network=config.networkName,
+        hash=params["txHash"],
+        kind=TRANSACTION_CACHE_KIND
     )
 
-    response = {"rawTransaction": rawTransaction}
+    if transaction is not None:
+        blockHeight = transaction.pop("blockheight")
+        if verbose:
+            transaction["confirmations"] = await getBlockConfirmations(id, blockHeight, config)
+    elif verbose or ImmutableCache().enabled:
+        transaction = await getVerboseTransaction(id, params["txHash"], config)
+    else:
+        transaction = {
+            "hex": await RPCConnector.request(
+                endpoint=config.bitcoincoreRpcEndpoint,
+                id=id,
+                method=GET_RAW_TRANSACTION_METHOD,
+                params=[
+                    params["txHash"],
+                    False
+                ]
+            )
+        }
+
+    response = {"rawTransaction": transaction if verbose else transaction["hex"]}
 
     err = httputils.validateJSONSchema(response, responseSchema)
     if err is not None:
@@ -619,22 +678,15 @@ async def getAddressTransactionCount(id, params, config):
     except ValueError:
         raise error.RpcBadRequestError(id=id, message="Address not valid")
 
-    txs = await RPCSocketConnector.request(
+    txs = await AddressCache().request(
+        config=config,
         endpoint=config.electrsEndpoint,
         id=id,
         method=GET_HISTORY_METHOD,
-        params=[scriptHash]
+        scriptHash=scriptHash
     )
 
-    pending = 0
-    for tx in txs:
-        if tx["height"] == 0:
-            pending += 1
-
-    response = {
-        "address": params["address"],
-        "transactionCount": str(pending) if params["pending"] else str(len(txs) - pending)
-    }
+    response = utils.parseAddressTransactionCount(params["address"], txs, params["pending"])
 
     err = httputils.validateJSONSchema(response, responseSchema)
     if err is not None:
@@ -655,20 +707,20 @@ async def getAddressesTransactionCount(id, params, config):
     if err is not None:
         raise error.RpcBadRequestError(id=id, message=err.message)
 
-    tasks = []
+    scriptHashes = utils.addressesToScriptHashes(id, [address["address"] for address in params["addresses"]])
 
-    for address in params["addresses"]:
-        tasks.append(
-            asyncio.ensure_future(
-                getAddressTransactionCount(
-                    id=id,
-                    params=address,
-                    config=config
-                )
-            )
-        )
+    addrHistories = await AddressCache().requestBatch(
+        config=config,
+        endpoint=config.electrsEndpoint,
+        id=id,
+        method=GET_HISTORY_METHOD,
+        scriptHashes=scriptHashes
+    )
 
-    transactionCounts = await asyncio.gather(*tasks)
+    transactionCounts = [
+        utils.parseAddressTransactionCount(address["address"], addrHistory, address["pending"])
+        for address, addrHistory in zip(params["addresses"], addrHistories)
+    ]
 
     err = httputils.validateJSONSchema(transactionCounts, responseSchema)
     if err is not None:
@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+import asyncio
+import binascii
+import random
+import sys
+import zmq
+import zmq.asyncio
+import zmq.utils.monitor
+from logger.logger import Logger
+from rpcutils.rpcconnector import RPCConnector
+from utils.chaintip import ChainTipTracker
+from utils.constants import BLOCK_NOTIFIER_RETRY_TIME
+from utils.reorgdetector import ReorgDetector
+from .constants import *
+
+
+class BlockNotifier:
+
+    def __init__(self, config):
+        self._config = config
+        self._task = None
+
+    def start(self):
+
+        if not self.config.bitcoincoreZmqEndpoint:
+            Logger.printInfo(f"No ZMQ endpoint for {self.config.coin} {self.config.networkName}, chain tip will be polled")
+            return
+
+        ChainTipTracker().setBlockTime(self.config.coin, self.config.networkName, BLOCK_TIME)
+        self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        ChainTipTracker().setPushing(self.config.coin, self.config.networkName, False)
+        ReorgDetector().remove(self.config.coin, self.config.networkName)
+
+    async def run(self):
+
+        while True:
+
+            zmqSocket = zmq.asyncio.Context.instance().socket(zmq.SUB)
+
+            # The monitor tells when the node goes away, pushed tips are not trusted until the stream delivers again
+            monitor = zmqSocket.get_monitor_socket(zmq.EVENT_DISCONNECTED)
+            poller = zmq.asyncio.Poller()
+            poller.register(zmqSocket, zmq.POLLIN)
+            poller.register(monitor, zmq.POLLIN)
+
+            try:
+                zmqSocket.setsockopt(zmq.RCVHWM, 0)
+                zmqSocket.setsockopt_string(zmq.SUBSCRIBE, NEW_HASH_BLOCK_ZMQ_TOPIC)
+                zmqSocket.connect(self.config.bitcoincoreZmqEndpoint)
+
+                Logger.printDebug(f"Listening to {NEW_HASH_BLOCK_ZMQ_TOPIC} on {self.config.bitcoincoreZmqEndpoint}")
+
+                while True:
+                    events = dict(await poller.poll())
+
+                    if monitor in events:
+                        self.onMonitorEvent(zmq.utils.monitor.parse_monitor_message(await monitor.recv_multipart()))
+
+                    if zmqSocket in events:
+                        payload = await zmqSocket.recv_multipart()
+
+                        if payload[0].decode("utf-8") == NEW_HASH_BLOCK_ZMQ_TOPIC:
+                            await self.onNewBlock(binascii.hexlify(payload[1]).decode("utf-8"))
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                Logger.printError(f"Block notifications for {self.config.coin} {self.config.networkName} failed: {err}")
+                ChainTipTracker().setPushing(self.config.coin, self.config.networkName, False)
+                await asyncio.sleep(BLOCK_NOTIFIER_RETRY_TIME)
+            finally:
+                monitor.close(linger=0)
+                zmqSocket.close(linger=0)
+
+    def onMonitorEvent(self, event):
+
+        if event["event"] == zmq.EVENT_DISCONNECTED:
+            Logger.printWarning(f"Block notifications for {self.config.coin} {self.config.networkName} disconnected, falling back to polling")
+            ChainTipTracker().setPushing(self.config.coin, self.config.networkName, False)
+
+    async def onNewBlock(self, blockHash):
+
+        Logger.printDebug(f"New block {blockHash} for {self.config.coin} {self.config.networkName}")
+
+        # The notification only carries the hash, the header gives the height it was mined at and its parent
+        header = await RPCConnector.request(
+            endpoint=self.config.bitcoincoreRpcEndpoint,
+            id=random.randint(1, sys.maxsize),
+            method=GET_BLOCK_HEADER_METHOD,
+            params=[blockHash]
+        )
+
+        ChainTipTracker().update(self.config.coin, self.config.networkName, header["height"], blockHash, pushed=True)
+
+        await ReorgDetector().onNewBlock(
+            coin=self.config.coin,
+            network=self.config.networkName,
+            height=header["height"],
+            hash=blockHash,
+            parentHash=header.get("previousblockhash", None),
+            getBlockHash=self.getBlockHash
+        )
+
+    async def getBlockHash(self, height):
+
+        return await RPCConnector.request(
+            endpoint=self.config.bitcoincoreRpcEndpoint,
+            id=random.randint(1, sys.maxsize),
+            method=GET_BLOCK_HASH_METHOD,
+            params=[height]
+        )
+
+    @property
+    def config(self):
+        return self._config
@@ -7,6 +7,7 @@ LIST_UNSPENT_METHOD = "blockchain.scripthash.listunspent"
 GET_BLOCK_METHOD = "getblock"
 GET_BLOCK_HASH_METHOD = "getblockhash"
 GET_BLOCK_COUNT_METHOD = "getblockcount"
+GET_BLOCK_HEADER_METHOD = "getblockheader"
 ESTIMATE_SMART_FEE_METHOD = "estimatesmartfee"
 GET_RAW_TRANSACTION_METHOD = "getrawtransaction"
 DECODE_RAW_TRANSACTION_METHOD = "decoderawtransaction"
@@ -48,6 +49,7 @@ GET_TRANSACTION_HEX = "gettransactionhex"
 GET_ADDRESSES_HISTORY = "getaddresseshistory"
 NOTIFY = "notify"
 NEW_HASH_BLOCK_ZMQ_TOPIC = "hashblock"
+BLOCK_TIME = 600  # Seconds
 NEW_RAW_BLOCK_ZMQ_TOPIC = "rawblock"
 GET_BLOCK = "getblock"
 
@@ -57,3 +59,6 @@ SUBSCRIBE_TO_NEW_BLOCKS = "subscribetonewblocks"
 UNSUBSCRIBE_FROM_NEW_BLOCKS = "unsubscribefromnewblocks"
 
 INVALID_ADDRESS_ERROR = "Invalid address"
+
+TRANSACTION_CACHE_KIND = "transaction"
+BLOCK_CACHE_KIND = "block"
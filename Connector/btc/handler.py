@@ -2,8 +2,12 @@
 from httputils.router import CurrencyHandler
 from httputils import httpmethod, httputils, error as httpError
 from rpcutils import rpcmethod, error
+from rpcutils.socketpool import SocketPool
+from utils.loadbalancer import getEndpoints
 from wsutils import wsmethod
 from logger.logger import Logger
+from utils.chaintip import ChainTipTracker
+from .blocknotifier import BlockNotifier
 from .config import Config
 from .constants import COIN_SYMBOL
 from . import utils
@@ -15,6 +19,7 @@ class Handler:
     def __init__(self, coin):
         self._coin = coin
         self._networksConfig = {}
+        self._blockNotifiers = {}  # Network -> BlockNotifier
 
     async def addConfig(self, network, config):
 
@@ -40,6 +45,9 @@ class Handler:
 
         self.networksConfig[network] = pkgConfig
 
+        self.blockNotifiers[network] = BlockNotifier(config=pkgConfig)
+        self.blockNotifiers[network].start()
+
         # AddressBalanceWs(
         #     coin=self.coin,
         #     config=self.networksConfig[network]
@@ -78,6 +86,12 @@ class Handler:
             Logger.printWarning(f"Configuration {network} not added for {self.coin}")
             return False, "Configuration not added"
 
+        for electrsEndpoint in getEndpoints(self.networksConfig[network].electrsEndpoint):
+            await SocketPool().closeConnections(electrsEndpoint)
+
+        await self.blockNotifiers.pop(network).stop()
+        ChainTipTracker().remove(self.coin, network)
+
         del self.networksConfig[network]
 
         # await websocket.stopWebSockets(
@@ -106,11 +120,20 @@ class Handler:
         if err is not None:
             raise httpError.BadRequestError(message=err.message)
 
+        previousElectrsEndpoints = getEndpoints(self.networksConfig[network].electrsEndpoint)
+
         ok, err = self.networksConfig[network].loadConfig(config=config)
         if not ok:
             Logger.printError(f"Can not load config for {network} for {self.coin}: {err}")
             return False, err
 
+        await self.blockNotifiers[network].stop()
+        self.blockNotifiers[network].start()
+
+        for electrsEndpoint in previousElectrsEndpoints:
+            if electrsEndpoint not in getEndpoints(self.networksConfig[network].electrsEndpoint):
+                await SocketPool().closeConnections(electrsEndpoint)
+
         # await websocket.stopWebSockets(
         #     coin=self.coin,
         #     networkName=network
@@ -187,5 +210,9 @@ class Handler:
     def networksConfig(self, value):
         self._networksConfig = value
 
+    @property
+    def blockNotifiers(self):
+        return self._blockNotifiers
+
 
 Handler(COIN_SYMBOL)
@@ -10,6 +10,8 @@ import random
 import sys
 from logger.logger import Logger
 from rpcutils import error
+from utils import addresshistory
+from utils.prevoutcache import PrevoutCache
 from wsutils import topics
 from .constants import *
 from . import apirpc
@@ -82,66 +84,35 @@ def getConfigSchema():
 
 async def decodeTransactionDetails(txDecoded, id, config):
 
-    outputs = []
-    for output in txDecoded["vout"]:
-        if "addresses" in output["scriptPubKey"] and len(output["scriptPubKey"]["addresses"]) == 1:
-            outputs.append(
-                {
-                    "amount": math.trunc(output["value"] * math.pow(10, BTC_PRECISION)),
-                    "address": output["scriptPubKey"]["addresses"][0]
-                }
-            )
-        else:
-            outputs.append(
-                {
-                    "amount": math.trunc(output["value"] * math.pow(10, BTC_PRECISION)),
-                    "address": None
-                }
-            )
+    outputs = [parseTransactionOutput(output) for output in txDecoded["vout"]]
 
     sumOutputs = sum([output["amount"] for output in outputs])
 
-    inputs = []
-    for txInput in txDecoded["vin"]:
-
-        if "coinbase" in txInput:  # This is a coinbase transaction and thus it have one only input of 'sumOutputs'
-            inputs.append(
-                {
-                    "amount": sumOutputs,
-                    "address": None
-                }
-            )
-            break
-
-        transaction = await asyncio.ensure_future(
-            apirpc.getTransactionHex(
-                id=id,
-                params={
-                    "txHash": txInput["txid"],
-                    "verbose": True
-                },
-                config=config
-            )
+    if len(txDecoded["vin"]) > 0 and "coinbase" in txDecoded["vin"][0]:
+        # This is a coinbase transaction and thus it have one only input of 'sumOutputs'
+        inputs = [
+            {
+                "amount": sumOutputs,
+                "address": None
+            }
+        ]
+    else:
+        prevouts = await PrevoutCache().resolve(
+            coin=config.coin,
+            network=config.networkName,
+            outpoints=[(txInput["txid"], txInput["vout"]) for txInput in txDecoded["vin"]],
+            fetch=lambda txid: getTransactionOutputs(txid, id, config)
         )
 
-        for txOutput in transaction["rawTransaction"]["vout"]:
-            if txOutput["n"] == txInput["vout"] and "addresses" in txOutput["scriptPubKey"] and len(
-                    txOutput["scriptPubKey"]["addresses"]) == 1:
-                inputs.append(
-                    {
-                        "amount": math.trunc(txOutput["value"] * math.pow(10, BTC_PRECISION)),
-                        "address": txOutput["scriptPubKey"]["addresses"][0]
-                    }
-                )
-            elif "addresses" not in txOutput["scriptPubKey"] or len(txOutput["scriptPubKey"]["addresses"]) != 1:
-                inputs.append(
-                    {
-                        "amount": math.trunc(txOutput["value"] * math.pow(10, BTC_PRECISION)),
-                        "address": None
-                    }
-                )
-
-    sumInputs = sum([txInput["amount"] for txInput in inputs])
+        inputs = [
+            {
+                "amount": amount,
+                "address": address
+            }
+            for address, amount in prevouts
+        ]
+
+    sumInputs = sum([txInput["amount"] for txInput in inputs if txInput["amount"] is not None])
 
     return {
         "fee": sumInputs - sumOutputs,
@@ -150,6 +121,92 @@ async def decodeTransactionDetails(txDecoded, id, config):
     }
 
 
+async def getTransactionOutputs(txHash, id, config):
+
+    # Resolving inputs only needs the outputs, so the confirmations of the transaction are not computed
+    transaction = await apirpc.getStoredTransaction(id, txHash, config)
+
+    outputs = []
+    for txOutput in transaction["vout"]:
+        output = parseTransactionOutput(txOutput)
+        outputs.append((txOutput["n"], output["address"], output["amount"]))
+
+    return outputs
+
+
+def parseTransactionOutput(output):
+
+    if "addresses" in output["scriptPubKey"] and len(output["scriptPubKey"]["addresses"]) == 1:
+        address = output["scriptPubKey"]["addresses"][0]
+    else:
+        address = None
+
+    return {
+        "amount": math.trunc(output["value"] * math.pow(10, BTC_PRECISION)),
+        "address": address
+    }
+
+
+def addressesToScriptHashes(id, addresses):
+
+    scriptHashes = []
+
+    for address in addresses:
+        try:
+            scriptHashes.append(ScriptHash.addressToScriptHash(address))
+        except ValueError:
+            Logger.printError(f"Can not parse address {address} to scriptHash")
+            raise error.RpcBadRequestError(id=id, message="Address not valid")
+
+    return scriptHashes
+
+
+def parseAddressBalance(address, balance):
+
+    return {
+        "address": address,
+        "balance": {
+            "confirmed": str(balance["confirmed"]),
+            "unconfirmed": str(balance["unconfirmed"])
+        }
+    }
+
+
+def parseAddressUnspent(address, unspent):
+
+    outputs = []
+    for tx in unspent:
+        outputs.append(
+            {
+                "txHash": tx["tx_hash"],
+                "vout": str(tx["tx_pos"]),
+                "status": {
+                    "confirmed": not addresshistory.isPendingHeight(tx["height"]),
+                    "blockHeight": str(tx["height"])
+                },
+                "value": str(tx["value"])
+            }
+        )
+
+    return {
+        "address": address,
+        "outputs": outputs
+    }
+
+
+def parseAddressTransactionCount(address, history, pending):
+
+    pendingCount = 0
+    for tx in history:
+        if addresshistory.isPendingHeight(tx["height"]):
+            pendingCount += 1
+
+    return {
+        "address": address,
+        "transactionCount": str(pendingCount) if pending else str(len(history) - pendingCount)
+    }
+
+
 def sortUnspentOutputs(outputs):
     try:
         return outputs['txHash']
@@ -9,9 +9,13 @@ from rpcutils import error
 from rpcutils.rpcmethod import RouteTableDef as RpcRouteTableDef
 from rpcutils.rpcconnector import RPCConnector
 from logger.logger import Logger
+from .blockheaders import BlockHeaderCache
 from .constants import *
+from .mempool import MempoolIndex
 from . import utils
-from utils import utils as globalUtils
+from utils import historycursor, utils as globalUtils
+from utils.chaintip import ChainTipTracker
+from utils.immutablecache import ImmutableCache
 
 
 @RpcRouteTableDef.rpc(currency=COIN_SYMBOL)
@@ -131,19 +135,19 @@ async def getHeight(id, params, config):
             message=err.message
         )
 
-    latestHash = await RPCConnector.request(
-        endpoint=config.rpcEndpoint,
-        id=id,
-        method=GET_BLOCK_BY_NUMBER_METHOD,
-        params=[
-            "latest",
-            True
-        ]
-    )
+    try:
+        latestBlockNumber, latestBlockHash = await ChainTipTracker().getOrFetch(
+            coin=config.coin,
+            network=config.networkName,
+            function=lambda: getChainTip(id, config)
+        )
+    except error.RpcError as err:
+        # Chain tip polls are shared between callers, so errors are returned with the id of each one
+        raise err.withId(id)
 
     response = {
-        "latestBlockIndex": str(int(latestHash["number"], 16)),
-        "latestBlockHash": latestHash["hash"]
+        "latestBlockIndex": str(latestBlockNumber),
+        "latestBlockHash": latestBlockHash
     }
 
     err = httputils.validateJSONSchema(response, responseSchema)
@@ -156,6 +160,22 @@ async def getHeight(id, params, config):
     return response
 
 
+async def getChainTip(id, config):
+
+    # Only the header fields are needed, so the block is requested without its transactions
+    latestBlock = await RPCConnector.request(
+        endpoint=config.rpcEndpoint,
+        id=id,
+        method=GET_BLOCK_BY_NUMBER_METHOD,
+        params=[
+            "latest",
+            False
+        ]
+    )
+
+    return int(latestBlock["number"], 16), latestBlock["hash"]
+
+
 @RpcRouteTableDef.rpc(currency=COIN_SYMBOL)
 @HttpRouteTableDef.post(currency=COIN_SYMBOL)
 async def broadcastTransaction(id, params, config):
@@ -213,6 +233,16 @@ async def getTransaction(id, params, config):
             message=err.message
         )
 
+    response = ImmutableCache().get(
+        coin=config.coin,
+        network=config.networkName,
+        hash=params["txHash"],
+        kind=TRANSACTION_CACHE_KIND
+    )
+
+    if response is not None:
+        return response
+
     transaction = await RPCConnector.request(
         endpoint=config.rpcEndpoint,
         id=id,
@@ -230,16 +260,14 @@ async def getTransaction(id, params, config):
     if transaction["blockNumber"] is not None:
         blockNumber = transaction["blockNumber"]
 
-        block = await getBlockByNumber(
+        # Only the timestamp is needed, the header is enough and is shared by every transaction of the block
+        _, timestamp = await BlockHeaderCache().getHeader(
+            config=config,
             id=id,
-            params={
-                "blockNumber": blockNumber
-            },
-            config=config
+            blockNumber=blockNumber,
+            blockHash=transaction["blockHash"]
         )
 
-        timestamp = block["block"]["timestamp"]
-
     response = {
         "transaction": {
             "txHash": params["txHash"],
@@ -270,6 +298,17 @@ async def getTransaction(id, params, config):
             message=err.message
         )
 
+    if blockNumber is not None:
+        ImmutableCache().put(
+            coin=config.coin,
+            network=config.networkName,
+            hash=params["txHash"],
+            value=response,
+            confirmations=await getBlockConfirmations(id, blockNumber, config),
+            kind=TRANSACTION_CACHE_KIND,
+            blockHashes=[transaction["blockHash"]]
+        )
+
     return response
 
 
@@ -564,8 +603,29 @@ async def getBlockByNumber(id, params, config):
 
     blockNumber = params["blockNumber"]
 
-    if blockNumber != "latest" and not utils.isHexNumber(blockNumber):
+    if blockNumber == "latest":
+        latestBlock = await getHeight(
+            id=id,
+            params={},
+            config=config
+        )
+        blockNumber = hex(int(latestBlock["latestBlockIndex"]))
+    elif not utils.isHexNumber(blockNumber):
         blockNumber = hex(int(blockNumber))
+    else:
+        blockNumber = hex(int(blockNumber, 16))
+
+    fullTransactions = True if "verbosity" not in params else params["verbosity"] == VERBOSITY_MORE_MODE
+
+    response = ImmutableCache().get(
+        coin=config.coin,
+        network=config.networkName,
+        hash=blockNumber,
+        kind=f"{BLOCK_CACHE_KIND}{fullTransactions}"
+    )
+
+    if response is not None:
+        return response
 
     block = await RPCConnector.request(
         endpoint=config.rpcEndpoint,
@@ -573,7 +633,7 @@ async def getBlockByNumber(id, params, config):
         method=GET_BLOCK_BY_NUMBER_METHOD,
         params=[
             blockNumber,
-            True if "verbosity" not in params else params["verbosity"] == VERBOSITY_MORE_MODE
+            fullTransactions
         ]
     )
 
@@ -583,6 +643,8 @@ async def getBlockByNumber(id, params, config):
             message="Block could not be retrieved from node"
         )
 
+    BlockHeaderCache().put(config.coin, config.networkName, int(blockNumber, 16), block["hash"], block["timestamp"])
+
     response = {"block": block}
 
     err = httputils.validateJSONSchema(response, responseSchema)
@@ -592,9 +654,30 @@ async def getBlockByNumber(id, params, config):
             message=err.message
         )
 
+    ImmutableCache().put(
+        coin=config.coin,
+        network=config.networkName,
+        hash=blockNumber,
+        value=response,
+        confirmations=await getBlockConfirmations(id, blockNumber, config),
+        kind=f"{BLOCK_CACHE_KIND}{fullTransactions}",
+        blockHashes=[block["hash"]]
+    )
+
     return response
 
 
+async def getBlockConfirmations(id, blockNumber, config):
+
+    latestBlock = await getHeight(
+        id=id,
+        params={},
+        config=config
+    )
+
+    return int(latestBlock["latestBlockIndex"]) - int(blockNumber, 16) + 1
+
+
 @RpcRouteTableDef.rpc(currency=COIN_SYMBOL)
 @HttpRouteTableDef.get(currency=COIN_SYMBOL)
 async def syncing(id, params, config):
@@ -708,49 +791,62 @@ async def getAddressHistory(id, params, config):
             message=err.message
         )
 
-    if "status" not in params or params["status"] in ["pending", "all"]:
-        pendingTask = asyncio.ensure_future(
-            getAddressPendingTransactions(
-                address=params["address"],
-                config=config
-            )
+    try:
+        state = utils.parseHistoryCursorState(historycursor.decodeCursor(params["cursor"])) if params.get("cursor", "") else None
+    except ValueError as err:
+        raise error.RpcBadRequestError(
+            id=id,
+            message=str(err)
         )
 
-    if "status" not in params or params["status"] in ["confirmed", "all"]:
-        confirmedTask = asyncio.ensure_future(
-            getAddressConfirmedTransactions(
-                address=params["address"],
-                config=config
-            )
-        )
+    async def fetchPending():
 
-    txs = []
-    if 'pendingTask' in locals():
-        txs += await pendingTask
+        if "status" in params and params["status"] == "confirmed":
+            return []
 
-    if 'confirmedTask' in locals():
-        txs += await confirmedTask
+        return await getAddressPendingTransactions(
+            address=params["address"],
+            config=config
+        )
 
-    txs = globalUtils.removeDuplicates(txs)
+    owner = utils.getAddressHistoryOwner(config, params)
+    pendingTxs, snapshotId = await historycursor.loadSnapshot(owner, state, fetchPending)
+
+    async def fetchConfirmed(offset, limit, recentFirst, after):
+        return await getAddressConfirmedTransactions(
+            address=params["address"],
+            config=config,
+            offset=offset,
+            limit=limit,
+            recentFirst=recentFirst,
+            after=after
+        )
 
-    recentFirst = "order" not in params or params["order"] == "desc"
+    confirmed = "status" not in params or params["status"] in ["confirmed", "all"]
 
-    paginatedTxs = globalUtils.paginate(
-        elements=txs,
+    txHashes, numElements, nextState = await paginateAddressHistory(
+        pendingTxs=pendingTxs,
+        fetchConfirmed=fetchConfirmed if confirmed else None,
         page=params["page"] if "page" in params else None,
         pageSize=params["pageSize"] if "pageSize" in params else None,
-        side="left" if recentFirst else "right"
+        recentFirst="order" not in params or params["order"] == "desc",
+        state=state
     )
 
     response = {
         "address": params["address"],
-        "txHashes": paginatedTxs if recentFirst else paginatedTxs[::-1],
+        "txHashes": txHashes,
         "maxPage": globalUtils.getMaxPage(
-            numElements=len(txs),
+            numElements=numElements,
             pageSize=params["pageSize"] if "pageSize" in params else None
         )
     }
 
+    # Requests opt into cursors with the cursor parameter, an empty one for the first page
+    if nextState is not None and "cursor" in params:
+        nextState["s"] = historycursor.keepSnapshot(owner, pendingTxs, snapshotId)
+        response["nextCursor"] = historycursor.encodeCursor(nextState)
+
     err = httputils.validateJSONSchema(response, responseSchema)
     if err is not None:
         raise error.RpcBadRequestError(
@@ -806,38 +902,50 @@ async def getAddressesHistory(id, params, config):
 async def getAddressPendingTransactions(address, config):
 
     try:
-
-        pendingTransactions = await HTTPConnector.post(
-            endpoint=config.rpcEndpoint,
-            path=GRAPHQL_PATH,
-            data={
-                "query": "query { pending { transactions { hash from { address } to { address } } } }"
-            }
-        )
-
+        return await MempoolIndex().getAddressTransactions(config, address)
     except httpError.Error:
         Logger.printError("Could not retrieve pending transactions using Graphql query")
         return []
 
-    txs = []
 
-    for tx in pendingTransactions["data"]["pending"]["transactions"]:
-        if utils.isAddressInvolvedInTx(address=address, tx=tx):
-            txs.append(tx["hash"])
+async def getAddressConfirmedTransactions(address, config, offset, limit, recentFirst=True, after=None):
+
+    return await queryConfirmedTransactions(
+        config=config,
+        filters=[
+            f"or(txfrom.eq.{address},txto.eq.{address})"
+        ],
+        offset=offset,
+        limit=limit,
+        recentFirst=recentFirst,
+        after=after
+    )
+
 
-    return txs
+async def queryConfirmedTransactions(config, filters, offset, limit, recentFirst=True, after=None):
 
+    direction = "desc" if recentFirst else "asc"
 
-async def getAddressConfirmedTransactions(address, config):
+    # Keyset continuation: rows strictly past the last (time, txhash) returned, in the walking direction
+    if after is not None:
+        operator = "lt" if recentFirst else "gt"
+        filters = filters + [f'or(time.{operator}."{after[0]}",and(time.eq."{after[0]}",txhash.{operator}.{after[1]}))']
 
     try:
-        txs = await HTTPConnector.get(
+        txs, headers = await HTTPConnector.get(
             endpoint=config.indexerEndpoint,
             path=INDEXER_TXS_PATH,
             params={
-                "and": f"(and(status.eq.true,or(txfrom.eq.{address},txto.eq.{address})))",
-                "order": "time.desc"
-            }
+                "select": "txhash,time",
+                "and": f"(and(status.eq.true,{','.join(filters)}))",
+                "order": f"time.{direction},txhash.{direction}",
+                "offset": offset,
+                "limit": limit
+            },
+            headers={
+                "Prefer": INDEXER_COUNT_PREFERENCE
+            },
+            withHeaders=True
         )
 
     except httpError.Error as err:
@@ -848,7 +956,102 @@ async def getAddressConfirmedTransactions(address, config):
             code=err.code
         )
 
-    return [tx["txhash"] for tx in txs]
+    return txs, httputils.getContentRangeTotal(headers)
+
+
+def countConfirmedTransactions(state, fromOffset, confirmedDone, confirmedTxs, confirmedCount):
+
+    if confirmedDone:
+        return state["c"] if not fromOffset else 0
+
+    # Without a count, or with an estimate below what has been read, the total is what has been read
+    seenCount = state["c"] + len(confirmedTxs) if confirmedTxs or not fromOffset else 0
+    if confirmedCount is None:
+        return seenCount
+
+    # Counts after a keyset only cover the rows past the last one returned
+    return max(seenCount, (state["c"] if state["k"] is not None else 0) + confirmedCount)
+
+
+async def getConfirmedCount(fetchConfirmed, confirmedCount, offset, recentFirst):
+
+    if confirmedCount is not None:
+        return confirmedCount
+
+    # Without a count from the indexer the rows ahead of the page are read to tell how many there are
+    rows, _ = await fetchConfirmed(0, offset, recentFirst, None)
+    return len(rows)
+
+
+async def paginateAddressHistory(pendingTxs, fetchConfirmed, page=None, pageSize=None, recentFirst=True, state=None):
+
+    # Newest first, the history is the pending transactions followed by the confirmed ones from the indexer,
+    # oldest first it is the reverse. Offset pages read the confirmed slice they cover with limit and offset,
+    # cursors carry on from the last confirmed row returned so the indexer never skips rows.
+    offset, limit = globalUtils.getPageWindow(page, pageSize)
+    walkedPending = pendingTxs if recentFirst else pendingTxs[::-1]
+
+    fromOffset = state is None
+    if fromOffset:
+        if recentFirst or fetchConfirmed is None:
+            pendingOffset, confirmedOffset = min(offset, len(pendingTxs)), max(0, offset - len(pendingTxs))
+        else:
+            pendingOffset, confirmedOffset = 0, offset
+        state = {"p": pendingOffset, "h": None, "k": None, "c": confirmedOffset, "d": False}
+
+    pendingPosition = historycursor.resumePosition(walkedPending, state["p"], state["h"])
+    confirmedTxs, confirmedCount, moreConfirmed = [], None, False
+    confirmedSeen = state["c"]
+    confirmedDone = state["d"] or fetchConfirmed is None
+
+    async def readConfirmed(count):
+
+        # One row past the page tells whether there is anything left
+        rows, total = await fetchConfirmed(state["c"] if state["k"] is None else 0, count + 1, recentFirst, state["k"])
+        return rows[:count], total, len(rows) > count
+
+    if recentFirst:
+        pagePending = walkedPending[pendingPosition:pendingPosition + limit]
+        if not confirmedDone:
+            confirmedTxs, confirmedCount, moreConfirmed = await readConfirmed(limit - len(pagePending))
+
+    else:
+        pagePending = []
+        if not confirmedDone:
+            confirmedTxs, confirmedCount, moreConfirmed = await readConfirmed(limit)
+
+            # An offset page past the end of the confirmed history needs the count to know where it falls
+            # among the pending transactions
+            if fromOffset and not confirmedTxs and offset > 0:
+                confirmedCount = await getConfirmedCount(fetchConfirmed, confirmedCount, offset, recentFirst)
+                confirmedSeen = min(offset, confirmedCount)
+                pendingPosition = offset - confirmedSeen
+
+        if not moreConfirmed:
+            pagePending = walkedPending[pendingPosition:pendingPosition + limit - len(confirmedTxs)]
+
+    numElements = len(pendingTxs) + countConfirmedTransactions(state, fromOffset, confirmedDone, confirmedTxs, confirmedCount)
+    pendingPosition += len(pagePending)
+    confirmedSeen += len(confirmedTxs)
+
+    if recentFirst:
+        txHashes = pagePending + [tx["txhash"] for tx in confirmedTxs]
+    else:
+        txHashes = [tx["txhash"] for tx in confirmedTxs] + pagePending
+
+    # A transaction mined since the mempool snapshot was taken can show up as pending and confirmed
+    txHashes = globalUtils.removeDuplicates(txHashes)
+
+    if not moreConfirmed and pendingPosition >= len(walkedPending):
+        return txHashes, numElements, None
+
+    return txHashes, numElements, {
+        "p": pendingPosition,
+        "h": walkedPending[pendingPosition - 1] if pendingPosition > 0 else None,
+        "k": [confirmedTxs[-1]["time"], confirmedTxs[-1]["txhash"]] if confirmedTxs else state["k"],
+        "c": confirmedSeen,
+        "d": confirmedDone or not moreConfirmed
+    }
 
 
 @RpcRouteTableDef.rpc(currency=COIN_SYMBOL)
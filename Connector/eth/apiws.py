@@ -5,6 +5,7 @@ from rpcutils import error
 from wsutils import topics
 from wsutils.wsmethod import RouteTableDef
 from wsutils.broker import Broker
+from .blockindex import AddressTopicClosingHandler, SubscribedAddresses
 from .constants import *
 from . import utils
 
@@ -23,17 +24,25 @@ async def subscribeToAddressBalance(subscriber, id, params, config):
             message=err.message
         )
 
-    return subscriber.subscribeToTopic(
+    topicName = f"{COIN_SYMBOL}{topics.TOPIC_SEPARATOR}" \
+                f"{config.networkName}{topics.TOPIC_SEPARATOR}" \
+                f"{topics.ADDRESS_BALANCE_TOPIC}{topics.TOPIC_SEPARATOR}" \
+                f"{params['address']}"
+
+    response = subscriber.subscribeToTopic(
         broker=Broker(),
         topic=topics.Topic(
-            name=f"{COIN_SYMBOL}{topics.TOPIC_SEPARATOR}"
-                 f"{config.networkName}{topics.TOPIC_SEPARATOR}"
-                 f"{topics.ADDRESS_BALANCE_TOPIC}{topics.TOPIC_SEPARATOR}"
-                 f"{params['address']}",
-            closingHandler=None
+            name=topicName,
+            closingHandler=AddressTopicClosingHandler(COIN_SYMBOL, config.networkName, params["address"])
         )
     )
 
+    # New blocks are matched against the addresses with a live topic, it is dropped with the topic
+    if Broker().isTopic(topicName):
+        SubscribedAddresses().add(COIN_SYMBOL, config.networkName, params["address"])
+
+    return response
+
 
 @RouteTableDef.ws(currency=COIN_SYMBOL)
 async def unsubscribeFromAddressBalance(subscriber, id, params, config):
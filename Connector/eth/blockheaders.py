@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+import threading
+from collections import OrderedDict
+from patterns import Singleton
+from rpcutils import error
+from rpcutils.rpcconnector import RPCConnector
+from utils import utils as globalUtils
+from .constants import *
+
+
+class BlockHeaderCache(object, metaclass=Singleton.Singleton):
+
+    def __init__(self):
+        self._maxEntries = globalUtils.getEnvProperty(BLOCK_HEADER_CACHE_SIZE_ENV, DEFAULT_BLOCK_HEADER_CACHE_SIZE)
+        self._headers = OrderedDict()  # (Coin, Network, Height) -> (Block hash, Timestamp)
+        self._lock = threading.Lock()  # The websocket worker fills it from its own thread
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, coin, network, height):
+
+        key = (coin, network, height)
+
+        with self._lock:
+            header = self._headers.get(key, None)
+            if header is not None:
+                self._headers.move_to_end(key)
+
+        return header
+
+    def put(self, coin, network, height, hash, timestamp):
+
+        if self._maxEntries <= 0:
+            return
+
+        key = (coin, network, height)
+
+        with self._lock:
+            self._headers[key] = (hash, timestamp)
+            self._headers.move_to_end(key)
+
+            while len(self._headers) > self._maxEntries:
+                self._headers.popitem(last=False)
+
+    async def getHeader(self, config, id, blockNumber, blockHash=None):
+
+        height = int(blockNumber, 16)
+        header = self.get(config.coin, config.networkName, height)
+
+        # A height can be mined again after a reorg, a known block hash tells whether the cached header still holds
+        if header is not None and (blockHash is None or header[0] == blockHash):
+            self._hits += 1
+            return header
+
+        self._misses += 1
+
+        block = await RPCConnector.request(
+            endpoint=config.rpcEndpoint,
+            id=id,
+            method=GET_BLOCK_BY_NUMBER_METHOD,
+            params=[
+                hex(height),
+                False
+            ]
+        )
+
+        if block is None:
+            raise error.RpcBadRequestError(
+                id=id,
+                message="Block could not be retrieved from node"
+            )
+
+        self.put(config.coin, config.networkName, height, block["hash"], block["timestamp"])
+
+        return block["hash"], block["timestamp"]
+
+    @property
+    def stats(self):
+        return {
+            "entries": len(self._headers),
+            "maxEntries": self._maxEntries,
+            "hits": self._hits,
+            "misses": self._misses
+        }
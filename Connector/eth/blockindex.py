@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+import threading
+from patterns import Singleton
+from utils import utils as globalUtils
+from .constants import *
+
+
+def getBlockParticipants(block, tokenTransfers=False):
+
+    participants = set()
+
+    for transaction in block["transactions"]:
+
+        participants.add(transaction["from"].lower())
+
+        # Contract creations have no recipient
+        if transaction["to"] is not None:
+            participants.add(transaction["to"].lower())
+
+        if tokenTransfers:
+            participants.update(getTokenTransferParties(transaction.get("input", None)))
+
+    return participants
+
+
+def getTokenTransferParties(inputData):
+
+    # Parties of ERC20 transfer and transferFrom calls, read from their 32 bytes address arguments
+    if not inputData:
+        return []
+
+    selector = inputData[:TOKEN_SELECTOR_LENGTH].lower()
+    if selector not in TOKEN_TRANSFER_ARGUMENTS:
+        return []
+
+    parties = []
+    for argument in range(TOKEN_TRANSFER_ARGUMENTS[selector]):
+        start = TOKEN_SELECTOR_LENGTH + argument * TOKEN_ARGUMENT_LENGTH + TOKEN_ADDRESS_PADDING
+        address = inputData[start:start + TOKEN_ADDRESS_LENGTH]
+        if len(address) == TOKEN_ADDRESS_LENGTH:
+            parties.append(f"0x{address.lower()}")
+
+    return parties
+
+
+class SubscribedAddresses(object, metaclass=Singleton.Singleton):
+
+    def __init__(self):
+        self._addresses = {}  # (Coin, Network) -> {Lower-cased address: {Address as subscribed}}
+        self._lock = threading.Lock()  # Subscriptions change on the server loop, blocks are matched on the websocket thread
+        self._tokenTransfers = bool(globalUtils.getEnvProperty(BLOCK_INDEX_TOKEN_TRANSFERS_ENV, DEFAULT_BLOCK_INDEX_TOKEN_TRANSFERS))
+
+    def add(self, coin, network, address):
+
+        with self._lock:
+            self._addresses.setdefault((coin, network), {}).setdefault(address.lower(), set()).add(address)
+
+    def remove(self, coin, network, address):
+
+        with self._lock:
+            addresses = self._addresses.get((coin, network), {})
+            spellings = addresses.get(address.lower(), set())
+            spellings.discard(address)
+            if not spellings:
+                addresses.pop(address.lower(), None)
+
+    def match(self, coin, network, block):
+
+        participants = getBlockParticipants(block, self._tokenTransfers)
+
+        # Only the smaller side is walked, either way the cost does not grow with the other one
+        with self._lock:
+            addresses = self._addresses.get((coin, network), {})
+            if len(participants) <= len(addresses):
+                matches = [addresses[participant] for participant in participants if participant in addresses]
+            else:
+                matches = [spellings for address, spellings in addresses.items() if address in participants]
+
+            return [address for spellings in matches for address in spellings]
+
+
+class AddressTopicClosingHandler:
+
+    def __init__(self, coin, network, address):
+        self._coin = coin
+        self._network = network
+        self._address = address
+
+    def close(self):
+        SubscribedAddresses().remove(self._coin, self._network, self._address)
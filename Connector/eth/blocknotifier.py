@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+import aiohttp
+import asyncio
+import random
+import sys
+from logger.logger import Logger
+from rpcutils import constants as rpcConstants, error
+from rpcutils.rpcconnector import RPCConnector
+from utils import jsoncodec
+from utils.chaintip import ChainTipTracker
+from utils.constants import BLOCK_NOTIFIER_RETRY_TIME
+from utils.loadbalancer import LoadBalancer
+from utils.reorgdetector import ReorgDetector
+from wsutils.clientwebsocket import ClientWebSocket
+from .constants import *
+
+
+class BlockNotifier:
+
+    def __init__(self, config):
+        self._config = config
+        self._task = None
+
+    def start(self):
+
+        if not self.config.wsEndpoint:
+            Logger.printInfo(f"No websocket endpoint for {self.config.coin} {self.config.networkName}, chain tip will be polled")
+            return
+
+        ChainTipTracker().setBlockTime(self.config.coin, self.config.networkName, BLOCK_TIME)
+        self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        ChainTipTracker().setPushing(self.config.coin, self.config.networkName, False)
+        ReorgDetector().remove(self.config.coin, self.config.networkName)
+
+    async def run(self):
+
+        while True:
+
+            wsEndpoint = LoadBalancer().pick(self.config.wsEndpoint)
+
+            try:
+                async with ClientWebSocket(wsEndpoint) as session:
+
+                    await session.connect()
+                    await session.send(
+                        {
+                            rpcConstants.ID: random.randint(1, sys.maxsize),
+                            rpcConstants.METHOD: SUBSCRIBE_METHOD,
+                            rpcConstants.PARAMS: [
+                                NEW_HEADS_SUBSCRIPTION
+                            ]
+                        }
+                    )
+
+                    Logger.printDebug(f"Listening to {NEW_HEADS_SUBSCRIPTION} on {wsEndpoint}")
+
+                    async for msg in session.websocket:
+
+                        if msg.type != aiohttp.WSMsgType.TEXT:
+                            break
+
+                        payload = jsoncodec.loads(msg.data)
+
+                        # The first message is the subscription id, headers come as subscription notifications
+                        if rpcConstants.PARAMS in payload:
+                            await self.onNewHead(payload[rpcConstants.PARAMS][rpcConstants.RESULT])
+
+            except asyncio.CancelledError:
+                raise
+            except (aiohttp.ClientError, OSError, ValueError, KeyError, error.RpcError) as err:
+                Logger.printError(f"Block notifications for {self.config.coin} {self.config.networkName} failed: {err}")
+
+            ChainTipTracker().setPushing(self.config.coin, self.config.networkName, False)
+            await asyncio.sleep(BLOCK_NOTIFIER_RETRY_TIME)
+
+    async def onNewHead(self, header):
+
+        Logger.printDebug(f"New block {header['hash']} for {self.config.coin} {self.config.networkName}")
+
+        ChainTipTracker().update(self.config.coin, self.config.networkName, int(header["number"], 16), header["hash"], pushed=True)
+
+        await ReorgDetector().onNewBlock(
+            coin=self.config.coin,
+            network=self.config.networkName,
+            height=int(header["number"], 16),
+            hash=header["hash"],
+            parentHash=header["parentHash"],
+            getBlockHash=self.getBlockHash
+        )
+
+    async def getBlockHash(self, height):
+
+        block = await RPCConnector.request(
+            endpoint=self.config.rpcEndpoint,
+            id=random.randint(1, sys.maxsize),
+            method=GET_BLOCK_BY_NUMBER_METHOD,
+            params=[
+                hex(height),
+                False
+            ]
+        )
+
+        return block["hash"]
+
+    @property
+    def config(self):
+        return self._config
@@ -14,6 +14,7 @@ CALL_METHOD = "eth_call"
 TXPOOL_CONTENT = "txpool_content"
 
 NEW_HEADS_SUBSCRIPTION = "newHeads"
+BLOCK_TIME = 12  # Seconds
 
 RPC_JSON_SCHEMA_FOLDER = "eth/rpcschemas/"
 WS_JSON_SCHEMA_FOLDER = "eth/wsschemas/"
@@ -49,9 +50,43 @@ GET_PENDING_TRANSACTIONS = "getpendingtransactions"
 INDEXER_TXS_PATH = "/ethtxs"
 INDEXER_MAX_BLOCK_PATH = "/max_block"
 GRAPHQL_PATH = "/graphql"
+INDEXER_COUNT_PREFERENCE = "count=estimated"
+INDEXER_TIME_PATTERN = r"[0-9A-Za-z :.+-]+"
+TX_HASH_PATTERN = r"0x[0-9a-fA-F]{64}"
+
+HISTORY_CURSOR_FIELDS = {
+    "s": (None, (str, type(None))),  # Pending transactions snapshot id
+    "p": (0, int),  # Pending transactions already returned
+    "h": (None, (str, type(None))),  # Last pending transaction returned
+    "k": (None, (list, type(None))),  # Time and hash of the last confirmed transaction returned
+    "c": (0, int),  # Confirmed transactions already returned
+    "d": (False, bool)  # Confirmed transactions exhausted
+}
+
+MEMPOOL_REFRESH_INTERVAL_ENV = "ETH_MEMPOOL_REFRESH_INTERVAL"
+DEFAULT_MEMPOOL_REFRESH_INTERVAL = 2  # Seconds
+MEMPOOL_MAX_AGE_INTERVALS = 2
+MEMPOOL_IDLE_INTERVALS = 10
+
+BLOCK_INDEX_TOKEN_TRANSFERS_ENV = "ETH_BLOCK_INDEX_TOKEN_TRANSFERS"
+DEFAULT_BLOCK_INDEX_TOKEN_TRANSFERS = 0
+TOKEN_SELECTOR_LENGTH = 10  # 0x and 4 bytes
+TOKEN_ARGUMENT_LENGTH = 64
+TOKEN_ADDRESS_PADDING = 24
+TOKEN_ADDRESS_LENGTH = 40
+TOKEN_TRANSFER_ARGUMENTS = {
+    "0xa9059cbb": 1,  # transfer(address,uint256)
+    "0x23b872dd": 2  # transferFrom(address,address,uint256)
+}
+
+BLOCK_HEADER_CACHE_SIZE_ENV = "ETH_BLOCK_HEADER_CACHE_SIZE"
+DEFAULT_BLOCK_HEADER_CACHE_SIZE = 4096  # Blocks
 
 VERBOSITY_MORE_MODE = 2
 VERBOSITY_LESS_MODE = 1
 
 COIN_SYMBOL = "eth"
 DEFAULT_PKG_CONF = "defaultConf.json"
+
+TRANSACTION_CACHE_KIND = "transaction"
+BLOCK_CACHE_KIND = "block"
@@ -13,7 +13,7 @@ from httputils.httpconnector import HTTPConnector
 from logger.logger import Logger
 from .constants import *
 from . import utils
-from utils import utils as globalutils
+from utils import historycursor, utils as globalutils
 
 
 @RpcRouteTableDef.rpc(currency=COIN_SYMBOL, standard=ERC20_STANDARD_SYMBOL)
@@ -248,60 +248,54 @@ async def getAddressHistory(id, params, config):
             message=err.message
         )
 
-    recentFirst = "order" not in params or params["order"] == "desc"
-
-    if "status" not in params or params["status"] in ["pending", "all"]:
-        pendingTask = asyncio.ensure_future(
-            getAddressPendingTransactions(
-                address=params["address"],
-                contractAddresses=params["contractAddresses"],
-                config=config
-            )
-        )
-
-    if "status" not in params or params["status"] in ["confirmed", "all"]:
-        confirmedTask = asyncio.ensure_future(
-            getAddressConfirmedTransactions(
-                address=params["address"],
-                contractAddresses=params["contractAddresses"],
-                config=config
-            )
+    try:
+        states = decodeHistoryCursor(params["cursor"], params["contractAddresses"]) if params.get("cursor", "") else {}
+    except ValueError as err:
+        raise error.RpcBadRequestError(
+            id=id,
+            message=str(err)
         )
 
-    txs = {}
-
-    if 'pendingTask' in locals():
-        txs = await pendingTask
+    fetchPending = getPendingTransactionsFetcher(params, config)
 
-    if 'confirmedTask' in locals():
-        confirmedTransactions = await confirmedTask
-
-        if not txs:
-            txs = {contractAddress: [] for contractAddress in params["contractAddresses"]}
+    pages = await asyncio.gather(
+        *[
+            getContractHistoryPage(
+                params=params,
+                config=config,
+                contractAddress=contractAddress,
+                state=states.get(contractAddress, None),
+                fetchPending=fetchPending
+            )
+            for contractAddress in params["contractAddresses"]
+        ]
+    )
 
-        for contractAddress in params["contractAddresses"]:
-            if Web3.toChecksumAddress(contractAddress) in confirmedTransactions:
-                txs[contractAddress] += confirmedTransactions[Web3.toChecksumAddress(contractAddress)]
+    # One cursor carries on with every contract of the request
+    nextCursor = None
+    if any(nextState is not None for _, _, nextState in pages):
+        nextCursor = historycursor.encodeCursor(
+            {
+                contractAddress: nextState if nextState is not None else numElements
+                for contractAddress, (_, numElements, nextState) in zip(params["contractAddresses"], pages)
+            }
+        )
 
     response = {}
-    for contractAddress, hashes in txs.items():
-
-        paginatedTxs = globalutils.paginate(
-            elements=hashes,
-            page=params["page"] if "page" in params else None,
-            pageSize=params["pageSize"] if "pageSize" in params else None,
-            side="left" if recentFirst else "right"
-        )
+    for contractAddress, (txHashes, numElements, _) in zip(params["contractAddresses"], pages):
 
         response[contractAddress] = {
             "address": params["address"],
-            "txHashes": paginatedTxs if recentFirst else paginatedTxs[::-1],
+            "txHashes": txHashes,
             "maxPage": globalutils.getMaxPage(
-                numElements=len(txs[contractAddress]),
+                numElements=numElements,
                 pageSize=params["pageSize"] if "pageSize" in params else None
             )
         }
 
+        if nextCursor is not None:
+            response[contractAddress]["nextCursor"] = nextCursor
+
     err = httputils.validateJSONSchema(response, responseSchema)
     if err is not None:
         raise error.RpcBadRequestError(
@@ -401,34 +395,110 @@ async def getAddressPendingTransactions(address, contractAddresses, config):
     return txs
 
 
-async def getAddressConfirmedTransactions(address, contractAddresses, config):
+async def getAddressConfirmedTransactions(address, contractAddress, config, offset, limit, recentFirst=True, after=None):
 
-    try:
+    addressPrefixLength = 24
 
-        addressPrefixLength = 24
+    return await ethapirpc.queryConfirmedTransactions(
+        config=config,
+        filters=[
+            f"txto.eq.{Web3.toChecksumAddress(contractAddress)}",
+            f"or(txfrom.eq.{address},contract_to.eq.{'0'*addressPrefixLength}{address[2:]})"
+        ],
+        offset=offset,
+        limit=limit,
+        recentFirst=recentFirst,
+        after=after
+    )
 
-        confirmedTransactions = await HTTPConnector.get(
-            endpoint=config.indexerEndpoint,
-            path=INDEXER_TXS_PATH,
-            params={
-                "and": f"(and(status.eq.true,txto.in.({','.join(contractAddresses)}),or(txfrom.eq.{address},contract_to.eq.{'0'*addressPrefixLength}{address[2:]})))",
-                "order": "time.desc"
-            }
-        )
 
-    except httpError.Error as err:
-        raise error.RpcError(
-            id=random.randint(1, sys.maxsize),
-            message=err.message,
-            code=err.code
+def getPendingTransactionsFetcher(params, config):
+
+    pendingTask = None
+
+    # Contracts whose snapshot is gone share a single pending transactions lookup
+    async def fetchPending(contractAddress):
+
+        nonlocal pendingTask
+
+        if "status" in params and params["status"] == "confirmed":
+            return []
+
+        if pendingTask is None:
+            pendingTask = asyncio.ensure_future(
+                getAddressPendingTransactions(
+                    address=params["address"],
+                    contractAddresses=params["contractAddresses"],
+                    config=config
+                )
+            )
+
+        return (await pendingTask)[contractAddress]
+
+    return fetchPending
+
+
+def getConfirmedTransactionsFetcher(params, config, contractAddress):
+
+    if "status" in params and params["status"] not in ["confirmed", "all"]:
+        return None
+
+    async def fetchConfirmed(offset, limit, recentFirst, after):
+        return await getAddressConfirmedTransactions(
+            address=params["address"],
+            contractAddress=contractAddress,
+            config=config,
+            offset=offset,
+            limit=limit,
+            recentFirst=recentFirst,
+            after=after
         )
 
-    txs = {contractAddress: [] for contractAddress in contractAddresses}
+    return fetchConfirmed
 
-    for contractAddress in contractAddresses:
-        txs[contractAddress] = []
-        for tx in confirmedTransactions:
-            if tx["txto"] == Web3.toChecksumAddress(contractAddress):
-                txs[contractAddress].append(tx["txhash"])
 
-    return txs
+async def getContractHistoryPage(params, config, contractAddress, state, fetchPending):
+
+    # Contracts a cursor already walked to the end only keep their number of transactions
+    if isinstance(state, int):
+        return [], state, None
+
+    owner = ethutils.getAddressHistoryOwner(config, params) + (contractAddress,)
+    pendingTxs, snapshotId = await historycursor.loadSnapshot(owner, state, lambda: fetchPending(contractAddress))
+
+    txHashes, numElements, nextState = await ethapirpc.paginateAddressHistory(
+        pendingTxs=pendingTxs,
+        fetchConfirmed=getConfirmedTransactionsFetcher(params, config, contractAddress),
+        page=params["page"] if "page" in params else None,
+        pageSize=params["pageSize"] if "pageSize" in params else None,
+        recentFirst="order" not in params or params["order"] == "desc",
+        state=state
+    )
+
+    # Plain page requests never hold a pending transactions snapshot
+    if "cursor" not in params:
+        return txHashes, numElements, None
+
+    if nextState is not None:
+        nextState["s"] = historycursor.keepSnapshot(owner, pendingTxs, snapshotId)
+
+    return txHashes, numElements, nextState
+
+
+def decodeHistoryCursor(cursor, contractAddresses):
+
+    states = historycursor.decodeCursor(cursor)
+
+    # Contracts not in the cursor start from the beginning, walked ones are kept as their number of transactions
+    decoded = {}
+    for contractAddress in contractAddresses:
+        if contractAddress not in states:
+            continue
+        if isinstance(states[contractAddress], int):
+            if states[contractAddress] < 0:
+                raise ValueError("Cursor not valid")
+            decoded[contractAddress] = states[contractAddress]
+        else:
+            decoded[contractAddress] = ethutils.parseHistoryCursorState(states[contractAddress])
+
+    return decoded
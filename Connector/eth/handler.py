@@ -5,7 +5,10 @@ from rpcutils import rpcmethod, error
 from wsutils import wsmethod, topics
 from wsutils.broker import Broker
 from logger.logger import Logger
+from utils.chaintip import ChainTipTracker
+from .blocknotifier import BlockNotifier
 from .config import Config
+from .mempool import MempoolIndex
 from .constants import COIN_SYMBOL
 from . import utils
 
@@ -16,6 +19,7 @@ class Handler:
     def __init__(self, coin):
         self._coin = coin
         self._networksConfig = {}
+        self._blockNotifiers = {}  # Network -> BlockNotifier
 
     async def addConfig(self, network, config):
 
@@ -41,6 +45,11 @@ class Handler:
 
         self.networksConfig[network] = pkgConfig
 
+        self.blockNotifiers[network] = BlockNotifier(config=pkgConfig)
+        self.blockNotifiers[network].start()
+
+        MempoolIndex().start(pkgConfig)
+
         # WebSocket(
         #    coin=self.coin,
         #    config=self.networksConfig[network]
@@ -81,6 +90,10 @@ class Handler:
         #     for subscriber in list(broker.getTopicSubscribers(topic)):
         #         subscriber.close(broker=broker)
 
+        await self.blockNotifiers.pop(network).stop()
+        ChainTipTracker().remove(self.coin, network)
+        await MempoolIndex().stop(self.networksConfig[network])
+
         del self.networksConfig[network]
 
         return True, None
@@ -106,6 +119,12 @@ class Handler:
             Logger.printError(f"Can not load config for {network} for {self.coin}: {err}")
             return False, err
 
+        await self.blockNotifiers[network].stop()
+        self.blockNotifiers[network].start()
+
+        await MempoolIndex().stop(self.networksConfig[network])
+        MempoolIndex().start(self.networksConfig[network])
+
         # WebSocket(
         #     coin=self.coin,
         #     config=self.networksConfig[network]
@@ -163,5 +182,9 @@ class Handler:
     def networksConfig(self, value):
         self._networksConfig = value
 
+    @property
+    def blockNotifiers(self):
+        return self._blockNotifiers
+
 
 Handler(COIN_SYMBOL)
@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+import asyncio
+import time
+from httputils import error as httpError
+from httputils.httpconnector import HTTPConnector
+from logger.logger import Logger
+from patterns import Singleton
+from utils import utils as globalUtils
+from .constants import *
+
+
+class MempoolIndex(object, metaclass=Singleton.Singleton):
+
+    def __init__(self):
+        self._refreshInterval = globalUtils.getEnvProperty(MEMPOOL_REFRESH_INTERVAL_ENV, DEFAULT_MEMPOOL_REFRESH_INTERVAL, float)
+        self._snapshots = {}  # (Coin, Network) -> [{Lower-cased address: [Transaction hashes]}, Update time, Last read time]
+        self._tasks = {}  # (Coin, Network) -> Refresh task
+        self._refreshing = {}  # (Coin, Network) -> Download in flight
+        self._refreshes = 0
+
+    def start(self, config):
+        self._tasks[(config.coin, config.networkName)] = asyncio.ensure_future(self.run(config))
+
+    async def stop(self, config):
+
+        for tasks in (self._tasks, self._refreshing):
+            task = tasks.pop((config.coin, config.networkName), None)
+            if task is not None:
+                task.cancel()
+
+        self._snapshots.pop((config.coin, config.networkName), None)
+
+    async def run(self, config):
+
+        key = (config.coin, config.networkName)
+
+        while True:
+            await asyncio.sleep(self._refreshInterval)
+
+            # The mempool is only downloaded while someone is reading it
+            snapshot = self._snapshots.get(key, None)
+            if snapshot is None or time.monotonic() - snapshot[2] > MEMPOOL_IDLE_INTERVALS * self._refreshInterval:
+                continue
+
+            try:
+                await self.refresh(config)
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                Logger.printError(f"Could not refresh pending transactions of {config.coin} {config.networkName}: {err}")
+
+    async def refresh(self, config):
+
+        key = (config.coin, config.networkName)
+
+        # Readers finding a stale snapshot and the refresh task wait for the same download
+        task = self._refreshing.get(key, None)
+        if task is None:
+            task = asyncio.ensure_future(self._download(config))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda done: self._onDownloaded(key, done))
+
+        # A cancelled reader does not cancel the download for everyone else waiting for it
+        await asyncio.shield(task)
+
+    def _onDownloaded(self, key, task):
+
+        if self._refreshing.get(key, None) is task:
+            del self._refreshing[key]
+
+        # Marks the exception as retrieved in case every reader was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _download(self, config):
+
+        pendingTransactions = await HTTPConnector.post(
+            endpoint=config.rpcEndpoint,
+            path=GRAPHQL_PATH,
+            data={
+                "query": "query { pending { transactions { hash from { address } to { address } } } }"
+            }
+        )
+
+        # GraphQL reports failed queries in an errors member of an otherwise successful response
+        try:
+            transactions = pendingTransactions["data"]["pending"]["transactions"]
+        except (KeyError, TypeError):
+            raise httpError.BadGatewayError(message=f"Pending transactions query failed: {pendingTransactions}")
+
+        index = {}
+        for tx in transactions:
+            for party in (tx["from"], tx["to"]):
+                if party is not None:
+                    index.setdefault(party["address"].lower(), []).append(tx["hash"])
+
+        self._refreshes += 1
+
+        previous = self._snapshots.get((config.coin, config.networkName), None)
+        self._snapshots[(config.coin, config.networkName)] = [index, time.monotonic(), previous[2] if previous else time.monotonic()]
+
+    async def getAddressTransactions(self, config, address):
+
+        key = (config.coin, config.networkName)
+        snapshot = self._snapshots.get(key, None)
+
+        # Snapshots left behind by an idle refresh task are renewed by the first reader
+        if snapshot is None or time.monotonic() - snapshot[1] > MEMPOOL_MAX_AGE_INTERVALS * self._refreshInterval:
+            await self.refresh(config)
+            snapshot = self._snapshots[key]
+
+        snapshot[2] = time.monotonic()
+
+        # Transactions sent to the same address they come from appear once
+        return list(dict.fromkeys(snapshot[0].get(address.lower(), [])))
+
+    @property
+    def stats(self):
+        return {
+            "snapshots": {
+                f"{coin}/{network}": {
+                    "addresses": len(snapshot[0]),
+                    "age": round(time.monotonic() - snapshot[1], 3)
+                }
+                for (coin, network), snapshot in self._snapshots.items()
+            },
+            "refreshes": self._refreshes
+        }
@@ -1,7 +1,8 @@
 #!/usr/bin/python3
+import re
 from logger.logger import Logger
+from utils import historycursor
 from .constants import *
-from web3 import Web3
 
 
 def ensureHash(hashAddr):
@@ -38,13 +39,6 @@ def getWSResponseMethodSchema(name):
     return f"{WS_JSON_SCHEMA_FOLDER}{name}{SCHEMA_CHAR_SEPARATOR}{RESPONSE}{SCHEMA_EXTENSION}"
 
 
-def isAddressInBlock(address, block):
-    for transaction in block["transactions"]:
-        if address.lower() == transaction["from"].lower() or address.lower() == transaction["to"].lower():
-            return True
-    return False
-
-
 def getSyncPercentage(currentBlock, latestBlock):
     return (currentBlock * 100) / latestBlock
 
@@ -65,12 +59,29 @@ def isHexNumber(number: str):
     return any(number.startswith(prefix) for prefix in ["0x", "0X"])
 
 
-def isAddressInvolvedInTx(address, tx):
+def getConfigSchema():
+    return f"{RPC_JSON_SCHEMA_FOLDER}config{SCHEMA_EXTENSION}"
 
-    addr = Web3.toChecksumAddress(address)
-    return (Web3.toChecksumAddress(tx["from"]["address"]) == addr) or \
-           (tx["to"] is not None and Web3.toChecksumAddress(tx["to"]["address"]) == addr)
 
+def getAddressHistoryOwner(config, params):
+    return (
+        config.coin,
+        config.networkName,
+        params["address"],
+        params["status"] if "status" in params else None,
+        params["order"] if "order" in params else None
+    )
 
-def getConfigSchema():
-    return f"{RPC_JSON_SCHEMA_FOLDER}config{SCHEMA_EXTENSION}"
+
+def parseHistoryCursorState(state):
+
+    state = historycursor.parseCursorState(state, HISTORY_CURSOR_FIELDS)
+
+    # The last key ends up inside indexer filters, it can only be a plain time and transaction hash
+    if state["k"] is not None:
+        if len(state["k"]) != 2 or not isinstance(state["k"][0], (int, str)) or not isinstance(state["k"][1], str):
+            raise ValueError("Cursor not valid")
+        if re.fullmatch(INDEXER_TIME_PATTERN, str(state["k"][0])) is None or re.fullmatch(TX_HASH_PATTERN, state["k"][1]) is None:
+            raise ValueError("Cursor not valid")
+
+    return state
@@ -1,17 +1,20 @@
 #!/usr/bin/python3
 import aiohttp
 import asyncio
-import json
 import random
 import sys
 import threading
 from logger.logger import Logger
 from rpcutils import rpcutils, constants as rpcConstants, error
+from utils import jsoncodec
+from utils.loadbalancer import LoadBalancer
 from wsutils.clientwebsocket import ClientWebSocket
 from wsutils import topics, websocket
 from wsutils.broker import Broker
 from wsutils.publishers import Publisher
 from . import apirpc, utils
+from .blockheaders import BlockHeaderCache
+from .blockindex import SubscribedAddresses
 from .constants import *
 
 
@@ -43,9 +46,11 @@ class WebSocket:
     async def ethereumClient(self):
 
         while True:
-            async with ClientWebSocket(self.config.wsEndpoint) as session:
+            wsEndpoint = LoadBalancer().pick(self.config.wsEndpoint)
+
+            async with ClientWebSocket(wsEndpoint) as session:
                 self.session = session
-                Logger.printDebug(f"Connecting to {self.config.wsEndpoint}")
+                Logger.printDebug(f"Connecting to {wsEndpoint}")
                 await session.connect()
 
                 payload = {
@@ -57,7 +62,7 @@ class WebSocket:
                 }
 
                 Logger.printDebug(f"Subscribing to {NEW_HEADS_SUBSCRIPTION}")
-                Logger.printDebug(f"Making request {payload} to {self.config.wsEndpoint}")
+                Logger.printDebug(f"Making request {payload} to {wsEndpoint}")
 
                 await session.send(payload)
 
@@ -66,7 +71,7 @@ class WebSocket:
 
                     if msg.type == aiohttp.WSMsgType.TEXT:
 
-                        Logger.printInfo(f"Message received for {self.coin} websocket from {self.config.wsEndpoint}: {msg.data}")
+                        Logger.printInfo(f"Message received for {self.coin} websocket from {wsEndpoint}: {msg.data}")
 
                         if msg.data == 'close':
                             closed = True
@@ -74,7 +79,7 @@ class WebSocket:
 
                         else:
                             try:
-                                payload = json.loads(msg.data)
+                                payload = jsoncodec.loads(msg.data)
                                 if rpcConstants.PARAMS in payload:
                                     await self.ethereumWSWorker(payload[rpcConstants.PARAMS])
                                 else:
@@ -95,6 +100,15 @@ class WebSocket:
         Logger.printDebug(f"Getting new block to check addresses subscribed for. Block number: "
                           f"{params[rpcConstants.RESULT]['number']}")
 
+        # New heads carry the header, transactions of this block looked up later will not fetch it again
+        BlockHeaderCache().put(
+            self.config.coin,
+            self.config.networkName,
+            int(blockNumber, 16),
+            params[rpcConstants.RESULT]["hash"],
+            params[rpcConstants.RESULT]["timestamp"]
+        )
+
         broker = Broker()
         publisher = Publisher()
         id = random.randint(1, sys.maxsize)
@@ -124,34 +138,31 @@ class WebSocket:
             publisher.publish(broker, topics.NEW_BLOCKS_TOPIC, err.jsonEncode())
             return
 
-        for address in broker.getSubTopics(f"{self.coin}{topics.TOPIC_SEPARATOR}"
-                                           f"{self.config.networkName}{topics.TOPIC_SEPARATOR}"
-                                           f"{topics.ADDRESS_BALANCE_TOPIC}"):
+        # The block is turned once into its set of participants, only the subscribed ones are visited
+        for address in SubscribedAddresses().match(self.coin, self.config.networkName, block["block"]):
 
-            if utils.isAddressInBlock(address, block["block"]):
+            try:
+                balanceResponse = await apirpc.getAddressBalance(
+                    id,
+                    {
+                        "address": address
+                    },
+                    self.config
+                )
 
-                try:
-                    balanceResponse = await apirpc.getAddressBalance(
+                publisher.publish(
+                    broker=broker,
+                    topic=f"{self.coin}{topics.TOPIC_SEPARATOR}{self.config.networkName}{topics.TOPIC_SEPARATOR}"
+                          f"{topics.ADDRESS_BALANCE_TOPIC}{topics.TOPIC_SEPARATOR}{address}",
+                    message=rpcutils.generateRPCResultResponse(
                         id,
-                        {
-                            "address": address
-                        },
-                        self.config
+                        balanceResponse
                     )
-
-                    publisher.publish(
-                        broker=broker,
-                        topic=f"{self.coin}{topics.TOPIC_SEPARATOR}{self.config.networkName}{topics.TOPIC_SEPARATOR}"
-                              f"{topics.ADDRESS_BALANCE_TOPIC}{topics.TOPIC_SEPARATOR}{address}",
-                        message=rpcutils.generateRPCResultResponse(
-                            id,
-                            balanceResponse
-                        )
-                    )
-                except error.RpcBadRequestError as err:
-                    Logger.printError(f"Can not get address balance for [{address}] {err}")
-                    publisher.publish(broker, topics.NEW_BLOCKS_TOPIC, err.jsonEncode())
-                    return
+                )
+            except error.RpcBadRequestError as err:
+                Logger.printError(f"Can not get address balance for [{address}] {err}")
+                publisher.publish(broker, topics.NEW_BLOCKS_TOPIC, err.jsonEncode())
+                return
 
     async def stop(self):
         await self.session.close()
@@ -10,5 +10,21 @@ UNAUTHORIZED_ERROR_CODE = 401
 BAD_GATEWAY_CODE = 502
 
 JSON_CONTENT_TYPE = "application/json"
+CONTENT_RANGE_HEADER = "Content-Range"
 POST_METHOD = "POST"
 GET_METHOD = "GET"
+
+HTTP_SCHEMES = ("http", "https")
+SESSION_POOL_SIZE_ENV = "SESSION_POOL_SIZE"
+SESSION_KEEPALIVE_TIMEOUT_ENV = "SESSION_KEEPALIVE_TIMEOUT"
+SESSION_DNS_CACHE_TTL_ENV = "SESSION_DNS_CACHE_TTL"
+DEFAULT_SESSION_POOL_SIZE = 100
+DEFAULT_SESSION_KEEPALIVE_TIMEOUT = 30
+DEFAULT_SESSION_DNS_CACHE_TTL = 300
+SESSION_CONNECT_TIMEOUT_ENV = "SESSION_CONNECT_TIMEOUT"
+SESSION_READ_TIMEOUT_ENV = "SESSION_READ_TIMEOUT"
+DEFAULT_SESSION_CONNECT_TIMEOUT = 10
+DEFAULT_SESSION_READ_TIMEOUT = 0  # Disabled, upstream deadlines bound the whole request
+HTTP_MAX_RESPONSE_SIZE_ENV = "HTTP_MAX_RESPONSE_SIZE"
+DEFAULT_HTTP_MAX_RESPONSE_SIZE = 0  # Unlimited
+HTTP_READ_CHUNK_SIZE = 2 ** 16
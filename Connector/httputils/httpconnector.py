@@ -1,49 +1,135 @@
 #!/usr/bin/python
 from logger.logger import Logger
+from utils import jsoncodec, utils
+from utils.concurrencylimiter import ConcurrencyLimiter
+from utils.loadbalancer import LoadBalancer, CircuitOpenError
+from utils.singleflight import SingleFlight, getRequestKey
 from . import error
+from .constants import *
+from .sessionpool import SessionPool
 from http import HTTPStatus
+import asyncio
 import aiohttp
 
 
 class HTTPConnector:
 
     @staticmethod
-    async def get(endpoint, path="", params=None, headers=None):
+    async def get(endpoint, path="", params=None, headers=None, withHeaders=False):
 
         Logger.printDebug(f"Making HTTP Get request to {endpoint}. Params: {params}")
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{endpoint}{path}", headers=headers, params=params) as resp:
+        response = await HTTPConnector._request(
+            endpoint=endpoint,
+            method=f"GET {path}",
+            params={"params": params, "headers": headers, "withHeaders": withHeaders},
+            function=lambda replica: HTTPConnector._get(replica, path, params, headers, withHeaders),
+            hedge=True
+        )
 
-                if resp.status != HTTPStatus.OK:
-                    raise error.BadGatewayError()
+        Logger.printDebug(f"Response received from {endpoint}: {response}")
+
+        return response
+
+    @staticmethod
+    async def _get(endpoint, path, params, headers, withHeaders):
 
-                try:
-                    response = await resp.json()
-                except aiohttp.ContentTypeError as err:
-                    Logger.printError(f"Json in client response is not supported: {str(err)}")
+        async with SessionPool().session(endpoint) as session:
+            async with session.get(f"{endpoint}{path}", headers=headers, params=params) as resp:
+
+                # Ranged responses, like a limited PostgREST query with a count, come as partial content
+                if resp.status not in (HTTPStatus.OK, HTTPStatus.PARTIAL_CONTENT):
                     raise error.BadGatewayError()
 
-        Logger.printDebug(f"Response received from {endpoint}: {response}")
+                if withHeaders:
+                    return await HTTPConnector._readJson(resp), resp.headers.copy()
 
-        return response
+                return await HTTPConnector._readJson(resp)
 
     @staticmethod
     async def post(endpoint, path="", data=None):
 
         Logger.printDebug(f"Making HTTP Post request to {endpoint}.")
 
-        async with aiohttp.ClientSession() as session:
+        response = await HTTPConnector._request(
+            endpoint=endpoint,
+            method=f"POST {path}",
+            params=data,
+            function=lambda replica: HTTPConnector._post(replica, path, data),
+            hedge=False
+        )
+
+        Logger.printDebug(f"Response received from {endpoint}: {response}")
+
+        return response
+
+    @staticmethod
+    async def _post(endpoint, path, data):
+
+        async with SessionPool().session(endpoint) as session:
             async with session.post(f"{endpoint}{path}", json=data) as resp:
 
                 if resp.status != HTTPStatus.OK:
                     raise error.BadGatewayError()
-                try:
-                    response = await resp.json()
-                except aiohttp.ContentTypeError as err:
-                    Logger.printError(f"Json in client response is not supported: {str(err)}")
-                    raise error.BadGatewayError()
 
-        Logger.printDebug(f"Response received from {endpoint}: {response}")
+                return await HTTPConnector._readJson(resp)
 
-        return response
+    @staticmethod
+    async def _readJson(resp):
+
+        maxSize = utils.getEnvProperty(HTTP_MAX_RESPONSE_SIZE_ENV, DEFAULT_HTTP_MAX_RESPONSE_SIZE)
+
+        if not maxSize:
+            try:
+                return await resp.json(loads=jsoncodec.loads)
+            except aiohttp.ContentTypeError as err:
+                Logger.printError(f"Json in client response is not supported: {str(err)}")
+                raise error.BadGatewayError()
+
+        if resp.content_type != JSON_CONTENT_TYPE:
+            Logger.printError(f"Json in client response is not supported: {resp.content_type}")
+            raise error.BadGatewayError()
+
+        if resp.content_length is not None and resp.content_length > maxSize:
+            Logger.printError(f"Response from {resp.url} of {resp.content_length} bytes exceeds the {maxSize} bytes limit")
+            raise error.BadGatewayError()
+
+        # Responses without a known length are read in chunks so an oversized body is dropped before it is buffered
+        body = bytearray()
+        async for chunk in resp.content.iter_chunked(HTTP_READ_CHUNK_SIZE):
+            body.extend(chunk)
+            if len(body) > maxSize:
+                Logger.printError(f"Response from {resp.url} exceeds the {maxSize} bytes limit")
+                raise error.BadGatewayError()
+
+        try:
+            return jsoncodec.loads(bytes(body))
+        except ValueError as err:
+            Logger.printError(f"Json in client response is not valid: {str(err)}")
+            raise error.BadGatewayError()
+
+    @staticmethod
+    async def _request(endpoint, method, params, function, hedge):
+
+        try:
+            return await SingleFlight().do(
+                getRequestKey(endpoint, method, params),
+                lambda: LoadBalancer().request(
+                    endpoints=endpoint,
+                    function=function,
+                    errors=(aiohttp.ClientConnectionError,),
+                    method=method,
+                    hedge=hedge,
+                    slot=lambda replica: ConcurrencyLimiter().slot(
+                        endpoint=replica,
+                        errors=(aiohttp.ClientConnectionError, asyncio.TimeoutError),
+                        method=method
+                    )
+                )
+            )
+        except CircuitOpenError as err:
+            Logger.printError(f"Failing fast on {method} request: {str(err)}")
+            raise error.BadGatewayError()
+        except asyncio.TimeoutError:
+            Logger.printError(f"Request {method} to {endpoint} timed out")
+            raise error.BadGatewayError()
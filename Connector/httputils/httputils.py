@@ -1,15 +1,15 @@
 #!/usr/bin/python3
-import json
 from logger.logger import Logger
 from . import error
+from .constants import *
 import jsonschema
-from utils import utils
+from utils import utils, jsoncodec
 
 
 def parseJSONRequest(request):
 
     try:
-        return json.loads(request)
+        return jsoncodec.loads(request)
     except Exception as e:
         Logger.printError(f"Payload is not JSON message: {e}")
         raise error.BadRequestError("Payload is not JSON message")
@@ -35,3 +35,15 @@ def isGetMethod(method):
 
 def isPostMethod(method):
     return method == "POST"
+
+
+def getContentRangeTotal(headers):
+
+    # Content-Range looks like "0-49/1234" or "*/1234", the total is "*" when the server did not count
+    contentRange = headers.get(CONTENT_RANGE_HEADER, None) if headers is not None else None
+    if contentRange is None:
+        return None
+
+    total = contentRange.rpartition("/")[2]
+
+    return int(total) if total.isdigit() else None
@@ -1,7 +1,7 @@
 #!/usr/bin/python
 from aiohttp import web
-import json
 from logger.logger import Logger
+from utils import concurrencylimiter, jsoncodec
 from .constants import *
 from . import error
 
@@ -20,6 +20,14 @@ async def jsonContentType(request, handler):
     )
 
 
+@web.middleware
+async def flowHandler(request, handler):
+
+    concurrencylimiter.startFlow()
+
+    return await handler(request)
+
+
 @web.middleware
 async def errorHandler(request, handler):
 
@@ -29,13 +37,13 @@ async def errorHandler(request, handler):
         Logger.printError(f"Returning error in error handler {err.jsonEncode()}")
         return web.Response(
             status=err.code,
-            text=json.dumps(err.jsonEncode())
+            body=jsoncodec.dumps(err.jsonEncode())
         )
     except web.HTTPClientError as err:
         return web.Response(
             status=err.status,
             headers=err.headers,
-            text=json.dumps(
+            body=jsoncodec.dumps(
                 error.Error(message=err.text, code=err.status).jsonEncode()
             )
         )
@@ -43,7 +51,7 @@ async def errorHandler(request, handler):
         Logger.printError("Returning unknown error in error handler")
         return web.Response(
             status=INTERNAL_SERVER_ERROR_CODE,
-            text=json.dumps(
+            body=jsoncodec.dumps(
                 error.InternalServerError(
                     message=str(err)
                 ).jsonEncode()
@@ -1,10 +1,10 @@
 #!/usr/bin/python
 from aiohttp import web
-import json
 from logger.logger import Logger
 from patterns import Singleton
-from utils import utils
+from utils import utils, jsoncodec
 from . import error
+from .sessionpool import SessionPool
 
 currenciesHandler = {}
 
@@ -41,7 +41,7 @@ class Router(object, metaclass=Singleton.Singleton):
         )
 
         return web.Response(
-            text=json.dumps(response)
+            body=jsoncodec.dumps(response)
         )
 
     async def doHTTPRoute(self, request):
@@ -73,7 +73,7 @@ class Router(object, metaclass=Singleton.Singleton):
         )
 
         return web.Response(
-            text=json.dumps(response)
+            body=jsoncodec.dumps(response)
         )
 
     async def doWsRoute(self, request):
@@ -119,7 +119,7 @@ class Router(object, metaclass=Singleton.Singleton):
         )
 
         return web.Response(
-            text=json.dumps(response)
+            body=jsoncodec.dumps(response)
         )
 
     async def addCoin(self, coin, network, config):
@@ -147,6 +147,8 @@ class Router(object, metaclass=Singleton.Singleton):
                 "message": err
             }
 
+        await SessionPool().openNetworkSessions(coin=coin, network=network, config=config)
+
         if coin not in self._availableCoins:
             self._availableCoins[coin] = {
                 network: None
@@ -192,6 +194,7 @@ class Router(object, metaclass=Singleton.Singleton):
         ok, err = await coinHandler.removeConfig(network)
 
         if ok:
+            await SessionPool().closeNetworkSessions(coin=coin, network=network)
             utils.removeConfig(coin=coin, network=network)
 
         return {
@@ -263,6 +266,7 @@ class Router(object, metaclass=Singleton.Singleton):
         ok, err = await coinHandler.updateConfig(network, config)
 
         if ok:
+            await SessionPool().openNetworkSessions(coin=coin, network=network, config=config)
             utils.saveConfig(coin=coin, network=network, config=config)
 
         return {
@@ -0,0 +1,123 @@
+#!/usr/bin/python
+import asyncio
+import aiohttp
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+from logger.logger import Logger
+from patterns import Singleton
+from utils import jsoncodec, utils
+from utils.loadbalancer import getEndpoints
+from .constants import *
+
+
+class SessionPool(object, metaclass=Singleton.Singleton):
+
+    def __init__(self):
+        self._sessions = {}  # Endpoint -> aiohttp.ClientSession
+        self._networkEndpoints = {}  # Coin -> Network -> [Endpoint]
+        self._loop = None
+
+    async def openNetworkSessions(self, coin, network, config):
+
+        endpoints = getHttpEndpoints(config)
+        self._loop = asyncio.get_event_loop()
+
+        for endpoint in endpoints:
+            if endpoint not in self._sessions or self._sessions[endpoint].closed:
+                Logger.printDebug(f"Opening pooled session for {endpoint}")
+                self._sessions[endpoint] = createSession()
+
+        if coin not in self._networkEndpoints:
+            self._networkEndpoints[coin] = {}
+
+        previousEndpoints = self._networkEndpoints[coin].get(network, [])
+        self._networkEndpoints[coin][network] = endpoints
+
+        await self._closeUnusedSessions(previousEndpoints)
+
+    async def closeNetworkSessions(self, coin, network):
+
+        if coin not in self._networkEndpoints or network not in self._networkEndpoints[coin]:
+            return
+
+        endpoints = self._networkEndpoints[coin].pop(network)
+        if len(self._networkEndpoints[coin]) == 0:
+            del self._networkEndpoints[coin]
+
+        await self._closeUnusedSessions(endpoints)
+
+    async def _closeUnusedSessions(self, endpoints):
+
+        endpointsInUse = {
+            endpoint
+            for networks in self._networkEndpoints.values()
+            for networkEndpoints in networks.values()
+            for endpoint in networkEndpoints
+        }
+
+        for endpoint in endpoints:
+            if endpoint not in endpointsInUse and endpoint in self._sessions:
+                Logger.printDebug(f"Closing pooled session for {endpoint}")
+                await self._sessions.pop(endpoint).close()
+
+    async def closeAllSessions(self):
+
+        for endpoint in list(self._sessions):
+            await self._sessions.pop(endpoint).close()
+
+        self._networkEndpoints = {}
+
+    def getSession(self, endpoint):
+
+        session = self._sessions.get(endpoint, None)
+
+        # Sessions are bound to the loop they were opened in, so other loops (websocket threads) get none
+        if session is None or session.closed or self._loop is not asyncio.get_event_loop():
+            return None
+
+        return session
+
+    @asynccontextmanager
+    async def session(self, endpoint):
+
+        session = self.getSession(endpoint)
+
+        if session is not None:
+            yield session
+            return
+
+        async with aiohttp.ClientSession(json_serialize=jsoncodec.dumpsString) as session:
+            yield session
+
+
+def createSession():
+
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=0,
+            limit_per_host=utils.getEnvProperty(SESSION_POOL_SIZE_ENV, DEFAULT_SESSION_POOL_SIZE),
+            keepalive_timeout=utils.getEnvProperty(SESSION_KEEPALIVE_TIMEOUT_ENV, DEFAULT_SESSION_KEEPALIVE_TIMEOUT),
+            use_dns_cache=True,
+            ttl_dns_cache=utils.getEnvProperty(SESSION_DNS_CACHE_TTL_ENV, DEFAULT_SESSION_DNS_CACHE_TTL)
+        ),
+        json_serialize=jsoncodec.dumpsString,
+        timeout=aiohttp.ClientTimeout(
+            total=None,
+            sock_connect=utils.getEnvProperty(SESSION_CONNECT_TIMEOUT_ENV, DEFAULT_SESSION_CONNECT_TIMEOUT, float) or None,
+            sock_read=utils.getEnvProperty(SESSION_READ_TIMEOUT_ENV, DEFAULT_SESSION_READ_TIMEOUT, float) or None
+        )
+    )
+
+
+def getHttpEndpoints(config):
+
+    endpoints = []
+
+    for value in config.values():
+        if not isinstance(value, (str, list)):
+            continue
+        for endpoint in getEndpoints(value):
+            if isinstance(endpoint, str) and urlparse(endpoint).scheme in HTTP_SCHEMES and endpoint not in endpoints:
+                endpoints.append(endpoint)
+
+    return endpoints
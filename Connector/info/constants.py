@@ -2,3 +2,4 @@
 
 GET_VERSION_METHOD = "getVersion"
 GET_STATUS = "getStatus"
+GET_STATS = "getStats"
@@ -1,10 +1,18 @@
 #!/usr/bin/python
-import json
 from aiohttp import web
 from httputils.app import appModule
 from logger.logger import Logger
 from .constants import *
-from utils import utils
+from utils import utils, jsoncodec
+from utils.addresscache import AddressCache
+from utils.chaintip import ChainTipTracker
+from utils.concurrencylimiter import ConcurrencyLimiter
+from utils.historycursor import HistorySnapshots
+from utils.immutablecache import ImmutableCache
+from utils.loadbalancer import LoadBalancer
+from utils.prevoutcache import PrevoutCache
+from utils.reorgdetector import ReorgDetector
+from utils.singleflight import SingleFlight
 
 routes = web.RouteTableDef()
 
@@ -15,7 +23,7 @@ async def getVersion(request):
     Logger.printDebug("Executing getVersion method")
 
     return web.Response(
-        text=json.dumps(
+        body=jsoncodec.dumps(
             {
                 "version": utils.getConfigProperty("version")
             }
@@ -29,13 +37,35 @@ async def getStatus(request):
     Logger.printDebug("Executing getStatus method")
 
     return web.Response(
-        text=json.dumps(
+        body=jsoncodec.dumps(
             {
                 "status": "Connector is running"
             }
         )
     )
 
+
+@routes.get(f"/{GET_STATS}")
+async def getStats(request):
+
+    Logger.printDebug("Executing getStats method")
+
+    return web.Response(
+        body=jsoncodec.dumps(
+            {
+                "singleFlight": SingleFlight().stats,
+                "replicas": LoadBalancer().stats,
+                "concurrencyLimits": ConcurrencyLimiter().stats,
+                "immutableCache": ImmutableCache().stats,
+                "chainTips": ChainTipTracker().stats,
+                "reorgs": ReorgDetector().stats,
+                "prevoutCache": PrevoutCache().stats,
+                "addressCache": AddressCache().stats,
+                "historySnapshots": HistorySnapshots().stats
+            }
+        )
+    )
+
 infoModule = web.Application()
 infoModule.add_routes(routes)
 
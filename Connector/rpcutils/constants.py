@@ -18,3 +18,36 @@ BAD_GATEWAY_CODE = 502
 UNKNOWN_RPC_REQUEST_ID = -1
 RPC_ENDPOINT_PATH = "rpc"
 POST_METHOD = "POST"
+SOCKET_POOL_SIZE_ENV = "SOCKET_POOL_SIZE"
+DEFAULT_SOCKET_POOL_SIZE = 4
+SUBSCRIBE_METHOD_SUFFIX = ".subscribe"
+UNSUBSCRIBE_METHOD_SUFFIX = ".unsubscribe"
+RPC_BATCH_ENABLED_ENV = "RPC_BATCH_ENABLED"
+RPC_BATCH_WINDOW_ENV = "RPC_BATCH_WINDOW"
+RPC_BATCH_MAX_SIZE_ENV = "RPC_BATCH_MAX_SIZE"
+DEFAULT_RPC_BATCH_ENABLED = 0
+DEFAULT_RPC_BATCH_WINDOW = 2  # Milliseconds
+DEFAULT_RPC_BATCH_MAX_SIZE = 100
+SOCKET_BATCH_SIZE_ENV = "SOCKET_BATCH_SIZE"
+DEFAULT_SOCKET_BATCH_SIZE = 100
+METHOD_TIMEOUTS_ENV = "UPSTREAM_METHOD_TIMEOUTS"
+DEFAULT_METHOD_TIMEOUTS = {
+    "sendrawtransaction": 60,
+    "eth_sendRawTransaction": 60,
+    "blockchain.transaction.broadcast": 60,
+    "blockchain.scripthash.get_history": 60,
+    "getblock": 60,
+    "getblockchaininfo": 10,
+    "getbestblockhash": 10,
+    "eth_blockNumber": 10
+}
+NON_IDEMPOTENT_METHODS = [
+    "sendrawtransaction",
+    "eth_sendRawTransaction",
+    "blockchain.transaction.broadcast",
+    "send_raw_transaction"
+]
+SOCKET_READ_CHUNK_SIZE_ENV = "SOCKET_READ_CHUNK_SIZE"
+DEFAULT_SOCKET_READ_CHUNK_SIZE = 2 ** 16
+SOCKET_MAX_RESPONSE_SIZE_ENV = "SOCKET_MAX_RESPONSE_SIZE"
+DEFAULT_SOCKET_MAX_RESPONSE_SIZE = 2 ** 26
@@ -30,6 +30,17 @@ class RpcError(Exception):
     def jsonEncode(self):
         return RpcErrorEncoder().encode(self)
 
+    def withId(self, id):
+
+        if id == self.id:
+            return self
+
+        err = self.__class__.__new__(self.__class__)
+        err.__dict__.update(self.__dict__)
+        err.args = self.args
+        err._id = id
+        return err
+
 
 class RpcBadRequestError(RpcError):
 
@@ -76,6 +87,12 @@ class RpcBadGatewayError(RpcError):
         return httpError.BadGatewayError(self.message)
 
 
+class RpcNodeOverloadedError(RpcBadGatewayError):
+
+    def __init__(self, id: int, message: str = "Node is overloaded"):
+        super().__init__(id=id, message=message)
+
+
 class RpcErrorEncoder(JSONEncoder):
 
     def encode(self, o):
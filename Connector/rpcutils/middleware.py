@@ -1,7 +1,7 @@
 #!/usr/bin/python
 from aiohttp import web
-import json
 from logger.logger import Logger
+from utils import jsoncodec
 from . import error
 
 
@@ -14,5 +14,5 @@ async def errorHandler(request, handler):
         Logger.printError(f"Returning RPC error in error handler {err.jsonEncode()}")
         return web.Response(
             status=err.code,
-            text=json.dumps(err.jsonEncode())
+            body=jsoncodec.dumps(err.jsonEncode())
         )
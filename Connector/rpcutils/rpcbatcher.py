@@ -0,0 +1,112 @@
+#!/usr/bin/python
+import asyncio
+import aiohttp
+from http import HTTPStatus
+from logger.logger import Logger
+from httputils.sessionpool import SessionPool
+from patterns import Singleton
+from utils import jsoncodec, utils
+from . import error
+from .constants import *
+
+
+class RPCBatcher(object, metaclass=Singleton.Singleton):
+
+    def __init__(self):
+        self._enabled = bool(utils.getEnvProperty(RPC_BATCH_ENABLED_ENV, DEFAULT_RPC_BATCH_ENABLED))
+        self._window = utils.getEnvProperty(RPC_BATCH_WINDOW_ENV, DEFAULT_RPC_BATCH_WINDOW, float) / 1000
+        self._maxSize = max(1, utils.getEnvProperty(RPC_BATCH_MAX_SIZE_ENV, DEFAULT_RPC_BATCH_MAX_SIZE))
+        self._queues = {}  # Endpoint -> [(Payload, Future)]
+        self._timers = {}  # Endpoint -> Flush timer
+        self._nextId = 0
+
+    def isBatchable(self, endpoint):
+        # Only pooled endpoints are batched, which also keeps every batch within the server loop
+        return self._enabled and SessionPool().getSession(endpoint) is not None
+
+    async def request(self, endpoint, payload):
+
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        # Ids are rewritten so calls sharing the same request id can be told apart inside a batch
+        self._nextId += 1
+
+        if endpoint not in self._queues:
+            self._queues[endpoint] = []
+
+        queue = self._queues[endpoint]
+        queue.append((payload[ID], dict(payload, id=self._nextId), future))
+
+        if len(queue) >= self._maxSize:
+            self._flush(endpoint)
+        elif endpoint not in self._timers:
+            self._timers[endpoint] = loop.call_later(self._window, self._flush, endpoint)
+
+        return await future
+
+    def _flush(self, endpoint):
+
+        timer = self._timers.pop(endpoint, None)
+        if timer is not None:
+            timer.cancel()
+
+        batch = self._queues.pop(endpoint, [])
+        if batch:
+            asyncio.ensure_future(self._send(endpoint, batch))
+
+    async def _send(self, endpoint, batch):
+
+        Logger.printDebug(f"Making RPC batch request to {endpoint} with {len(batch)} calls")
+
+        pending = {payload[ID]: (callerId, future) for callerId, payload, future in batch}
+        failure = None
+
+        try:
+            responses = await self._post(endpoint, [payload for _, payload, _ in batch])
+
+            if not isinstance(responses, list):
+                raise ValueError(f"Batch response is not a list: {responses}")
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as err:
+            Logger.printError(f"RPC batch request to {endpoint} failed: {str(err)}")
+            responses, failure = [], err
+
+        for response in responses:
+
+            if not isinstance(response, dict) or response.get(ID, None) not in pending:
+                continue
+
+            callerId, future = pending.pop(response[ID])
+            if not future.done():
+                future.set_result(response)
+
+        for callerId, future in pending.values():
+            if not future.done():
+                future.set_exception(getCallError(failure, callerId))
+
+    async def _post(self, endpoint, payloads):
+
+        async with SessionPool().session(endpoint) as session:
+            async with session.post(endpoint, json=payloads) as resp:
+
+                if resp.status != HTTPStatus.OK:
+                    raise aiohttp.ClientResponseError(
+                        request_info=resp.request_info,
+                        history=resp.history,
+                        status=resp.status
+                    )
+
+                return await resp.json(loads=jsoncodec.loads)
+
+
+def getCallError(err, callerId):
+
+    # Transport errors reach every call as they are, so the load balancer retries them like unbatched calls
+    if isinstance(err, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+        return err
+
+    if isinstance(err, aiohttp.ClientResponseError) and err.status == HTTPStatus.SERVICE_UNAVAILABLE:
+        return error.RpcNodeOverloadedError(id=callerId)
+
+    return error.RpcBadGatewayError(id=callerId)
@@ -1,8 +1,15 @@
 #!/usr/bin/python
+import asyncio
 import aiohttp
 from logger.logger import Logger
-from . import error
+from httputils.sessionpool import SessionPool
+from utils import jsoncodec
+from utils.concurrencylimiter import ConcurrencyLimiter
+from utils.loadbalancer import LoadBalancer, CircuitOpenError
+from utils.singleflight import SingleFlight, getRequestKey
+from . import error, rpcutils
 from .constants import *
+from .rpcbatcher import RPCBatcher
 from http import HTTPStatus
 
 
@@ -20,16 +27,28 @@ class RPCConnector:
 
         Logger.printDebug(f"Making RPC Request to {endpoint}. Payload: {payload}")
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(endpoint, json=payload) as resp:
-
-                if resp.status != HTTPStatus.OK:
-                    raise error.RpcBadGatewayError(id=id)
-                try:
-                    response = await resp.json()
-                except aiohttp.ContentTypeError as err:
-                    Logger.printError(f"Json in client response is not supported: {str(err)}")
-                    raise error.RpcBadGatewayError(id=id)
+        try:
+            response = await SingleFlight().do(
+                getRequestKey(endpoint, method, params),
+                lambda: LoadBalancer().request(
+                    endpoints=endpoint,
+                    function=lambda replica: RPCConnector._send(replica, id, payload),
+                    errors=(aiohttp.ClientConnectionError, error.RpcNodeOverloadedError),
+                    method=method,
+                    timeout=rpcutils.getMethodTimeout(method),
+                    hedge=rpcutils.isHedgeable(method),
+                    slot=lambda replica: RPCConnector._slot(replica, method)
+                )
+            )
+        except error.RpcError as err:
+            # Errors raised by a shared call carry the id of the caller that started it
+            raise err.withId(id)
+        except CircuitOpenError as err:
+            Logger.printError(f"Failing fast on {method} request: {str(err)}")
+            raise error.RpcBadGatewayError(id=id)
+        except asyncio.TimeoutError:
+            Logger.printError(f"Request {method} to {endpoint} timed out")
+            raise error.RpcBadGatewayError(id=id)
 
         Logger.printDebug(f"Response received from {endpoint}: {response}")
 
@@ -38,3 +57,38 @@ class RPCConnector:
             raise error.RpcBadGatewayError(id=id)
 
         return response[RESULT]
+
+    @staticmethod
+    def _slot(endpoint, method):
+
+        # Batched calls hold their own slot while they wait in the batch, so the limit counts calls, not requests
+        return ConcurrencyLimiter().slot(
+            endpoint=endpoint,
+            errors=(aiohttp.ClientConnectionError, asyncio.TimeoutError, error.RpcNodeOverloadedError),
+            method=method
+        )
+
+    @staticmethod
+    async def _send(endpoint, id, payload):
+
+        if RPCBatcher().isBatchable(endpoint):
+            return await RPCBatcher().request(endpoint, payload)
+
+        return await RPCConnector._post(endpoint, id, payload)
+
+    @staticmethod
+    async def _post(endpoint, id, payload):
+
+        async with SessionPool().session(endpoint) as session:
+            async with session.post(endpoint, json=payload) as resp:
+
+                if resp.status == HTTPStatus.SERVICE_UNAVAILABLE:
+                    Logger.printWarning(f"Node {endpoint} is overloaded: {await resp.text()}")
+                    raise error.RpcNodeOverloadedError(id=id)
+                if resp.status != HTTPStatus.OK:
+                    raise error.RpcBadGatewayError(id=id)
+                try:
+                    return await resp.json(loads=jsoncodec.loads)
+                except aiohttp.ContentTypeError as err:
+                    Logger.printError(f"Json in client response is not supported: {str(err)}")
+                    raise error.RpcBadGatewayError(id=id)
@@ -1,10 +1,14 @@
 #!/usr/bin/python
-import json
 import asyncio
-from asyncio import streams
 from logger.logger import Logger
-from . import error
+from utils import jsoncodec, utils
+from utils.concurrencylimiter import ConcurrencyLimiter
+from utils.loadbalancer import LoadBalancer, CircuitOpenError
+from utils.singleflight import SingleFlight, getRequestKey
+from . import error, rpcutils
 from .constants import *
+from .socketpool import SocketPool
+from .streamreader import JsonLineReader
 
 
 class RPCSocketConnector:
@@ -12,52 +16,145 @@ class RPCSocketConnector:
     @staticmethod
     async def request(endpoint, id, method, params):
 
+        payload = {
+            "id": id,
+            "method": method,
+            "params": params,
+            "jsonrpc": JSON_RPC_VERSION
+        }
+
         try:
+            response = (await SingleFlight().do(
+                getRequestKey(endpoint, method, params),
+                lambda: RPCSocketConnector._sendToReplica(endpoint, id, method, [payload], batch=False)
+            ))[0]
+        except error.RpcError as err:
+            # Errors raised by a shared call carry the id of the caller that started it
+            raise err.withId(id)
+
+        if "error" in response and response["error"] is not None:
+            Logger.printError(f"Exception occurred in server: {response['error']}")
+            raise error.RpcBadRequestError(id=id)
+
+        return response["result"]
+
+    @staticmethod
+    async def requestBatch(endpoint, id, method, paramsList):
 
-            payload = {
+        payloads = [
+            {
                 "id": id,
                 "method": method,
                 "params": params,
                 "jsonrpc": JSON_RPC_VERSION
             }
+            for params in paramsList
+        ]
 
-            try:
-                hostname, port = endpoint.split(":")[:2]
-                port = int(port)
-            except ValueError as e:
-                Logger.printError(f"Node endpoint bad format: {e}")
-                raise error.RpcBadRequestError(id=id)
+        batchSize = max(1, utils.getEnvProperty(SOCKET_BATCH_SIZE_ENV, DEFAULT_SOCKET_BATCH_SIZE))
 
-            Logger.printDebug(f"Making RPC socket request to {hostname}:{port}. Payload: {payload}")
+        chunksResponses = await asyncio.gather(
+            *[
+                RPCSocketConnector._sendToReplica(endpoint, id, method, payloads[index:index + batchSize], batch=True)
+                for index in range(0, len(payloads), batchSize)
+            ]
+        )
 
-            reader, writer = await asyncio.open_connection(hostname, port)
-            writer.write((json.dumps(payload) + "\n").encode())
-            await writer.drain()
+        results = []
 
-            data = await reader.readuntil(separator=b'\n')
+        for chunkResponses in chunksResponses:
+            for response in chunkResponses:
 
-            responseStr = data.decode()
+                if "error" in response and response["error"] is not None:
+                    Logger.printError(f"Exception occurred in server: {response['error']}")
+                    raise error.RpcBadRequestError(id=id)
 
-            writer.close()
-            await writer.wait_closed()
+                results.append(response["result"])
+
+        return results
+
+    @staticmethod
+    async def _sendToReplica(endpoints, id, method, payloads, batch):
+
+        try:
+            return await LoadBalancer().request(
+                endpoints=endpoints,
+                function=lambda endpoint: RPCSocketConnector._send(endpoint, id, payloads, batch),
+                errors=(error.RpcNotFoundError, error.RpcBadGatewayError),
+                method=method,
+                timeout=rpcutils.getMethodTimeout(method),
+                hedge=rpcutils.isHedgeable(method),
+                slot=lambda endpoint: ConcurrencyLimiter().slot(
+                    endpoint=endpoint,
+                    errors=(error.RpcNotFoundError, error.RpcBadGatewayError, asyncio.TimeoutError),
+                    method=method
+                )
+            )
+        except CircuitOpenError as err:
+            Logger.printError(f"Failing fast on {method} request: {str(err)}")
+            raise error.RpcBadGatewayError(id=id)
+        except asyncio.TimeoutError:
+            Logger.printError(f"Request {method} to {endpoints} timed out")
+            raise error.RpcBadGatewayError(id=id)
+
+    @staticmethod
+    async def _send(endpoint, id, payloads, batch):
 
-        except streams.IncompleteReadError or streams.LimitOverrunError as e:
+        try:
+            hostname, port = endpoint.split(":")[:2]
+            port = int(port)
+        except ValueError as e:
+            Logger.printError(f"Node endpoint bad format: {e}")
+            raise error.RpcBadRequestError(id=id)
+
+        Logger.printDebug(f"Making RPC socket request to {hostname}:{port}. Payload: {payloads if batch else payloads[0]}")
+
+        try:
+
+            try:
+                responses = await RPCSocketConnector._request(endpoint, hostname, port, payloads, batch)
+            except (asyncio.IncompleteReadError, ConnectionResetError) as e:
+                # Pooled connection was dropped by the node, retry once over a fresh one
+                Logger.printWarning(f"Socket connection to {hostname}:{port} dropped, retrying: {str(e)}")
+                responses = await RPCSocketConnector._request(endpoint, hostname, port, payloads, batch)
+
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionResetError) as e:
             Logger.printError(f"Response could not be retrieve from node: {str(e)}")
             raise error.RpcBadGatewayError(id=id)
         except OSError as e:
             Logger.printError(f"Can not connect to node: {str(e)}")
             raise error.RpcNotFoundError(id=id, message="Node not found")
+        except (ValueError, TypeError, KeyError) as e:
+            Logger.printError(f"Response from node is not JSON-RPC format: {str(e)}")
+            raise error.RpcBadGatewayError(id=id)
+
+        Logger.printDebug(f"Response received from {hostname}:{port}: {responses if batch else responses[0]}")
+
+        return responses
+
+    @staticmethod
+    async def _request(endpoint, hostname, port, payloads, batch):
+
+        connection = await SocketPool().getConnection(endpoint=endpoint, hostname=hostname, port=port)
+
+        if connection is not None:
+            return await connection.requestBatch(payloads) if batch else [await connection.request(payloads[0])]
+
+        # Ids are replaced by their position so batch responses, which may come in any order, can be sorted back
+        requests = [dict(payload, id=index) for index, payload in enumerate(payloads)]
+
+        reader, writer = await asyncio.open_connection(hostname, port)
 
         try:
-            response = json.loads(responseStr)
-        except TypeError as e:
-            Logger.printError(f"Response from node is not JSON format: {str(e)}")
-            raise error.RpcBadGatewayError(id=id)
+            writer.write(jsoncodec.dumps(requests if batch else requests[0]) + b"\n")
+            await writer.drain()
 
-        Logger.printDebug(f"Response received from {hostname}:{port}: {response}")
+            response = await JsonLineReader(reader).readMessage()
+        finally:
+            writer.close()
+            await writer.wait_closed()
 
-        if "error" in response and response["error"] is not None:
-            Logger.printError(f"Exception occurred in server: {response['error']}")
-            raise error.RpcBadRequestError(id=id)
+        if not batch:
+            return [response]
 
-        return response["result"]
+        return sorted(response, key=lambda item: item["id"])
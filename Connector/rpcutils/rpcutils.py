@@ -5,8 +5,10 @@ from . import error
 from httputils import error as httpError
 from .constants import *
 from logger.logger import Logger
+from utils import utils
 
 RPCMethods = {}
+methodTimeouts = dict(DEFAULT_METHOD_TIMEOUTS, **utils.getEnvProperty(METHOD_TIMEOUTS_ENV, {}, json.loads))
 
 
 def rpcMethod(f):
@@ -112,3 +114,12 @@ def isRPCErrorResponse(response):
 
 def isRpcEnpointPath(method):
     return method == RPC_ENDPOINT_PATH
+
+
+def getMethodTimeout(method):
+    return methodTimeouts.get(method, None)
+
+
+def isHedgeable(method):
+    # Broadcasts are never sent twice, any other node method is an idempotent read
+    return method not in NON_IDEMPOTENT_METHODS
@@ -0,0 +1,249 @@
+#!/usr/bin/python
+import asyncio
+from logger.logger import Logger
+from patterns import Singleton
+from utils import jsoncodec, utils
+from .constants import *
+from .streamreader import JsonLineReader
+
+
+class SocketConnection:
+
+    def __init__(self, endpoint, hostname, port):
+        self._endpoint = endpoint
+        self._hostname = hostname
+        self._port = port
+        self._reader = None
+        self._writer = None
+        self._readerTask = None
+        self._connecting = None
+        self._loop = None
+        self._pending = {}  # Request id -> Future
+        self._subscribing = {}  # Request id -> (Method, Subscription key)
+        self._subscriptions = set()  # (Method, Subscription key)
+        self._nextId = 0
+
+    async def connect(self):
+
+        if self._connecting is None:
+            self._connecting = asyncio.ensure_future(self._connect())
+
+        await self._connecting
+
+    async def _connect(self):
+
+        Logger.printDebug(f"Opening persistent socket connection to {self.hostname}:{self.port}")
+
+        reader, self._writer = await asyncio.open_connection(self.hostname, self.port)
+        self._reader = JsonLineReader(reader)
+        self._loop = asyncio.get_event_loop()
+        self._readerTask = asyncio.ensure_future(self._readResponses())
+
+    async def request(self, payload):
+        return (await self._send([payload], batch=False))[0]
+
+    async def requestBatch(self, payloads):
+        return await self._send(payloads, batch=True)
+
+    async def _send(self, payloads, batch):
+
+        if self._readerTask.done():
+            raise ConnectionResetError(f"Connection to {self.hostname}:{self.port} closed")
+
+        # Request ids are rewritten so concurrent callers reusing the same id do not collide on the socket
+        requests = []
+        futures = {}
+
+        for payload in payloads:
+            self._nextId += 1
+            futures[self._nextId] = self._loop.create_future()
+            requests.append(dict(payload, id=self._nextId))
+
+            if payload[METHOD].endswith(SUBSCRIBE_METHOD_SUFFIX) and payload[PARAMS]:
+                self._subscribing[self._nextId] = (payload[METHOD], payload[PARAMS][0])
+
+        self._pending.update(futures)
+
+        try:
+            self._writer.write(jsoncodec.dumps(requests if batch else requests[0]) + b"\n")
+            await self._writer.drain()
+            return list(await asyncio.gather(*futures.values()))
+        finally:
+            for requestId in futures:
+                self._pending.pop(requestId, None)
+                self._subscribing.pop(requestId, None)
+
+    async def _readResponses(self):
+
+        err = ConnectionResetError(f"Connection to {self.hostname}:{self.port} closed")
+
+        try:
+            while True:
+                try:
+                    response = await self._reader.readMessage()
+                except ValueError as e:
+                    Logger.printError(f"Response from node is not JSON format: {str(e)}")
+                    continue
+
+                for item in response if isinstance(response, list) else [response]:
+
+                    if not isinstance(item, dict):
+                        continue
+
+                    if item.get(ID, None) is None and METHOD in item:
+                        self._onNotification(item[METHOD], item.get(PARAMS, None))
+                        continue
+
+                    if item.get(ID, None) in self._subscribing and item.get(ERROR, None) is None:
+                        # Subscription results are handled like the first notification of the subscription
+                        method, key = self._subscribing.pop(item[ID])
+                        self._subscriptions.add((method, key))
+                        SocketPool().notify(self.endpoint, method, [key, item.get(RESULT, None)])
+
+                    future = self._pending.get(item.get(ID, None), None)
+                    if future is not None and not future.done():
+                        future.set_result(item)
+
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, OSError) as e:
+            Logger.printError(f"Socket connection to {self.hostname}:{self.port} lost: {str(e)}")
+            err = e
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(err)
+            self._writer.close()
+            SocketPool().notifySubscriptionsLost(self.endpoint, self._subscriptions)
+            self._subscriptions = set()
+
+    def unsubscribe(self, method, key):
+
+        if (method, key) not in self._subscriptions:
+            return False
+
+        # Notifications are ignored from now on, the node is told to stop sending them in the background
+        self._subscriptions.discard((method, key))
+        asyncio.ensure_future(self._unsubscribe(method, key))
+
+        return True
+
+    async def _unsubscribe(self, method, key):
+
+        payload = {
+            ID: 0,
+            METHOD: method[:-len(SUBSCRIBE_METHOD_SUFFIX)] + UNSUBSCRIBE_METHOD_SUFFIX,
+            PARAMS: [key],
+            JSON_RPC: JSON_RPC_VERSION
+        }
+
+        try:
+            await self.request(payload)
+        except (asyncio.IncompleteReadError, OSError) as e:
+            Logger.printWarning(f"Can not unsubscribe {key} on {self.hostname}:{self.port}: {str(e)}")
+
+    def _onNotification(self, method, params):
+
+        if not isinstance(params, list) or len(params) < 2 or (method, params[0]) not in self._subscriptions:
+            return
+
+        SocketPool().notify(self.endpoint, method, params)
+
+    async def close(self):
+
+        if self._readerTask is not None and not self._readerTask.done():
+            self._readerTask.cancel()
+
+        if self._writer is not None:
+            self._writer.close()
+
+    @property
+    def endpoint(self):
+        return self._endpoint
+
+    @property
+    def hostname(self):
+        return self._hostname
+
+    @property
+    def port(self):
+        return self._port
+
+    @property
+    def closed(self):
+        if self._connecting is None or not self._connecting.done():
+            return False
+        if self._connecting.cancelled() or self._connecting.exception() is not None:
+            return True
+        return self._readerTask.done()
+
+
+class SocketPool(object, metaclass=Singleton.Singleton):
+
+    def __init__(self):
+        self._connections = {}  # Endpoint -> [SocketConnection]
+        self._nextConnection = {}  # Endpoint -> Round robin index
+        self._loops = {}  # Endpoint -> Event loop the connections belong to
+        self._subscriptionHandlers = {}  # Method -> [(Notification handler, Subscriptions lost handler)]
+
+    async def getConnection(self, endpoint, hostname, port):
+
+        if endpoint not in self._connections:
+            self._connections[endpoint] = [None] * max(1, utils.getEnvProperty(SOCKET_POOL_SIZE_ENV, DEFAULT_SOCKET_POOL_SIZE))
+            self._nextConnection[endpoint] = 0
+            self._loops[endpoint] = asyncio.get_event_loop()
+
+        # Connections are bound to the loop they were opened in, so other loops (websocket threads) get none
+        if self._loops[endpoint] is not asyncio.get_event_loop():
+            return None
+
+        connections = self._connections[endpoint]
+        index = self._nextConnection[endpoint]
+        self._nextConnection[endpoint] = (index + 1) % len(connections)
+
+        connection = connections[index]
+        if connection is None or connection.closed:
+            connection = SocketConnection(endpoint=endpoint, hostname=hostname, port=port)
+            connections[index] = connection
+
+        await connection.connect()
+
+        return connection
+
+    def addSubscriptionHandler(self, method, onNotification, onLost):
+        self._subscriptionHandlers.setdefault(method, []).append((onNotification, onLost))
+
+    def notify(self, endpoint, method, params):
+
+        for onNotification, _ in self._subscriptionHandlers.get(method, []):
+            onNotification(endpoint, params[0], params[1])
+
+    def notifySubscriptionsLost(self, endpoint, subscriptions):
+
+        for method, key in subscriptions:
+            for _, onLost in self._subscriptionHandlers.get(method, []):
+                onLost(endpoint, key)
+
+    def unsubscribe(self, endpoint, method, key):
+
+        # A key may have been subscribed on several connections of the endpoint, each one holds its own subscription
+        for connection in self._connections.get(endpoint, []):
+            if connection is not None and not connection.closed:
+                connection.unsubscribe(method, key)
+
+    async def closeConnections(self, endpoint):
+
+        if endpoint not in self._connections:
+            return
+
+        Logger.printDebug(f"Closing persistent socket connections to {endpoint}")
+
+        for connection in self._connections.pop(endpoint):
+            if connection is not None:
+                await connection.close()
+
+        del self._nextConnection[endpoint]
+        del self._loops[endpoint]
+
+    async def closeAllConnections(self):
+
+        for endpoint in list(self._connections):
+            await self.closeConnections(endpoint)
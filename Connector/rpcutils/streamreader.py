@@ -0,0 +1,46 @@
+#!/usr/bin/python
+import asyncio
+from utils import jsoncodec, utils
+from .constants import *
+
+
+class JsonLineReader:
+
+    def __init__(self, reader):
+        self._reader = reader
+        self._chunkSize = max(1, utils.getEnvProperty(SOCKET_READ_CHUNK_SIZE_ENV, DEFAULT_SOCKET_READ_CHUNK_SIZE))
+        self._maxSize = utils.getEnvProperty(SOCKET_MAX_RESPONSE_SIZE_ENV, DEFAULT_SOCKET_MAX_RESPONSE_SIZE)
+        self._leftover = b""
+
+    async def readMessage(self):
+
+        # Chunks are only scanned once for the separator and joined a single time when the message is complete
+        chunks = []
+        size = 0
+        chunk = self._leftover
+        self._leftover = b""
+
+        while True:
+
+            if chunk:
+                index = chunk.find(b"\n")
+
+                if index != -1:
+                    chunks.append(chunk[:index])
+                    self._leftover = chunk[index + 1:]
+                    break
+
+                chunks.append(chunk)
+                size += len(chunk)
+
+                if self._maxSize and size > self._maxSize:
+                    raise asyncio.LimitOverrunError(f"Message exceeds the {self._maxSize} bytes limit", size)
+
+            chunk = await self._reader.read(self._chunkSize)
+
+            if not chunk:
+                raise asyncio.IncompleteReadError(b"".join(chunks), None)
+
+        data = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+        return jsoncodec.loads(data)
@@ -4,9 +4,11 @@ import aiohttp_cors
 import importlib
 from httputils import middleware
 from httputils.router import Router
+from httputils.sessionpool import SessionPool
 from httputils.app import App, appModules
 from httputils.constants import JSON_CONTENT_TYPE
 from rpcutils import middleware as rpcMiddleware
+from rpcutils.socketpool import SocketPool
 from wsutils import broker
 from logger.logger import Logger
 from utils import utils
@@ -24,6 +26,9 @@ async def onShutdown(app):
     for subscriberID, sub in list(broker.Broker().subs.items()):
         await sub.close(broker.Broker())
 
+    await SessionPool().closeAllSessions()
+    await SocketPool().closeAllConnections()
+
 
 async def onStartup(app):
 
@@ -38,6 +43,7 @@ async def onStartup(app):
 def runServer():
 
     mainApp = App(middlewares=[
+        middleware.flowHandler,
         middleware.errorHandler,
         rpcMiddleware.errorHandler
     ])
@@ -0,0 +1,21 @@
+#!/usr/bin/python3
+import pytest
+from patterns import Singleton
+
+
+@pytest.fixture
+def singleton(monkeypatch):
+
+    instances = dict(Singleton.Singleton._instances)
+
+    # Builds a fresh instance of a singleton reading the given environment, the shared one is restored afterwards
+    def create(cls, **env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        Singleton.Singleton._instances.pop(cls, None)
+        return cls()
+
+    yield create
+
+    Singleton.Singleton._instances.clear()
+    Singleton.Singleton._instances.update(instances)
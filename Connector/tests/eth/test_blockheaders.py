@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+import asyncio
+import pytest
+from types import SimpleNamespace
+from eth.blockheaders import BlockHeaderCache
+from rpcutils import error
+from rpcutils.rpcconnector import RPCConnector
+
+config = SimpleNamespace(coin="ETH", networkName="regtest", rpcEndpoint="http://node1:8545")
+
+
+class Node:
+
+    def __init__(self):
+        self.blocks = {}
+        self.calls = []
+
+    async def request(self, endpoint, id, method, params):
+        self.calls.append((method, params))
+        return self.blocks.get(int(params[0], 16), None)
+
+
+@pytest.fixture
+def node(monkeypatch):
+    node = Node()
+    monkeypatch.setattr(RPCConnector, "request", node.request)
+    return node
+
+
+def testHeaderIsCached(singleton, node):
+
+    cache = singleton(BlockHeaderCache)
+    node.blocks[16] = {"hash": "0xa", "timestamp": "0x5f"}
+
+    async def run():
+        return [await cache.getHeader(config, 1, "0x10") for _ in range(2)]
+
+    assert asyncio.run(run()) == [("0xa", "0x5f")] * 2
+    assert node.calls == [("eth_getBlockByNumber", ["0x10", False])]
+    assert cache.stats["hits"] == 1
+
+
+def testHashMismatchRefetches(singleton, node):
+
+    cache = singleton(BlockHeaderCache)
+    cache.put("ETH", "regtest", 16, "0xa", "0x5f")
+    node.blocks[16] = {"hash": "0xb", "timestamp": "0x60"}
+
+    async def run():
+        return [
+            await cache.getHeader(config, 1, "0x10", blockHash="0xa"),
+            await cache.getHeader(config, 1, "0x10", blockHash="0xb"),
+            await cache.getHeader(config, 1, "0x10", blockHash="0xb")
+        ]
+
+    # A header mined again at the same height replaces the cached one
+    assert asyncio.run(run()) == [("0xa", "0x5f"), ("0xb", "0x60"), ("0xb", "0x60")]
+    assert len(node.calls) == 1
+
+
+def testMissingBlock(singleton, node):
+
+    cache = singleton(BlockHeaderCache)
+
+    # A block the node does not know is an error for the caller, not an empty header
+    with pytest.raises(error.RpcBadRequestError):
+        asyncio.run(cache.getHeader(config, 1, "0x10"))
+
+    assert cache.stats["entries"] == 0
+
+
+def testLeastRecentlyUsedEviction(singleton, node):
+
+    cache = singleton(BlockHeaderCache, ETH_BLOCK_HEADER_CACHE_SIZE=2)
+
+    cache.put("ETH", "regtest", 1, "0x1", "0x1")
+    cache.put("ETH", "regtest", 2, "0x2", "0x2")
+    cache.get("ETH", "regtest", 1)
+    cache.put("ETH", "regtest", 3, "0x3", "0x3")
+
+    assert cache.get("ETH", "regtest", 1) == ("0x1", "0x1")
+    assert cache.get("ETH", "regtest", 2) is None
+    assert cache.get("ETH", "mainnet", 3) is None
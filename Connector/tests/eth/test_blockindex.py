@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+from eth.blockindex import SubscribedAddresses, getTokenTransferParties
+
+sender = "0x" + "a" * 40
+recipient = "0x" + "B" * 40
+owner = "0x" + "c" * 40
+
+
+def getArgument(value):
+    return value[2:].rjust(64, "0") if value.startswith("0x") else value.rjust(64, "0")
+
+
+def getTransferInput(to, amount="1"):
+    return "0xa9059cbb" + getArgument(to) + getArgument(amount)
+
+
+def getTransferFromInput(fromAddress, to, amount="1"):
+    return "0x23B872DD" + getArgument(fromAddress) + getArgument(to) + getArgument(amount)
+
+
+def getBlock(transactions):
+    return {"transactions": transactions}
+
+
+def testTokenTransferParties():
+
+    assert getTokenTransferParties(getTransferInput(recipient)) == [recipient.lower()]
+    assert getTokenTransferParties(getTransferFromInput(owner, recipient)) == [owner, recipient.lower()]
+
+
+def testNotTokenTransfers():
+
+    assert getTokenTransferParties(None) == []
+    assert getTokenTransferParties("0x") == []
+    # approve(address,uint256) is not a transfer
+    assert getTokenTransferParties("0x095ea7b3" + getArgument(recipient) + getArgument("1")) == []
+    # Truncated arguments are left out
+    assert getTokenTransferParties(getTransferInput(recipient)[:40]) == []
+
+
+def testMatchKeepsSubscribedSpelling(singleton):
+
+    addresses = singleton(SubscribedAddresses)
+    addresses.add("ETH", "regtest", recipient)
+    addresses.add("ETH", "regtest", recipient.lower())
+    addresses.add("ETH", "regtest", sender)
+    addresses.add("ETH", "mainnet", owner)
+
+    block = getBlock([
+        {"from": sender.upper().replace("0X", "0x"), "to": recipient.lower(), "input": "0x"},
+        {"from": owner, "to": None, "input": "0x"}
+    ])
+
+    # Every spelling an address was subscribed with gets the notification, other networks are left out
+    assert sorted(addresses.match("ETH", "regtest", block)) == sorted([sender, recipient, recipient.lower()])
+
+    addresses.remove("ETH", "regtest", recipient)
+    addresses.remove("ETH", "regtest", recipient.lower())
+
+    assert addresses.match("ETH", "regtest", block) == [sender]
+
+
+def testMatchWalksTheSmallerSide(singleton):
+
+    addresses = singleton(SubscribedAddresses)
+    subscribed = [f"0x{index:040x}" for index in range(10)]
+    for address in subscribed:
+        addresses.add("ETH", "regtest", address)
+
+    # The same matches come out whether the block or the subscriptions are the larger side
+    oneTransaction = getBlock([{"from": subscribed[3], "to": sender, "input": "0x"}])
+    manyTransactions = getBlock([{"from": f"0x{index:040x}", "to": None, "input": "0x"} for index in range(5, 30)])
+
+    assert addresses.match("ETH", "regtest", oneTransaction) == [subscribed[3]]
+    assert sorted(addresses.match("ETH", "regtest", manyTransactions)) == subscribed[5:]
+
+
+def testMatchTokenTransfers(singleton):
+
+    block = getBlock([{"from": sender, "to": owner, "input": getTransferInput(recipient)}])
+
+    addresses = singleton(SubscribedAddresses)
+    addresses.add("ETH", "regtest", recipient)
+
+    assert addresses.match("ETH", "regtest", block) == []
+
+    addresses = singleton(SubscribedAddresses, ETH_BLOCK_INDEX_TOKEN_TRANSFERS=1)
+    addresses.add("ETH", "regtest", recipient)
+
+    assert addresses.match("ETH", "regtest", block) == [recipient]
@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+import asyncio
+import pytest
+from eth.apirpc import countConfirmedTransactions, paginateAddressHistory
+
+pendingTxs = ["p1", "p0"]
+
+# Rows sharing a time are ordered by hash, like the indexer does
+confirmedRows = [{"txhash": f"c{index}", "time": time} for index, time in enumerate([1, 2, 2, 3, 4, 4, 5])]
+
+newestFirst = pendingTxs + [row["txhash"] for row in confirmedRows[::-1]]
+oldestFirst = newestFirst[::-1]
+
+
+def getFetcher(withCount):
+
+    async def fetchConfirmed(offset, limit, recentFirst, after):
+
+        def key(row):
+            return row["time"], row["txhash"]
+
+        rows = sorted(confirmedRows, key=key, reverse=recentFirst)
+
+        # Keyset reads start past the last row returned, their count only covers the rows left
+        if after is not None:
+            rows = [row for row in rows if (key(row) < tuple(after) if recentFirst else key(row) > tuple(after))]
+
+        return rows[offset:offset + limit], len(rows) if withCount else None
+
+    return fetchConfirmed
+
+
+def paginate(withCount, recentFirst, page=None, pageSize=None, state=None):
+    return asyncio.run(paginateAddressHistory(
+        pendingTxs=pendingTxs,
+        fetchConfirmed=getFetcher(withCount),
+        page=page,
+        pageSize=pageSize,
+        recentFirst=recentFirst,
+        state=state
+    ))
+
+
+@pytest.mark.parametrize("recentFirst, page, txHashes", [
+    (True, 0, ["p1", "p0", "c6"]),
+    (True, 1, ["c5", "c4", "c3"]),
+    (True, 2, ["c2", "c1", "c0"]),
+    (True, 3, []),
+    (False, 0, ["c0", "c1", "c2"]),
+    (False, 1, ["c3", "c4", "c5"]),
+    (False, 2, ["c6", "p0", "p1"]),
+    (False, 3, [])
+])
+@pytest.mark.parametrize("withCount", [True, False])
+def testOffsetPages(withCount, recentFirst, page, txHashes):
+
+    pageTxs, numElements, nextState = paginate(withCount, recentFirst, page=page, pageSize=3)
+
+    assert pageTxs == txHashes
+    assert (nextState is None) == (page >= 2)
+
+    # Without a count the total is only what has been read so far
+    if withCount:
+        assert numElements == len(newestFirst)
+    else:
+        assert numElements <= len(newestFirst)
+
+
+@pytest.mark.parametrize("recentFirst, pageSize", [
+    (True, 1),
+    (True, 3),
+    (True, 4),
+    (True, 20),
+    (False, 1),
+    (False, 3),
+    (False, 4),
+    (False, 20)
+])
+@pytest.mark.parametrize("withCount", [True, False])
+def testCursorWalkMatchesOffsetWalk(withCount, recentFirst, pageSize):
+
+    offsetWalk = []
+    page = 0
+    while True:
+        pageTxs, _, nextState = paginate(withCount, recentFirst, page=page, pageSize=pageSize)
+        offsetWalk += pageTxs
+        if nextState is None:
+            break
+        page += 1
+
+    cursorWalk = []
+    state = None
+    while True:
+        pageTxs, _, state = paginate(withCount, recentFirst, pageSize=pageSize, state=state)
+        cursorWalk += pageTxs
+        if state is None:
+            break
+
+    assert cursorWalk == offsetWalk == (newestFirst if recentFirst else oldestFirst)
+
+
+@pytest.mark.parametrize("state, fromOffset, confirmedDone, confirmedTxs, confirmedCount, count", [
+    # Offset pages take the indexer count, or what has been read when there is none
+    ({"c": 3, "k": None}, True, False, confirmedRows[3:6], 7, 7),
+    ({"c": 3, "k": None}, True, False, confirmedRows[3:6], None, 6),
+    # A page past the end reads nothing, only the count places it
+    ({"c": 12, "k": None}, True, False, [], 7, 7),
+    ({"c": 12, "k": None}, True, False, [], None, 0),
+    # Keyset counts only cover the rows after the cursor
+    ({"c": 3, "k": [2, "c2"]}, False, False, confirmedRows[3:6], 4, 7),
+    ({"c": 3, "k": [2, "c2"]}, False, False, confirmedRows[3:6], None, 6),
+    # Once the confirmed history is read through, cursors keep the total they reached
+    ({"c": 7, "k": [5, "c6"]}, False, True, [], None, 7),
+    ({"c": 7, "k": None}, True, True, [], None, 0)
+])
+def testCountConfirmedTransactions(state, fromOffset, confirmedDone, confirmedTxs, confirmedCount, count):
+    assert countConfirmedTransactions(state, fromOffset, confirmedDone, confirmedTxs, confirmedCount) == count
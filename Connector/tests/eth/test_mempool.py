@@ -0,0 +1,161 @@
+#!/usr/bin/python3
+import asyncio
+import pytest
+from types import SimpleNamespace
+from eth import mempool
+from eth.mempool import MempoolIndex
+from httputils import error as httpError
+from httputils.httpconnector import HTTPConnector
+
+config = SimpleNamespace(coin="ETH", networkName="regtest", rpcEndpoint="http://node1:8545")
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class Node:
+
+    def __init__(self):
+        self.transactions = []
+        self.errors = None
+        self.posts = 0
+
+    async def post(self, endpoint, path="", data=None):
+        self.posts += 1
+        await asyncio.sleep(0)
+        if self.errors is not None:
+            return {"errors": self.errors, "data": None}
+        return {"data": {"pending": {"transactions": list(self.transactions)}}}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(mempool, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def node(monkeypatch):
+    node = Node()
+    monkeypatch.setattr(HTTPConnector, "post", node.post)
+    return node
+
+
+def getTransaction(hash, fromAddress, toAddress):
+    return {
+        "hash": hash,
+        "from": {"address": fromAddress},
+        "to": {"address": toAddress} if toAddress is not None else None
+    }
+
+
+def testAddressTransactions(singleton, clock, node):
+
+    index = singleton(MempoolIndex)
+    node.transactions = [
+        getTransaction("0x1", "0xAbC", "0xdef"),
+        getTransaction("0x2", "0xabc", "0xabc"),
+        getTransaction("0x3", "0xdef", None)
+    ]
+
+    async def run():
+        return [
+            await index.getAddressTransactions(config, "0xabc"),
+            await index.getAddressTransactions(config, "0xDEF"),
+            await index.getAddressTransactions(config, "0x123")
+        ]
+
+    # Addresses are matched regardless of their case, and self transfers appear once
+    assert asyncio.run(run()) == [["0x1", "0x2"], ["0x1", "0x3"], []]
+    assert node.posts == 1
+
+
+def testStaleSnapshotIsRefreshed(singleton, clock, node):
+
+    index = singleton(MempoolIndex, ETH_MEMPOOL_REFRESH_INTERVAL=2)
+    node.transactions = [getTransaction("0x1", "0xabc", "0xdef")]
+
+    asyncio.run(index.getAddressTransactions(config, "0xabc"))
+
+    node.transactions = [getTransaction("0x2", "0xabc", "0xdef")]
+    clock.now += 3
+
+    assert asyncio.run(index.getAddressTransactions(config, "0xabc")) == ["0x1"]
+
+    clock.now += 2
+
+    assert asyncio.run(index.getAddressTransactions(config, "0xabc")) == ["0x2"]
+    assert node.posts == 2
+    assert index.stats["refreshes"] == 2
+
+
+def testSnapshotRemovedOnStop(singleton, clock, node):
+
+    index = singleton(MempoolIndex)
+
+    async def run():
+        await index.getAddressTransactions(config, "0xabc")
+        await index.stop(config)
+        await index.getAddressTransactions(config, "0xabc")
+
+    asyncio.run(run())
+
+    assert node.posts == 2
+
+
+def testConcurrentReadersShareOneRefresh(singleton, clock, node):
+
+    index = singleton(MempoolIndex)
+    node.transactions = [getTransaction("0x1", "0xabc", "0xdef")]
+
+    async def run():
+        return await asyncio.gather(*[index.getAddressTransactions(config, address) for address in ("0xabc", "0xdef", "0xabc")])
+
+    assert asyncio.run(run()) == [["0x1"]] * 3
+    assert node.posts == 1
+
+
+def testQueryErrorsDoNotStopRefreshing(singleton, node):
+
+    index = singleton(MempoolIndex, ETH_MEMPOOL_REFRESH_INTERVAL=0.01)
+    node.transactions = [getTransaction("0x1", "0xabc", "0xdef")]
+
+    async def run():
+
+        await index.getAddressTransactions(config, "0xabc")
+        node.errors = [{"message": "pending state not available"}]
+        index.start(config)
+
+        try:
+            # Failed queries are reported as node errors, the refresh task keeps going until the node recovers
+            while node.posts < 3:
+                await asyncio.sleep(0.01)
+
+            assert not index._tasks[(config.coin, config.networkName)].done()
+
+            node.errors = None
+            node.transactions = [getTransaction("0x2", "0xabc", "0xdef")]
+            while index.stats["refreshes"] < 2:
+                await asyncio.sleep(0.01)
+
+            return await index.getAddressTransactions(config, "0xabc")
+        finally:
+            await index.stop(config)
+
+    assert asyncio.run(asyncio.wait_for(run(), timeout=5)) == ["0x2"]
+
+
+def testQueryErrorsReachReaders(singleton, clock, node):
+
+    index = singleton(MempoolIndex)
+    node.errors = [{"message": "pending state not available"}]
+
+    with pytest.raises(httpError.BadGatewayError):
+        asyncio.run(index.getAddressTransactions(config, "0xabc"))
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+import asyncio
+import json
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from httputils import error
+from httputils.httpconnector import HTTPConnector
+from httputils.sessionpool import SessionPool
+
+ELEMENTS = list(range(100))
+
+
+async def getElements(request):
+    return web.json_response({"elements": ELEMENTS})
+
+
+async def streamElements(request):
+
+    response = web.StreamResponse(headers={"Content-Type": "application/json"})
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+
+    body = json.dumps({"elements": ELEMENTS}).encode()
+    for index in range(0, len(body), 64):
+        await response.write(body[index:index + 64])
+
+    await response.write_eof()
+
+    return response
+
+
+async def requestNode(singleton, path):
+
+    app = web.Application()
+    app.router.add_get("/elements", getElements)
+    app.router.add_get("/stream", streamElements)
+    server = TestServer(app)
+    await server.start_server()
+
+    endpoint = str(server.make_url("")).rstrip("/")
+    pool = singleton(SessionPool)
+    await pool.openNetworkSessions("ETH", "regtest", {"indexer": endpoint})
+
+    try:
+        return await HTTPConnector.get(endpoint, path)
+    finally:
+        await pool.closeAllSessions()
+        await server.close()
+
+
+@pytest.mark.parametrize("path", ["/elements", "/stream"])
+def testResponseSizeUnlimited(singleton, path):
+
+    assert asyncio.run(requestNode(singleton, path)) == {"elements": ELEMENTS}
+
+
+@pytest.mark.parametrize("path", ["/elements", "/stream"])
+def testResponseWithinLimit(singleton, monkeypatch, path):
+
+    monkeypatch.setenv("HTTP_MAX_RESPONSE_SIZE", "4096")
+
+    assert asyncio.run(requestNode(singleton, path)) == {"elements": ELEMENTS}
+
+
+@pytest.mark.parametrize("path", ["/elements", "/stream"])
+def testResponseOverLimit(singleton, monkeypatch, path):
+
+    # Sized bodies are rejected by their Content-Length, chunked ones while they are read
+    monkeypatch.setenv("HTTP_MAX_RESPONSE_SIZE", "100")
+
+    with pytest.raises(error.BadGatewayError):
+        asyncio.run(requestNode(singleton, path))
@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+import asyncio
+import threading
+from httputils.sessionpool import SessionPool, getHttpEndpoints
+
+
+def testGetHttpEndpoints():
+
+    config = {
+        "bitcoincoreRpcEndpoint": "http://node1:8332",
+        "electrumRpcEndpoint": "tcp://node1:50001",
+        "bitcoincoreZmqEndpoint": "tcp://node1:28332",
+        "electrsEndpoint": "http://node2:3000",
+        "duplicatedEndpoint": "http://node1:8332",
+        "port": 8332
+    }
+
+    assert getHttpEndpoints(config) == ["http://node1:8332", "http://node2:3000"]
+
+
+def testNetworkSessions(singleton):
+
+    pool = singleton(SessionPool)
+
+    async def run():
+        await pool.openNetworkSessions("BTC", "regtest", {"rpc": "http://node1", "electrs": "http://node2"})
+        await pool.openNetworkSessions("BCH", "regtest", {"rpc": "http://node2"})
+
+        session = pool.getSession("http://node1")
+        shared = pool.getSession("http://node2")
+        assert session is not None and shared is not None
+        assert pool.getSession("http://unknown") is None
+
+        await pool.closeNetworkSessions("BTC", "regtest")
+
+        # Sessions still used by another network are kept open
+        assert session.closed and pool.getSession("http://node1") is None
+        assert not shared.closed and pool.getSession("http://node2") is shared
+
+        await pool.closeAllSessions()
+        assert shared.closed
+
+    asyncio.run(run())
+
+
+def testSessionFallsBackToOneShotSession(singleton):
+
+    pool = singleton(SessionPool)
+
+    async def run():
+        await pool.openNetworkSessions("BTC", "regtest", {"rpc": "http://node1"})
+
+        async with pool.session("http://node1") as pooled:
+            assert pooled is pool.getSession("http://node1")
+
+        async with pool.session("http://unknown") as oneShot:
+            assert oneShot is not pooled
+
+        assert oneShot.closed
+        assert not pooled.closed
+
+        await pool.closeAllSessions()
+
+    asyncio.run(run())
+
+
+def testOtherLoopsGetNoSession(singleton):
+
+    pool = singleton(SessionPool)
+    sessions = {}
+
+    async def getSession():
+        return pool.getSession("http://node1")
+
+    def otherLoop():
+        sessions["other"] = asyncio.run(getSession())
+
+    async def run():
+        await pool.openNetworkSessions("BTC", "regtest", {"rpc": "http://node1"})
+
+        # Websocket threads run their own loop and must not use the sessions of the main one
+        thread = threading.Thread(target=otherLoop)
+        thread.start()
+        thread.join()
+
+        sessions["main"] = pool.getSession("http://node1")
+        await pool.closeAllSessions()
+
+    asyncio.run(run())
+
+    assert sessions["main"] is not None
+    assert sessions["other"] is None
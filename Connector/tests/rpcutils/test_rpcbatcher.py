@@ -0,0 +1,163 @@
+#!/usr/bin/python3
+import aiohttp
+import asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from httputils.sessionpool import SessionPool
+from rpcutils import error
+from rpcutils.rpcbatcher import RPCBatcher
+from rpcutils.rpcconnector import RPCConnector
+from utils.concurrencylimiter import ConcurrencyLimiter
+from utils.loadbalancer import LoadBalancer
+from utils.singleflight import SingleFlight
+
+
+def getPayload(id, param):
+    return {"id": id, "method": "echo", "params": [param], "jsonrpc": "2.0"}
+
+
+async def batchRequests(singleton, handler, payloads, **env):
+
+    app = web.Application()
+    app.router.add_post("/", handler)
+    server = TestServer(app)
+    await server.start_server()
+
+    endpoint = str(server.make_url("/"))
+    pool = singleton(SessionPool)
+    batcher = singleton(RPCBatcher, RPC_BATCH_ENABLED=1, **env)
+
+    await pool.openNetworkSessions("BTC", "regtest", {"rpc": endpoint})
+
+    try:
+        assert batcher.isBatchable(endpoint)
+        return await asyncio.gather(*[batcher.request(endpoint, payload) for payload in payloads], return_exceptions=True)
+    finally:
+        await pool.closeAllSessions()
+        await server.close()
+
+
+def testDisabledByDefault(singleton):
+
+    singleton(SessionPool)
+    batcher = singleton(RPCBatcher)
+
+    assert not batcher.isBatchable("http://node1")
+
+
+def testBatchesCallsWithinWindow(singleton):
+
+    batches = []
+
+    async def handler(request):
+        payloads = await request.json()
+        batches.append(len(payloads))
+        # Batch responses may come in any order
+        return web.json_response([{"id": payload["id"], "result": payload["params"][0], "error": None} for payload in reversed(payloads)])
+
+    # Every call shares the same id, responses must still reach the call that made them
+    responses = asyncio.run(batchRequests(
+        singleton,
+        handler,
+        [getPayload(1, param) for param in range(5)],
+        RPC_BATCH_WINDOW=50,
+        RPC_BATCH_MAX_SIZE=3
+    ))
+
+    assert batches == [3, 2]
+    assert [response["result"] for response in responses] == list(range(5))
+
+
+def testMissingResponsesFail(singleton):
+
+    async def handler(request):
+        payloads = await request.json()
+        return web.json_response([{"id": payload["id"], "result": payload["params"][0], "error": None} for payload in payloads if payload["params"][0] % 2 == 0])
+
+    responses = asyncio.run(batchRequests(singleton, handler, [getPayload(id, id) for id in range(4)]))
+
+    assert responses[0]["result"] == 0
+    assert responses[2]["result"] == 2
+
+    for id in (1, 3):
+        assert isinstance(responses[id], error.RpcBadGatewayError)
+        assert responses[id].id == id
+
+
+def testFailedBatchFailsEveryCall(singleton):
+
+    async def handler(request):
+        return web.Response(status=500)
+
+    responses = asyncio.run(batchRequests(singleton, handler, [getPayload(id, id) for id in range(3)]))
+
+    for id, response in enumerate(responses):
+        assert isinstance(response, error.RpcBadGatewayError)
+        assert response.id == id
+
+
+def testOverloadedNodeFailsEveryCall(singleton):
+
+    async def handler(request):
+        return web.Response(status=503)
+
+    responses = asyncio.run(batchRequests(singleton, handler, [getPayload(id, id) for id in range(2)]))
+
+    assert [type(response) for response in responses] == [error.RpcNodeOverloadedError] * 2
+    assert [response.id for response in responses] == [0, 1]
+
+
+def testTransportErrorsReachEveryCall(singleton):
+
+    async def handler(request):
+        request.transport.close()
+        return web.Response()
+
+    # Calls see the connection error itself, which the load balancer retries on another replica
+    for response in asyncio.run(batchRequests(singleton, handler, [getPayload(id, id) for id in range(2)])):
+        assert isinstance(response, aiohttp.ClientConnectionError)
+
+
+def testBatchedCallsFailOverToAnotherReplica(singleton):
+
+    async def dropConnection(request):
+        request.transport.close()
+        return web.Response()
+
+    async def echo(request):
+        return web.json_response([{"id": payload["id"], "result": payload["params"][0], "error": None} for payload in await request.json()])
+
+    async def run():
+
+        servers = []
+        for handler in (dropConnection, echo):
+            app = web.Application()
+            app.router.add_post("/", handler)
+            servers.append(TestServer(app))
+            await servers[-1].start_server()
+
+        endpoints = [str(server.make_url("/")) for server in servers]
+        pool = singleton(SessionPool)
+        singleton(RPCBatcher, RPC_BATCH_ENABLED=1)
+        singleton(LoadBalancer)
+        singleton(SingleFlight)
+        limiter = singleton(ConcurrencyLimiter)
+
+        await pool.openNetworkSessions("BTC", "regtest", {"rpc": endpoints})
+
+        try:
+            # Both replicas score the same, so the one dropping connections is tried first
+            return await RPCConnector.request(endpoints, 1, "echo", ["param"]), limiter.stats, endpoints
+        finally:
+            await pool.closeAllSessions()
+            for server in servers:
+                await server.close()
+
+    result, stats, endpoints = asyncio.run(run())
+
+    assert result == "param"
+    assert LoadBalancer().stats["replicas"][endpoints[0]]["errorRate"] > 0
+
+    # Each batched call took and released a limiter slot on the replica it was sent to
+    assert set(stats) == set(endpoints)
+    assert all(endpointStats["inFlight"] == 0 for endpointStats in stats.values())
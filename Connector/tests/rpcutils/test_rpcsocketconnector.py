@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+import asyncio
+import json
+import pytest
+from rpcutils import error
+from rpcutils.rpcsocketconnector import RPCSocketConnector
+from rpcutils.socketpool import SocketPool
+
+
+def getResponse(request):
+
+    if request["params"][0] < 0:
+        return {"id": request["id"], "result": None, "error": {"code": -1, "message": "Negative param"}}
+
+    return {"id": request["id"], "result": request["params"][0] * 2, "error": None}
+
+
+async def requestNode(singleton, function, **env):
+
+    batches = []
+
+    async def handle(reader, writer):
+        while True:
+            try:
+                data = await reader.readuntil(separator=b'\n')
+            except asyncio.IncompleteReadError:
+                break
+
+            request = json.loads(data.decode())
+
+            if isinstance(request, list):
+                batches.append(len(request))
+                # Batch responses may come in any order
+                response = [getResponse(item) for item in reversed(request)]
+            else:
+                response = getResponse(request)
+
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    endpoint = f"127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    pool = singleton(SocketPool, **env)
+
+    try:
+        return await function(endpoint), batches
+    finally:
+        await pool.closeAllConnections()
+        server.close()
+        await server.wait_closed()
+
+
+def testRequest(singleton):
+
+    result, batches = asyncio.run(requestNode(
+        singleton,
+        lambda endpoint: RPCSocketConnector.request(endpoint, 1, "echo", [21])
+    ))
+
+    assert result == 42
+    assert batches == []
+
+
+def testRequestBatchIsChunked(singleton):
+
+    results, batches = asyncio.run(requestNode(
+        singleton,
+        lambda endpoint: RPCSocketConnector.requestBatch(endpoint, 1, "echo", [[param] for param in range(7)]),
+        SOCKET_BATCH_SIZE=3
+    ))
+
+    assert results == [param * 2 for param in range(7)]
+    assert sorted(batches) == [1, 3, 3]
+
+
+def testRequestBatchError(singleton):
+
+    with pytest.raises(error.RpcBadRequestError) as err:
+        asyncio.run(requestNode(
+            singleton,
+            lambda endpoint: RPCSocketConnector.requestBatch(endpoint, 7, "echo", [[1], [-1], [2]]),
+            SOCKET_BATCH_SIZE=2
+        ))
+
+    assert err.value.id == 7
@@ -0,0 +1,201 @@
+#!/usr/bin/python3
+import asyncio
+import json
+import pytest
+from rpcutils.constants import *
+from rpcutils.socketpool import SocketPool
+
+endpoint = "localhost:electrs"
+
+
+async def startNode(handler):
+
+    async def serve(reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                await handler(json.loads(line), writer)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(serve, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def reply(writer, response):
+    writer.write(json.dumps(response).encode() + b"\n")
+
+
+def testConcurrentRequestsOverOneSocket(singleton, monkeypatch):
+
+    monkeypatch.setenv(SOCKET_POOL_SIZE_ENV, "1")
+    monkeypatch.setenv(SOCKET_READ_CHUNK_SIZE_ENV, "7")
+    pool = singleton(SocketPool)
+
+    async def run():
+
+        received = []
+
+        async def handler(request, writer):
+            received.append(request)
+            # Answers come back in reverse order once both requests are in
+            if len(received) == 2:
+                for item in reversed(received):
+                    reply(writer, {ID: item[ID], RESULT: item[PARAMS][0]})
+
+        server, port = await startNode(handler)
+
+        try:
+            first = await pool.getConnection(endpoint, "127.0.0.1", port)
+            second = await pool.getConnection(endpoint, "127.0.0.1", port)
+
+            # Both callers use the same id, the pool rewrites them so the answers are not mixed up
+            responses = await asyncio.gather(
+                first.request({ID: 1, METHOD: "method", PARAMS: ["first"]}),
+                second.request({ID: 1, METHOD: "method", PARAMS: ["second"]})
+            )
+
+            return first is second, responses, received
+        finally:
+            await pool.closeAllConnections()
+            server.close()
+
+    shared, responses, received = asyncio.run(run())
+
+    assert shared
+    assert [response[RESULT] for response in responses] == ["first", "second"]
+    assert len({request[ID] for request in received}) == 2
+
+
+def testBatchRequest(singleton):
+
+    pool = singleton(SocketPool)
+
+    async def run():
+
+        async def handler(requests, writer):
+            reply(writer, [{ID: request[ID], RESULT: request[PARAMS][0] * 2} for request in reversed(requests)])
+
+        server, port = await startNode(handler)
+
+        try:
+            connection = await pool.getConnection(endpoint, "127.0.0.1", port)
+            return await connection.requestBatch([{ID: 1, METHOD: "method", PARAMS: [value]} for value in range(3)])
+        finally:
+            await pool.closeAllConnections()
+            server.close()
+
+    assert [response[RESULT] for response in asyncio.run(run())] == [0, 2, 4]
+
+
+def testSubscriptions(singleton):
+
+    pool = singleton(SocketPool)
+    statuses = []
+    lost = []
+
+    pool.addSubscriptionHandler(
+        "scripthash.subscribe",
+        lambda endpoint, key, status: statuses.append((key, status)),
+        lambda endpoint, key: lost.append(key)
+    )
+
+    async def run():
+
+        async def handler(request, writer):
+            reply(writer, {ID: request[ID], RESULT: "status1"})
+            reply(writer, {METHOD: "scripthash.subscribe", PARAMS: [request[PARAMS][0], "status2"]})
+            reply(writer, {METHOD: "scripthash.subscribe", PARAMS: ["unknown", "status3"]})
+            await writer.drain()
+            writer.close()
+
+        server, port = await startNode(handler)
+
+        try:
+            connection = await pool.getConnection(endpoint, "127.0.0.1", port)
+            response = await connection.request({ID: 1, METHOD: "scripthash.subscribe", PARAMS: ["hash"]})
+
+            while not connection.closed:
+                await asyncio.sleep(0.01)
+
+            return response
+        finally:
+            await pool.closeAllConnections()
+            server.close()
+
+    assert asyncio.run(run())[RESULT] == "status1"
+
+    # Only subscriptions made on the connection are notified, and they are reported lost with it
+    assert statuses == [("hash", "status1"), ("hash", "status2")]
+    assert lost == ["hash"]
+
+
+def testUnsubscribe(singleton):
+
+    pool = singleton(SocketPool)
+    statuses = []
+
+    pool.addSubscriptionHandler("scripthash.subscribe", lambda endpoint, key, status: statuses.append(status), lambda endpoint, key: None)
+
+    async def run():
+
+        received = []
+
+        async def handler(request, writer):
+            received.append(request[METHOD])
+            reply(writer, {ID: request[ID], RESULT: "status1" if request[METHOD] == "scripthash.subscribe" else True})
+            if request[METHOD] == "scripthash.unsubscribe":
+                # A notification already on its way when the subscription is dropped is ignored
+                reply(writer, {METHOD: "scripthash.subscribe", PARAMS: [request[PARAMS][0], "status2"]})
+
+        server, port = await startNode(handler)
+
+        try:
+            connection = await pool.getConnection(endpoint, "127.0.0.1", port)
+            await connection.request({ID: 1, METHOD: "scripthash.subscribe", PARAMS: ["hash"]})
+
+            pool.unsubscribe(endpoint, "scripthash.subscribe", "hash")
+            assert not connection.unsubscribe("scripthash.subscribe", "hash")
+
+            while len(received) < 2:
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+
+            return received
+        finally:
+            await pool.closeAllConnections()
+            server.close()
+
+    assert asyncio.run(run()) == ["scripthash.subscribe", "scripthash.unsubscribe"]
+    assert statuses == ["status1"]
+
+
+def testConnectionLost(singleton):
+
+    pool = singleton(SocketPool)
+
+    async def run():
+
+        async def handler(request, writer):
+            writer.close()
+
+        server, port = await startNode(handler)
+
+        try:
+            connection = await pool.getConnection(endpoint, "127.0.0.1", port)
+
+            # Pending requests fail with the error that closed the connection
+            with pytest.raises((asyncio.IncompleteReadError, ConnectionResetError)):
+                await connection.request({ID: 1, METHOD: "method", PARAMS: []})
+
+            assert connection.closed
+
+            # A closed connection is replaced on the next call
+            return connection is not await pool.getConnection(endpoint, "127.0.0.1", port)
+        finally:
+            await pool.closeAllConnections()
+            server.close()
+
+    assert asyncio.run(run())
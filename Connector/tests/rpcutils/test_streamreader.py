@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+import asyncio
+import pytest
+from rpcutils.streamreader import JsonLineReader
+
+
+async def readMessages(data, count):
+
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+
+    lineReader = JsonLineReader(reader)
+
+    return [await lineReader.readMessage() for _ in range(count)]
+
+
+def testMessagesSplitAcrossChunks(monkeypatch):
+
+    # Tiny chunks split messages and leave the start of the next one behind the separator
+    monkeypatch.setenv("SOCKET_READ_CHUNK_SIZE", "5")
+
+    messages = asyncio.run(readMessages(b'{"id": 1, "result": "abcdefgh"}\n{"id": 2}\n[1, 2, 3]\n', 3))
+
+    assert messages == [{"id": 1, "result": "abcdefgh"}, {"id": 2}, [1, 2, 3]]
+
+
+def testSeveralMessagesInOneChunk():
+
+    messages = asyncio.run(readMessages(b'{"id": 1}\n{"id": 2}\n', 2))
+
+    assert messages == [{"id": 1}, {"id": 2}]
+
+
+def testMessageOverLimit(monkeypatch):
+
+    monkeypatch.setenv("SOCKET_READ_CHUNK_SIZE", "8")
+    monkeypatch.setenv("SOCKET_MAX_RESPONSE_SIZE", "16")
+
+    with pytest.raises(asyncio.LimitOverrunError):
+        asyncio.run(readMessages(b'{"result": "' + b"a" * 64 + b'"}\n', 1))
+
+
+def testMessageWithinLimit(monkeypatch):
+
+    monkeypatch.setenv("SOCKET_READ_CHUNK_SIZE", "8")
+    monkeypatch.setenv("SOCKET_MAX_RESPONSE_SIZE", "16")
+
+    assert asyncio.run(readMessages(b'{"id": 1}\n', 1)) == [{"id": 1}]
+
+
+def testConnectionClosedMidMessage():
+
+    with pytest.raises(asyncio.IncompleteReadError):
+        asyncio.run(readMessages(b'{"id": 1}\n{"id":', 2))
@@ -0,0 +1,174 @@
+#!/usr/bin/python3
+import asyncio
+import pytest
+from types import SimpleNamespace
+from rpcutils import error
+from rpcutils.rpcsocketconnector import RPCSocketConnector
+from rpcutils.socketpool import SocketPool
+from utils.addresscache import AddressCache
+from utils.constants import *
+
+endpoint = "localhost:electrs"
+config = SimpleNamespace(coin="BTC", networkName="regtest")
+getHistoryMethod = "blockchain.scripthash.get_history"
+
+
+class Node:
+
+    def __init__(self):
+        self.statuses = {}
+        self.histories = {}
+        self.calls = []
+        self.replicas = []
+        self.failing = set()
+
+    async def request(self, endpoint, id, method, params):
+        # Requests to several replicas are answered by the first one, as the load balancer would pick it
+        endpoint = endpoint if isinstance(endpoint, str) else endpoint[0]
+        self.calls.append((method, params[0]))
+        self.replicas.append(endpoint)
+        if endpoint in self.failing:
+            raise error.RpcBadGatewayError(id=id)
+        if method == SCRIPT_HASH_SUBSCRIBE_METHOD:
+            # Pooled connections hand the status of every subscription they make to the pool
+            SocketPool().notify(endpoint, method, [params[0], self.statuses.get(params[0], None)])
+            return self.statuses.get(params[0], None)
+        return self.histories.get(params[0], [])
+
+    async def requestBatch(self, endpoint, id, method, paramsList):
+        return [await self.request(endpoint, id, method, params) for params in paramsList]
+
+
+@pytest.fixture
+def node(monkeypatch):
+    node = Node()
+    monkeypatch.setattr(RPCSocketConnector, "request", node.request)
+    monkeypatch.setattr(RPCSocketConnector, "requestBatch", node.requestBatch)
+    return node
+
+
+def getHistory(cache, scriptHash):
+    return asyncio.run(cache.request(config, endpoint, 1, getHistoryMethod, scriptHash))
+
+
+def testResultsReusedWhileStatusIsUnchanged(singleton, node):
+
+    singleton(SocketPool)
+    cache = singleton(AddressCache)
+    node.statuses["hash1"] = "status1"
+    node.histories["hash1"] = [{"tx_hash": "tx1", "height": 100}]
+
+    assert getHistory(cache, "hash1") == [{"tx_hash": "tx1", "height": 100}]
+    assert node.calls == [(SCRIPT_HASH_SUBSCRIBE_METHOD, "hash1"), (getHistoryMethod, "hash1")]
+
+    # The status is kept by the subscription, a second call does not reach the node
+    history = getHistory(cache, "hash1")
+    history.append({"tx_hash": "tx2", "height": 101})
+
+    assert getHistory(cache, "hash1") == [{"tx_hash": "tx1", "height": 100}]
+    assert len(node.calls) == 2
+    assert cache.stats["hits"] == 2
+
+
+def testStatusNotificationInvalidates(singleton, node):
+
+    pool = singleton(SocketPool)
+    cache = singleton(AddressCache)
+    node.statuses["hash1"] = "status1"
+    node.histories["hash1"] = [{"tx_hash": "tx1", "height": 0}]
+
+    getHistory(cache, "hash1")
+
+    node.histories["hash1"] = [{"tx_hash": "tx1", "height": 100}]
+    pool.notify(endpoint, SCRIPT_HASH_SUBSCRIBE_METHOD, ["hash1", "status2"])
+
+    # The new status comes with the notification, only the result is fetched again
+    assert getHistory(cache, "hash1") == [{"tx_hash": "tx1", "height": 100}]
+    assert node.calls[2:] == [(getHistoryMethod, "hash1")]
+
+
+def testLostSubscriptionSubscribesAgain(singleton, node):
+
+    pool = singleton(SocketPool)
+    cache = singleton(AddressCache)
+    node.statuses["hash1"] = "status1"
+
+    getHistory(cache, "hash1")
+    pool.notifySubscriptionsLost(endpoint, [(SCRIPT_HASH_SUBSCRIBE_METHOD, "hash1")])
+
+    # The status is read again but the result stored under it is still valid
+    getHistory(cache, "hash1")
+
+    assert node.calls[2:] == [(SCRIPT_HASH_SUBSCRIBE_METHOD, "hash1")]
+
+
+def testBatchMixesCachedAndMissing(singleton, node):
+
+    singleton(SocketPool)
+    cache = singleton(AddressCache)
+    node.statuses.update({"hash1": "status1", "hash2": "status2"})
+    node.histories.update({"hash1": [{"tx_hash": "tx1", "height": 1}], "hash2": [{"tx_hash": "tx2", "height": 2}]})
+
+    getHistory(cache, "hash1")
+    node.calls.clear()
+
+    histories = asyncio.run(cache.requestBatch(config, endpoint, 1, getHistoryMethod, ["hash1", "hash2", "hash1"]))
+
+    assert histories == [node.histories["hash1"], node.histories["hash2"], node.histories["hash1"]]
+    assert node.calls == [(SCRIPT_HASH_SUBSCRIBE_METHOD, "hash2"), (getHistoryMethod, "hash2")]
+
+
+def testDisabled(singleton, node):
+
+    singleton(SocketPool)
+    cache = singleton(AddressCache, ADDRESS_CACHE_SIZE=0)
+
+    getHistory(cache, "hash1")
+    getHistory(cache, "hash1")
+
+    assert node.calls == [(getHistoryMethod, "hash1")] * 2
+
+
+def testEvictedStatusesUnsubscribe(singleton, node, monkeypatch):
+
+    pool = singleton(SocketPool)
+    cache = singleton(AddressCache, ADDRESS_CACHE_SIZE=1)
+    unsubscribed = []
+    monkeypatch.setattr(pool, "unsubscribe", lambda *args: unsubscribed.append(args))
+
+    getHistory(cache, "hash1")
+    getHistory(cache, "hash2")
+
+    assert unsubscribed == [(endpoint, SCRIPT_HASH_SUBSCRIBE_METHOD, "hash1")]
+    assert cache.stats["subscriptions"] == 1
+
+
+def testResultsReadFromStatusReplica(singleton, node):
+
+    singleton(SocketPool)
+    cache = singleton(AddressCache)
+    node.statuses["hash1"] = "status1"
+
+    # The status is known from the second replica, so its result must come from there too
+    SocketPool().notify("replica2", SCRIPT_HASH_SUBSCRIBE_METHOD, ["hash1", "status1"])
+    asyncio.run(cache.request(config, ["replica1", "replica2"], 1, getHistoryMethod, "hash1"))
+
+    assert node.calls == [(getHistoryMethod, "hash1")]
+    assert node.replicas == ["replica2"]
+
+
+def testFailedStatusReplicaIsNotCached(singleton, node):
+
+    singleton(SocketPool)
+    cache = singleton(AddressCache)
+    node.histories["hash1"] = [{"tx_hash": "tx1", "height": 100}]
+    node.failing.add("replica2")
+
+    SocketPool().notify("replica2", SCRIPT_HASH_SUBSCRIBE_METHOD, ["hash1", "status1"])
+
+    for _ in range(2):
+        history = asyncio.run(cache.request(config, ["replica1", "replica2"], 1, getHistoryMethod, "hash1"))
+        assert history == [{"tx_hash": "tx1", "height": 100}]
+
+    # Results from another replica may be older than the status, they are returned but read again next time
+    assert node.replicas == ["replica2", "replica1"] * 2
@@ -0,0 +1,40 @@
+#!/usr/bin/python3
+import pytest
+from utils import addresshistory
+
+# Electrum histories list mempool entries last, -1 marks those spending unconfirmed outputs
+history = [
+    {"tx_hash": "a", "height": 100},
+    {"tx_hash": "b", "height": 0},
+    {"tx_hash": "c", "height": 102},
+    {"tx_hash": "d", "height": -1},
+    {"tx_hash": "e", "height": 101},
+    {"tx_hash": "f", "height": 0}
+]
+
+
+@pytest.mark.parametrize("height, pending", [(-1, True), (0, True), (1, False), (700000, False)])
+def testIsPendingHeight(height, pending):
+    assert addresshistory.isPendingHeight(height) is pending
+
+
+@pytest.mark.parametrize("params, txs", [
+    ({}, ["f", "d", "b", "c", "e", "a"]),
+    ({"order": "desc"}, ["f", "d", "b", "c", "e", "a"]),
+    ({"order": "asc"}, ["a", "e", "c", "b", "d", "f"]),
+    ({"status": "pending"}, ["f", "d", "b"]),
+    ({"status": "confirmed"}, ["c", "e", "a"]),
+    ({"status": "confirmed", "order": "asc"}, ["a", "e", "c"]),
+    ({"status": "pending", "order": "asc"}, ["b", "d", "f"])
+])
+def testSortAddressHistory(params, txs):
+    assert addresshistory.sortAddressHistory(params, history) == txs
+
+
+def testParseAddressHistory():
+
+    txs = addresshistory.sortAddressHistory({}, history)
+
+    response = addresshistory.parseAddressHistory({"address": "address", "page": 1, "pageSize": 4}, txs)
+
+    assert response == {"address": "address", "txHashes": ["e", "a"], "maxPage": 2}
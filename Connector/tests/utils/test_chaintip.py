@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+import asyncio
+import pytest
+from utils import chaintip
+from utils.chaintip import ChainTipTracker
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(chaintip, "time", clock)
+    return clock
+
+
+def testPolledTipExpires(singleton, clock):
+
+    tracker = singleton(ChainTipTracker, CHAIN_TIP_POLL_INTERVAL=1, CHAIN_TIP_PUSH_MAX_AGE=3)
+    tracker.update("BTC", "regtest", 100, "hash100")
+
+    clock.now += 0.5
+    assert tracker.getTip("BTC", "regtest") == (100, "hash100")
+
+    clock.now += 1
+    assert tracker.getTip("BTC", "regtest") is None
+    assert tracker.getTip("BTC", "mainnet") is None
+
+
+def testPushedTipLastsLonger(singleton, clock):
+
+    tracker = singleton(ChainTipTracker, CHAIN_TIP_POLL_INTERVAL=1, CHAIN_TIP_PUSH_MAX_AGE=3)
+    tracker.setBlockTime("BTC", "regtest", 600)
+    tracker.update("BTC", "regtest", 100, "hash100", pushed=True)
+
+    # Gaps between blocks well over the average keep the pushed tip while the stream is alive
+    clock.now += 1500
+    assert tracker.getTip("BTC", "regtest") == (100, "hash100")
+
+    # Without a live stream the tip is only trusted for the poll interval
+    tracker.setPushing("BTC", "regtest", False)
+    assert tracker.getTip("BTC", "regtest") is None
+
+
+def testPushedTipMaxAgeScalesWithBlockTime(singleton, clock):
+
+    tracker = singleton(ChainTipTracker, CHAIN_TIP_POLL_INTERVAL=1, CHAIN_TIP_PUSH_MAX_AGE=3)
+    tracker.setBlockTime("ETH", "regtest", 12)
+    tracker.update("ETH", "regtest", 100, "hash100", pushed=True)
+    tracker.update("BCH", "regtest", 100, "hash100", pushed=True)
+
+    assert tracker.getMaxAge("ETH", "regtest") == 36
+    assert tracker.getMaxAge("ETH", "mainnet") == 1
+
+    # Networks whose block time is unknown do not trust pushed tips for longer than polled ones
+    assert tracker.getMaxAge("BCH", "regtest") == 1
+
+    clock.now += 37
+    assert tracker.getTip("ETH", "regtest") is None
+
+
+def testLaggingPollKeepsTip(singleton, clock):
+
+    tracker = singleton(ChainTipTracker, CHAIN_TIP_POLL_INTERVAL=1)
+    tracker.update("BTC", "regtest", 100, "hash100")
+
+    clock.now += 0.8
+    tracker.update("BTC", "regtest", 99, "hash99")
+
+    clock.now += 0.8
+    assert tracker.getTip("BTC", "regtest") == (100, "hash100")
+
+
+def testPollAheadOfStreamStopsPushing(singleton, clock):
+
+    tracker = singleton(ChainTipTracker, CHAIN_TIP_POLL_INTERVAL=1, CHAIN_TIP_PUSH_MAX_AGE=3)
+    tracker.update("BTC", "regtest", 100, "hash100", pushed=True)
+    tracker.update("BTC", "regtest", 101, "hash101")
+
+    assert not tracker.stats["tips"]["BTC/regtest"]["pushing"]
+
+    clock.now += 2
+    assert tracker.getTip("BTC", "regtest") is None
+
+
+def testGetOrFetchCollapsesPolls(singleton, clock):
+
+    tracker = singleton(ChainTipTracker, CHAIN_TIP_POLL_INTERVAL=1)
+    polls = []
+
+    async def poll():
+        polls.append(1)
+        await asyncio.sleep(0.01)
+        return 100, "hash100"
+
+    async def run():
+        tips = await asyncio.gather(*[tracker.getOrFetch("BTC", "regtest", poll) for _ in range(3)])
+        return tips + [await tracker.getOrFetch("BTC", "regtest", poll)]
+
+    tips = asyncio.run(run())
+
+    assert tips == [(100, "hash100")] * 4
+    assert len(polls) == 1
+    assert tracker.stats["polls"] == 1
+    assert tracker.stats["hits"] == 1
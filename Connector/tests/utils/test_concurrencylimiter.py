@@ -0,0 +1,181 @@
+#!/usr/bin/python3
+import asyncio
+import pytest
+from utils import concurrencylimiter
+from utils.concurrencylimiter import AdaptiveLimit, ConcurrencyLimiter
+from utils.constants import *
+
+
+def getLimit(initial=2, minimum=1, maximum=4):
+    return AdaptiveLimit("http://node", initial=initial, minimum=minimum, maximum=maximum, backoff=0.5, tolerance=2.0)
+
+
+def testAdditiveIncrease():
+
+    async def run():
+
+        limit = getLimit()
+
+        # Successes only raise the limit while every slot is taken
+        await limit.acquire(None)
+        limit.release()
+        limit.onSuccess(0.1)
+        assert limit.stats["limit"] == 2
+
+        for _ in range(4):
+            await limit.acquire(None)
+            await limit.acquire(None)
+            limit.release()
+            limit.onSuccess(0.1)
+            limit.release()
+
+        return limit.stats["limit"]
+
+    assert asyncio.run(run()) == 3
+
+
+def testMaximum():
+
+    limit = getLimit(initial=4, maximum=4)
+    limit._inFlight = 3
+
+    for _ in range(20):
+        limit.onSuccess(0.1)
+
+    assert limit.stats["limit"] == 4
+
+
+def testMultiplicativeDecrease():
+
+    limit = getLimit(initial=4)
+    limit.onSuccess(10)
+
+    # A burst of errors within one round trip only cuts the limit once
+    limit.onError()
+    limit.onError()
+
+    assert limit.stats["limit"] == 2
+
+    limit._lastDecrease -= 10
+    limit.onError()
+    limit._lastDecrease -= 10
+    limit.onError()
+
+    assert limit.stats["limit"] == 1
+
+
+def testLatencySpikeDecrease():
+
+    limit = getLimit(initial=4)
+
+    limit.onSuccess(0.1)
+    limit.onSuccess(1)
+
+    assert limit.stats["limit"] == 2
+
+
+def testBaselinePerMethod():
+
+    limit = getLimit(initial=4)
+
+    # A slow method answering at its usual pace is not a spike against a fast method's baseline
+    for _ in range(3):
+        limit.onSuccess(0.01, "getblockcount")
+        limit.onSuccess(2, "getblock")
+
+    assert limit.stats["limit"] == 4
+    assert limit.stats["baselineLatency"] == {"getblockcount": pytest.approx(0.01), "getblock": pytest.approx(2)}
+
+    limit.onSuccess(0.1, "getblockcount")
+
+    assert limit.stats["limit"] == 2
+
+
+def testFlowFairness(singleton):
+
+    limiter = singleton(ConcurrencyLimiter, **{LIMITER_INITIAL_ENV: 1, LIMITER_MAX_ENV: 1})
+
+    async def run():
+
+        release = asyncio.Event()
+        order = []
+
+        async def request(flow, name):
+
+            concurrencylimiter.currentFlow.set(flow)
+
+            async def function():
+                order.append(name)
+                if name == "bulk0":
+                    await release.wait()
+
+            await limiter.request("http://node", function)
+
+        tasks = [asyncio.ensure_future(request("bulk", "bulk0"))]
+        await asyncio.sleep(0)
+        tasks += [asyncio.ensure_future(request("bulk", f"bulk{index}")) for index in range(1, 4)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(request("client", "client")))
+        await asyncio.sleep(0)
+
+        assert limiter.stats["http://node"]["queued"] == 4
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+        return order
+
+    # Queued flows take turns, the single client request does not wait for the whole bulk request
+    assert asyncio.run(run()) == ["bulk0", "bulk1", "client", "bulk2", "bulk3"]
+
+
+def testCancelledWaiter(singleton):
+
+    limiter = singleton(ConcurrencyLimiter, **{LIMITER_INITIAL_ENV: 1, LIMITER_MAX_ENV: 1})
+
+    async def run():
+
+        release = asyncio.Event()
+
+        async def hold():
+            await release.wait()
+
+        async def answer():
+            return "answer"
+
+        holder = asyncio.ensure_future(limiter.request("http://node", hold))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(limiter.request("http://node", answer))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        release.set()
+        await holder
+
+        assert limiter.stats["http://node"]["inFlight"] == 0
+        assert limiter.stats["http://node"]["queued"] == 0
+
+        return await limiter.request("http://node", answer)
+
+    assert asyncio.run(run()) == "answer"
+
+
+def testErrorsRelease(singleton):
+
+    limiter = singleton(ConcurrencyLimiter, **{LIMITER_INITIAL_ENV: 4})
+
+    async def fail():
+        raise OSError("Failed")
+
+    async def run():
+        with pytest.raises(OSError):
+            await limiter.request("http://node", fail)
+        return limiter.stats["http://node"]
+
+    stats = asyncio.run(run())
+
+    assert stats["inFlight"] == 0
+    assert stats["limit"] == 2
@@ -0,0 +1,132 @@
+#!/usr/bin/python3
+import asyncio
+import pytest
+from utils import historycursor
+from utils.constants import *
+from utils.historycursor import HistorySnapshots
+
+owner = ("BTC", "regtest", "address", None, None)
+elements = [f"{index:064x}" for index in range(10)]
+
+
+def walk(pageSize, fetch):
+
+    pages = []
+    cursor = None
+
+    while True:
+        elements, snapshotId = asyncio.run(historycursor.loadSnapshot(owner, cursor, fetch))
+        page, nextCursor = historycursor.paginateElements(elements, snapshotId, cursor, pageSize=pageSize, owner=owner)
+        pages.append(page)
+        if nextCursor is None:
+            return pages
+        cursor = historycursor.decodeElementsCursor(nextCursor)
+
+
+def testCursorRoundTrip():
+
+    state = {"s": "abcd", "p": 3, "h": elements[2]}
+
+    cursor = historycursor.encodeCursor(state)
+
+    assert "=" not in cursor
+    assert historycursor.decodeCursor(cursor) == state
+    assert historycursor.decodeElementsCursor(cursor) == state
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", historycursor.encodeCursor([1, 2])])
+def testCursorNotValid(cursor):
+    with pytest.raises(ValueError):
+        historycursor.decodeElementsCursor(cursor)
+
+
+def testCursorFieldsNotValid():
+
+    with pytest.raises(ValueError):
+        historycursor.decodeElementsCursor(historycursor.encodeCursor({"s": None, "p": -1, "h": None}))
+
+    with pytest.raises(ValueError):
+        historycursor.decodeElementsCursor(historycursor.encodeCursor({"s": 1, "p": 0, "h": None}))
+
+
+def testResumePosition():
+
+    assert historycursor.resumePosition(elements, 3, elements[2]) == 3
+    assert historycursor.resumePosition(elements[1:], 3, elements[2]) == 2
+    assert historycursor.resumePosition(elements, 30, None) == len(elements)
+    assert historycursor.resumePosition(elements, 3, "missing") == 3
+
+
+def testWalkFetchesOnce(singleton):
+
+    snapshots = singleton(HistorySnapshots)
+    fetches = []
+
+    async def fetch():
+        fetches.append(1)
+        return elements
+
+    pages = walk(3, fetch)
+
+    assert pages == [elements[0:3], elements[3:6], elements[6:9], elements[9:]]
+    assert len(fetches) == 1
+    assert snapshots.stats["snapshots"] == 1
+    assert snapshots.stats["hits"] == 3
+
+
+def testPlainPagesHaveNoCursor(singleton):
+
+    snapshots = singleton(HistorySnapshots)
+
+    page, nextCursor = historycursor.paginateElements(elements, page=1, pageSize=3, owner=owner, withCursor=False)
+
+    assert page == elements[3:6]
+    assert nextCursor is None
+    assert snapshots.stats["snapshots"] == 0
+
+
+def testSnapshotOwner(singleton):
+
+    snapshots = singleton(HistorySnapshots)
+    snapshotId = snapshots.save(owner, elements)
+
+    assert snapshots.load(owner, snapshotId) == elements
+    assert snapshots.load(owner[:-1] + ("asc",), snapshotId) is None
+
+
+def testSnapshotExpiry(singleton):
+
+    snapshots = singleton(HistorySnapshots, **{HISTORY_SNAPSHOT_TTL_ENV: -1})
+
+    assert snapshots.load(owner, snapshots.save(owner, elements)) is None
+    assert snapshots.stats["snapshots"] == 0
+
+
+def testSnapshotSizeBudget(singleton):
+
+    size = len(historycursor.jsoncodec.dumps(elements))
+    snapshots = singleton(HistorySnapshots, **{HISTORY_SNAPSHOT_SIZE_ENV: 2 * size})
+
+    first = snapshots.save(owner, elements)
+    second = snapshots.save(owner, elements)
+    third = snapshots.save(owner, elements)
+
+    assert snapshots.load(owner, first) is None
+    assert snapshots.load(owner, second) == elements
+    assert snapshots.load(owner, third) == elements
+    assert snapshots.stats["size"] == 2 * size
+
+    # Histories larger than the whole budget are not kept, their cursors reload them
+    assert snapshots.save(owner, elements * 3) is None
+    assert snapshots.stats["rejections"] == 1
+
+
+def testSnapshotCountBudget(singleton):
+
+    snapshots = singleton(HistorySnapshots, **{HISTORY_SNAPSHOT_COUNT_ENV: 1})
+
+    first = snapshots.save(owner, elements)
+    second = snapshots.save(owner, elements)
+
+    assert snapshots.load(owner, first) is None
+    assert snapshots.load(owner, second) == elements
@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+from utils import jsoncodec
+from utils.constants import *
+from utils.immutablecache import FrequencySketch, ImmutableCache
+
+
+def value(name):
+    return {"hash": name, "data": "00" * 32}
+
+
+valueSize = len(jsoncodec.dumps(value("a")))
+
+
+def getCache(singleton, entries):
+    return singleton(ImmutableCache, **{IMMUTABLE_CACHE_SIZE_ENV: entries * valueSize, IMMUTABLE_CACHE_MIN_CONFIRMATIONS_ENV: 6})
+
+
+def put(cache, name, confirmations=6):
+    return cache.put("BTC", "regtest", name, value(name), confirmations)
+
+
+def get(cache, name):
+    return cache.get("BTC", "regtest", name)
+
+
+def testMinConfirmations(singleton):
+
+    cache = getCache(singleton, 4)
+
+    assert not put(cache, "a", confirmations=5)
+    assert not cache.put("BTC", "regtest", "a", value("a"), None)
+    assert put(cache, "a")
+    assert get(cache, "a") == value("a")
+
+
+def testHitsReturnCopies(singleton):
+
+    cache = getCache(singleton, 4)
+    put(cache, "a")
+
+    get(cache, "a")["data"] = "changed"
+
+    assert get(cache, "a") == value("a")
+
+
+def testByteBudgetEviction(singleton):
+
+    cache = getCache(singleton, 2)
+
+    assert put(cache, "a")
+    assert put(cache, "b")
+
+    # The newcomer has been requested more often than the least recently used entry, so it takes its place
+    for _ in range(3):
+        get(cache, "c")
+
+    assert put(cache, "c")
+    assert get(cache, "a") is None
+    assert get(cache, "b") == value("b")
+    assert get(cache, "c") == value("c")
+    assert cache.stats["size"] == 2 * valueSize
+    assert cache.stats["evictions"] == 1
+
+
+def testTinyLFUAdmission(singleton):
+
+    cache = getCache(singleton, 2)
+
+    put(cache, "a")
+    put(cache, "b")
+
+    for _ in range(5):
+        get(cache, "a")
+        get(cache, "b")
+
+    # A one hit wonder does not push out entries requested more often
+    get(cache, "c")
+
+    assert not put(cache, "c")
+    assert get(cache, "a") == value("a")
+    assert get(cache, "b") == value("b")
+    assert cache.stats["rejections"] == 1
+
+
+def testValueLargerThanBudget(singleton):
+
+    cache = getCache(singleton, 1)
+
+    assert not cache.put("BTC", "regtest", "big", {"data": "00" * valueSize}, 6)
+    assert cache.stats["size"] == 0
+
+
+def testDisabled(singleton):
+
+    cache = getCache(singleton, 0)
+
+    assert not cache.enabled
+    assert not put(cache, "a")
+
+
+def testFrequencySketchAging():
+
+    sketch = FrequencySketch(width=1024, depth=2, sampleSize=16)
+
+    for _ in range(8):
+        sketch.increment("a")
+
+    assert sketch.estimate("a") >= 8
+
+    for _ in range(8):
+        sketch.increment("b")
+
+    # Reaching the sample size halves every counter
+    assert sketch.estimate("a") <= 4
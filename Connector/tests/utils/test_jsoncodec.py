@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+import pytest
+from utils import jsoncodec
+from utils.constants import *
+
+codecs = [
+    JSON_CODEC_STDLIB,
+    pytest.param(JSON_CODEC_ORJSON, marks=pytest.mark.skipif(jsoncodec.orjson is None, reason="orjson is not installed"))
+]
+
+
+@pytest.fixture(params=codecs)
+def codec(request, monkeypatch):
+    monkeypatch.setattr(jsoncodec, "codec", request.param)
+    return request.param
+
+
+def testRoundTrip(codec):
+
+    obj = {"b": [1, 2.5, None, True], "a": "text", "c": {"nested": "ñ"}}
+
+    assert jsoncodec.loads(jsoncodec.dumps(obj)) == obj
+    assert jsoncodec.loads(jsoncodec.dumpsString(obj)) == obj
+    assert isinstance(jsoncodec.dumps(obj), bytes)
+    assert isinstance(jsoncodec.dumpsString(obj), str)
+
+
+def testSortKeys(codec):
+    assert list(jsoncodec.loads(jsoncodec.dumps({"b": 1, "a": 2}))) == ["b", "a"]
+    assert list(jsoncodec.loads(jsoncodec.dumps({"b": 1, "a": 2}, sortKeys=True))) == ["a", "b"]
+
+
+def testLargeIntegers(codec):
+
+    # Wei amounts easily go past 64 bits, they must survive both ways without turning into floats
+    obj = {"balance": 2 ** 70, "negative": -(2 ** 65), "small": 1}
+
+    assert jsoncodec.loads(jsoncodec.dumps(obj)) == obj
+    assert jsoncodec.loads(b'{"value": 123456789012345678901234567890}') == {"value": 123456789012345678901234567890}
+    assert isinstance(jsoncodec.loads("[123456789012345678901234567890]")[0], int)
+
+
+def testNonStringKeys(codec):
+    assert jsoncodec.loads(jsoncodec.dumps({1: "a"})) == {"1": "a"}
+
+
+def testInvalidJSON(codec):
+    with pytest.raises(ValueError):
+        jsoncodec.loads(b"{not json")
@@ -0,0 +1,263 @@
+#!/usr/bin/python3
+import asyncio
+import pytest
+import time
+from contextlib import asynccontextmanager
+from utils.concurrencylimiter import ConcurrencyLimiter
+from utils.constants import *
+from utils.loadbalancer import CircuitOpenError, LoadBalancer, Replica
+
+endpoints = ["http://replica1", "http://replica2"]
+
+
+def testHedgedRequestSucceedsWhenBothFinishTogether(singleton):
+
+    lb = singleton(LoadBalancer, **{HEDGE_MIN_SAMPLES_ENV: 1, HEDGE_PERCENTILE_ENV: 0})
+
+    async def run():
+
+        async def answer(endpoint):
+            return endpoint
+
+        # A first sample gives the method a hedge delay
+        await lb.request(endpoints, answer, method="method")
+
+        release = asyncio.Event()
+        calls = []
+
+        async def function(endpoint):
+            calls.append(endpoint)
+            await release.wait()
+            if len(calls) == 1 or endpoint == calls[0]:
+                raise OSError("Primary failed")
+            return endpoint
+
+        request = asyncio.ensure_future(lb.request(endpoints, function, method="method", hedge=True))
+
+        while len(calls) < 2:
+            await asyncio.sleep(0.001)
+
+        # Both attempts complete in the same loop iteration, the hedge answer must win over the primary failure
+        release.set()
+
+        return await request, calls
+
+    for _ in range(20):
+        response, calls = asyncio.run(run())
+        assert response == calls[1]
+        assert lb.stats["hedged"] >= 1
+
+
+def testHedgedRequestFailsWhenEveryAttemptFails(singleton):
+
+    lb = singleton(LoadBalancer, **{HEDGE_MIN_SAMPLES_ENV: 1, HEDGE_PERCENTILE_ENV: 0, LB_MAX_ATTEMPTS_ENV: 1})
+
+    async def run():
+
+        async def answer(endpoint):
+            return endpoint
+
+        await lb.request(endpoints, answer, method="method")
+
+        async def function(endpoint):
+            await asyncio.sleep(0.01)
+            raise OSError("Failed")
+
+        await lb.request(endpoints, function, method="method", hedge=True)
+
+    with pytest.raises(OSError):
+        asyncio.run(run())
+
+
+def testDeadline(singleton):
+
+    lb = singleton(LoadBalancer, **{UPSTREAM_TIMEOUT_ENV: 0.01})
+
+    async def function(endpoint):
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(lb.request(endpoints[0], function))
+
+
+def testCircuitBreaker(singleton):
+
+    lb = singleton(LoadBalancer, **{LB_EJECT_FAILURES_ENV: 1})
+    calls = []
+
+    async def function(endpoint):
+        calls.append(endpoint)
+        raise OSError("Failed")
+
+    # The failure of each replica is retried on the other one, then both are ejected
+    with pytest.raises(OSError):
+        asyncio.run(lb.request(endpoints, function))
+
+    assert sorted(calls) == endpoints
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(lb.request(endpoints, function))
+
+    assert len(calls) == 2
+
+
+def testNodeErrorsAreNotRetried(singleton):
+
+    lb = singleton(LoadBalancer, **{LB_EJECT_FAILURES_ENV: 1})
+    calls = []
+
+    async def function(endpoint):
+        calls.append(endpoint)
+        raise ValueError("Answer from the node")
+
+    with pytest.raises(ValueError):
+        asyncio.run(lb.request(endpoints, function))
+
+    assert len(calls) == 1
+    assert not any(replica["ejected"] for replica in lb.stats["replicas"].values())
+
+
+def testEWMALatency():
+
+    replica = Replica(endpoints[0])
+
+    replica.record(latency=1.0, success=True, decay=0.3)
+    replica.record(latency=0.0, success=True, decay=0.3)
+
+    assert replica.stats["latency"] == pytest.approx(0.7)
+
+    replica.record(latency=5.0, success=False, decay=0.3)
+
+    # Failed requests do not move the latency estimate, only the error rate
+    assert replica.stats["latency"] == pytest.approx(0.7)
+    assert replica.stats["errorRate"] == pytest.approx(0.3)
+
+
+def testPickFastestReplica(singleton):
+
+    lb = singleton(LoadBalancer, **{LB_EJECT_FAILURES_ENV: 10})
+
+    lb.record(endpoints[0], latency=0.1, success=True)
+    lb.record(endpoints[1], latency=0.02, success=True)
+
+    assert all(lb.pick(endpoints) == endpoints[1] for _ in range(10))
+
+    # Errors are penalized on top of latency
+    for _ in range(3):
+        lb.record(endpoints[1], latency=0.02, success=False)
+
+    assert lb.pick(endpoints) == endpoints[0]
+
+
+def testPickExcludesTriedReplicas(singleton):
+
+    lb = singleton(LoadBalancer)
+
+    lb.record(endpoints[1], latency=0.01, success=True)
+
+    assert lb.pick(endpoints, exclude=[endpoints[1]]) == endpoints[0]
+    assert lb.pick(endpoints, exclude=endpoints) in endpoints
+
+
+def testEjectionAndProbing(singleton):
+
+    lb = singleton(LoadBalancer, **{LB_EJECT_FAILURES_ENV: 2, LB_EJECT_TIME_ENV: 0.01})
+
+    lb.record(endpoints[0], latency=0.01, success=False)
+    assert not lb.getReplica(endpoints[0]).ejected
+
+    lb.record(endpoints[0], latency=0.01, success=False)
+    assert lb.getReplica(endpoints[0]).ejected
+    assert all(lb.pick(endpoints) == endpoints[1] for _ in range(10))
+
+    time.sleep(0.02)
+
+    # A single probe goes to the ejected replica once its ejection time is over
+    assert lb.pick(endpoints) == endpoints[0]
+    assert lb.pick(endpoints) == endpoints[1]
+
+    # A failed probe ejects it again for twice as long
+    lb.record(endpoints[0], latency=0.01, success=False)
+    replica = lb.getReplica(endpoints[0])
+    assert replica.ejected and not replica.probing
+    assert replica.ejectedUntil - time.monotonic() > 0.01
+
+    time.sleep(0.03)
+
+    assert lb.pick(endpoints) == endpoints[0]
+
+    lb.record(endpoints[0], latency=0.01, success=True)
+
+    assert not lb.getReplica(endpoints[0]).ejected
+
+
+def testEveryReplicaEjected(singleton):
+
+    lb = singleton(LoadBalancer, **{LB_EJECT_FAILURES_ENV: 1})
+
+    for endpoint in endpoints:
+        lb.record(endpoint, latency=0.01, success=False)
+
+    # Without fail fast the replica coming back first is still used
+    assert lb.pick(endpoints) == endpoints[0]
+
+    with pytest.raises(CircuitOpenError):
+        lb.pick(endpoints, failFast=True)
+
+
+def testLimiterQueueIsNotTimed(singleton):
+
+    lb = singleton(LoadBalancer, **{HEDGE_MIN_SAMPLES_ENV: 1})
+    limiter = singleton(ConcurrencyLimiter, **{LIMITER_INITIAL_ENV: 1, LIMITER_MAX_ENV: 1})
+
+    async def function(endpoint):
+        await asyncio.sleep(0.05)
+        return endpoint
+
+    async def run():
+        # The second request waits for the only slot longer than its timeout, and still gets its full timeout once it holds it
+        return await asyncio.gather(*[
+            lb.request(endpoints[0], function, method="method", timeout=0.08, slot=lambda replica: limiter.slot(replica))
+            for _ in range(2)
+        ])
+
+    assert asyncio.run(run()) == [endpoints[0]] * 2
+
+    # Neither the latency estimate nor the hedge delay include the time queued
+    assert lb.stats["replicas"][endpoints[0]]["latency"] < 0.08
+    assert lb.getHedgeDelay("method") < 0.08
+
+
+def testQueuedPastDeadlineIsNotAFailure(singleton):
+
+    lb = singleton(LoadBalancer, **{HEDGE_MIN_SAMPLES_ENV: 1, HEDGE_PERCENTILE_ENV: 0, LB_EJECT_FAILURES_ENV: 1})
+    calls = []
+
+    async def run():
+
+        # Both replicas share a single slot, so the hedge waits until the primary times out
+        lock = asyncio.Lock()
+
+        @asynccontextmanager
+        async def slot(replica):
+            async with lock:
+                yield
+
+        async def answer(endpoint):
+            return endpoint
+
+        await lb.request(endpoints[0], answer, method="method")
+
+        async def function(endpoint):
+            calls.append(endpoint)
+            await asyncio.sleep(1)
+
+        await lb.request(endpoints, function, method="method", timeout=0.05, hedge=True, slot=slot)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+
+    assert len(calls) == 1
+    replicas = lb.stats["replicas"]
+    assert replicas[calls[0]]["ejected"]
+    assert not any(replica["ejected"] for endpoint, replica in replicas.items() if endpoint != calls[0])
@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+import asyncio
+from utils.prevoutcache import PrevoutCache
+
+
+def getFetch(fetched, concurrency=None):
+
+    running = []
+
+    async def fetch(txid):
+        fetched.append(txid)
+        running.append(txid)
+        if concurrency is not None:
+            concurrency.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(txid)
+        return [(vout, f"address-{txid}-{vout}", vout * 10) for vout in range(3)]
+
+    return fetch
+
+
+def testResolve(singleton):
+
+    cache = singleton(PrevoutCache)
+    fetched = []
+    outpoints = [("tx1", 0), ("tx2", 1), ("tx1", 2), ("tx3", 5)]
+
+    prevouts = asyncio.run(cache.resolve("BTC", "regtest", outpoints, getFetch(fetched)))
+
+    # Each parent transaction is fetched once, even when several inputs spend its outputs
+    assert sorted(fetched) == ["tx1", "tx2", "tx3"]
+    assert prevouts == [("address-tx1-0", 0), ("address-tx2-1", 10), ("address-tx1-2", 20), (None, None)]
+
+    # Siblings of resolved outputs are served from the cache
+    prevouts = asyncio.run(cache.resolve("BTC", "regtest", [("tx2", 2), ("tx1", 1)], getFetch(fetched)))
+
+    assert prevouts == [("address-tx2-2", 20), ("address-tx1-1", 10)]
+    assert len(fetched) == 3
+    assert cache.stats["hits"] == 2
+    assert cache.stats["fetches"] == 3
+
+
+def testResolveKeepsNetworksApart(singleton):
+
+    cache = singleton(PrevoutCache)
+    fetched = []
+
+    asyncio.run(cache.resolve("BTC", "regtest", [("tx1", 0)], getFetch(fetched)))
+    asyncio.run(cache.resolve("BCH", "regtest", [("tx1", 0)], getFetch(fetched)))
+
+    assert fetched == ["tx1", "tx1"]
+
+
+def testFetchConcurrency(singleton):
+
+    cache = singleton(PrevoutCache, PREVOUT_FETCH_CONCURRENCY=2)
+    fetched = []
+    concurrency = []
+
+    asyncio.run(cache.resolve("BTC", "regtest", [(f"tx{index}", 0) for index in range(6)], getFetch(fetched, concurrency)))
+
+    assert len(fetched) == 6
+    assert max(concurrency) == 2
+
+
+def testLeastRecentlyUsedEviction(singleton):
+
+    cache = singleton(PrevoutCache, PREVOUT_CACHE_SIZE=2)
+
+    cache.put("BTC", "regtest", "tx1", 0, "address1", 1)
+    cache.put("BTC", "regtest", "tx2", 0, "address2", 2)
+    cache.get("BTC", "regtest", "tx1", 0)
+    cache.put("BTC", "regtest", "tx3", 0, "address3", 3)
+
+    assert cache.get("BTC", "regtest", "tx1", 0) == ("address1", 1)
+    assert cache.get("BTC", "regtest", "tx2", 0) is None
+    assert cache.stats["entries"] == 2
@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+import asyncio
+import pytest
+from utils.constants import *
+from utils.immutablecache import ImmutableCache
+from utils.reorgdetector import ReorgDetector
+from wsutils.broker import Broker
+from wsutils.subscribers import Subscriber
+from wsutils.topics import Topic
+
+coin = "BTC"
+network = "regtest"
+
+
+class RecordingSubscriber(Subscriber):
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def onMessage(self, topicName, message):
+        self.messages.append(message)
+
+
+@pytest.fixture
+def chain(singleton):
+
+    singleton(Broker)
+    cache = singleton(ImmutableCache, **{IMMUTABLE_CACHE_MIN_CONFIRMATIONS_ENV: 0})
+    detector = singleton(ReorgDetector, **{REORG_WINDOW_SIZE_ENV: 10})
+    hashes = {height: f"block{height}" for height in range(1, 6)}
+
+    async def getBlockHash(height):
+        return hashes[height]
+
+    async def notify(height, hash, parentHash):
+        hashes[height] = hash
+        return await detector.onNewBlock(coin, network, height, hash, parentHash, getBlockHash)
+
+    for height in range(1, 6):
+        asyncio.run(notify(height, f"block{height}", f"block{height - 1}"))
+
+    for height in range(1, 6):
+        cache.put(coin, network, f"block{height}", {"height": height}, 1, kind="block", blockHashes=[f"block{height}"])
+        cache.put(coin, network, f"tx{height}", {"block": height}, 1, kind="transaction", blockHashes=[f"block{height}"])
+
+    return cache, detector, hashes, notify
+
+
+def testNoReorg(chain):
+
+    cache, detector, hashes, notify = chain
+
+    assert asyncio.run(notify(5, "block5", "block4")) == []
+    assert asyncio.run(notify(6, "block6", "block5")) == []
+    assert detector.stats["reorgs"] == 0
+    assert cache.stats["entries"] == 10
+
+
+def testReorgInvalidatesOrphanedBlocks(chain):
+
+    cache, detector, hashes, notify = chain
+    subscriber = RecordingSubscriber()
+    subscriber.subscribeToTopic(Broker(), Topic(f"{coin}/{network}/reorg"))
+
+    # A competing block at height 4 orphans the known blocks 4 and 5
+    assert asyncio.run(notify(4, "block4b", "block3")) == ["block4", "block5"]
+
+    for height in [4, 5]:
+        assert cache.get(coin, network, f"block{height}", kind="block") is None
+        assert cache.get(coin, network, f"tx{height}", kind="transaction") is None
+
+    assert cache.get(coin, network, "tx3", kind="transaction") == {"block": 3}
+    assert detector.stats["orphanedBlocks"] == 2
+    assert subscriber.messages == [
+        {
+            "forkHeight": "4",
+            "orphanedBlocks": ["block4", "block5"],
+            "latestBlockIndex": "4",
+            "latestBlockHash": "block4b"
+        }
+    ]
+
+
+def testReorgWalksBackToCommonAncestor(chain):
+
+    cache, detector, hashes, notify = chain
+
+    # The new tip builds on a branch that replaced blocks 4 and 5, only its parent is known from the notification
+    hashes[4] = "block4b"
+
+    assert asyncio.run(notify(6, "block6b", "block5b")) == ["block4", "block5"]
+    assert cache.get(coin, network, "tx3", kind="transaction") == {"block": 3}
+    assert cache.get(coin, network, "tx4", kind="transaction") is None
+
+    # The window follows the new branch, so notifying its blocks again is not a reorganization
+    assert asyncio.run(notify(6, "block6b", "block5b")) == []
+    assert detector.stats["reorgs"] == 1
@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+import asyncio
+import pytest
+from utils.constants import *
+from utils.singleflight import SingleFlight, getRequestKey
+
+
+def testCollapsesConcurrentCalls(singleton):
+
+    singleFlight = singleton(SingleFlight)
+    calls = []
+
+    async def function():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"result": [1, 2]}
+
+    async def run():
+        return await asyncio.gather(*[singleFlight.do("key", function) for _ in range(5)])
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert all(result == {"result": [1, 2]} for result in results)
+    assert singleFlight.stats["collapsed"] == 4
+    assert singleFlight.stats["inFlight"] == 0
+
+    # Every caller gets its own copy of a shared result
+    results[0]["result"].append(3)
+    assert results[1] == {"result": [1, 2]}
+
+
+def testSequentialCallsAreNotCollapsed(singleton):
+
+    singleFlight = singleton(SingleFlight)
+    calls = []
+
+    async def function():
+        calls.append(1)
+        return len(calls)
+
+    assert asyncio.run(singleFlight.do("key", function)) == 1
+    assert asyncio.run(singleFlight.do("key", function)) == 2
+
+
+def testErrorsAreShared(singleton):
+
+    singleFlight = singleton(SingleFlight)
+
+    async def function():
+        await asyncio.sleep(0.01)
+        raise OSError("Failed")
+
+    async def run():
+        return await asyncio.gather(*[singleFlight.do("key", function) for _ in range(3)], return_exceptions=True)
+
+    assert all(isinstance(result, OSError) for result in asyncio.run(run()))
+
+
+def testCancelledCallerDoesNotCancelOthers(singleton):
+
+    singleFlight = singleton(SingleFlight)
+
+    async def function():
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        first = asyncio.ensure_future(singleFlight.do("key", function))
+        second = asyncio.ensure_future(singleFlight.do("key", function))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "result"
+
+
+def testDisabled(singleton):
+
+    singleFlight = singleton(SingleFlight, **{SINGLE_FLIGHT_ENABLED_ENV: 0})
+    calls = []
+
+    async def function():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*[singleFlight.do("key", function) for _ in range(3)])
+
+    asyncio.run(run())
+
+    assert len(calls) == 3
+
+
+def testRequestKey():
+    assert getRequestKey("http://node", "method", {"a": 1, "b": 2}) == getRequestKey("http://node", "method", {"b": 2, "a": 1})
+    assert getRequestKey(["http://node"], "method", []) != getRequestKey("http://node", "other", [])
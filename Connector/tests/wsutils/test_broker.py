@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+from wsutils.broker import Broker
+from wsutils.constants import *
+from wsutils.subscribers import Subscriber
+from wsutils.topics import Topic
+
+
+class RecordingSubscriber(Subscriber):
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def onMessage(self, topicName, message):
+        self.messages.append((topicName, message))
+
+
+class ClosingHandler:
+
+    def __init__(self):
+        self.closed = 0
+
+    def close(self):
+        self.closed += 1
+
+
+def testSubscribeAndRoute(singleton):
+
+    broker = singleton(Broker)
+    first, second = RecordingSubscriber(), RecordingSubscriber()
+
+    assert first.subscribeToTopic(broker, Topic("BTC/regtest/adressBalance/address1"))[SUBSCRIBED]
+    assert second.subscribeToTopic(broker, Topic("BTC/regtest/adressBalance/address1"))[SUBSCRIBED]
+    assert not second.subscribeToTopic(broker, Topic("BTC/regtest/adressBalance/address1"))[SUBSCRIBED]
+    assert second.subscribeToTopic(broker, Topic("BTC/regtest/newBlocks"))[SUBSCRIBED]
+
+    broker.route("BTC/regtest/adressBalance/address1", "balance")
+    broker.route("BTC/regtest/newBlocks", "block")
+    broker.route("BTC/regtest/adressBalance", "not a topic")
+    broker.route("ETH/regtest/newBlocks", "unknown topic")
+
+    assert first.messages == [("BTC/regtest/adressBalance/address1", "balance")]
+    assert second.messages == [("BTC/regtest/adressBalance/address1", "balance"), ("BTC/regtest/newBlocks", "block")]
+    assert broker.getTopicSubscribers("BTC/regtest/adressBalance/address1") == [first, second]
+    assert second.topicsSubscribed == ["BTC/regtest/adressBalance/address1", "BTC/regtest/newBlocks"]
+
+
+def testTopicLookups(singleton):
+
+    broker = singleton(Broker)
+    subscriber = RecordingSubscriber()
+
+    for topicName in ["BTC/regtest/adressBalance/address1", "BTC/regtest/adressBalance/address2", "BTC/regtest/newBlocks", "ETH/regtest/newBlocks"]:
+        subscriber.subscribeToTopic(broker, Topic(topicName))
+
+    assert broker.isTopic("BTC/regtest/newBlocks")
+    assert not broker.isTopic("BTC/regtest")
+    assert not broker.isTopic("BTC/regtest/newBlocks/address1")
+    assert broker.topicHasSubscribers("ETH/regtest/newBlocks")
+    assert broker.getSubTopics("BTC/regtest/adressBalance") == ["address1", "address2"]
+    assert broker.getSubTopics("BTC/regtest") == ["adressBalance/address1", "adressBalance/address2", "newBlocks"]
+    assert broker.getSubTopics("BCH/regtest") == []
+    assert broker.getTopicNameSubscriptions() == [
+        "BTC/regtest/adressBalance/address1",
+        "BTC/regtest/adressBalance/address2",
+        "BTC/regtest/newBlocks",
+        "ETH/regtest/newBlocks"
+    ]
+
+
+def testUnsubscribe(singleton):
+
+    broker = singleton(Broker)
+    first, second = RecordingSubscriber(), RecordingSubscriber()
+    handler = ClosingHandler()
+
+    first.subscribeToTopic(broker, Topic("BTC/regtest/adressBalance/address1", handler))
+    second.subscribeToTopic(broker, Topic("BTC/regtest/adressBalance/address1"))
+    second.subscribeToTopic(broker, Topic("BTC/regtest/newBlocks"))
+
+    assert first.unsubscribeFromTopic(broker, "BTC/regtest/adressBalance/address1")[UNSUBSCRIBED]
+    assert not first.unsubscribeFromTopic(broker, "BTC/regtest/adressBalance/address1")[UNSUBSCRIBED]
+    assert not first.unsubscribeFromTopic(broker, "BTC/regtest/unknown")[UNSUBSCRIBED]
+    assert handler.closed == 0
+    assert first.topicsSubscribed == []
+
+    broker.route("BTC/regtest/adressBalance/address1", "balance")
+
+    assert first.messages == []
+    assert second.messages == [("BTC/regtest/adressBalance/address1", "balance")]
+
+    # The closing handler runs once the last subscriber leaves, and empty branches are pruned
+    second.close(broker)
+
+    assert handler.closed == 1
+    assert second.topicsSubscribed == []
+    assert broker.getTopicNameSubscriptions() == []
+    assert broker.topics.children == {}
+
+
+def testResubscribeAfterTopicClosed(singleton):
+
+    broker = singleton(Broker)
+    subscriber = RecordingSubscriber()
+    handler = ClosingHandler()
+
+    subscriber.subscribeToTopic(broker, Topic("BTC/regtest/newBlocks", handler))
+    subscriber.unsubscribeFromTopic(broker, "BTC/regtest/newBlocks")
+    subscriber.subscribeToTopic(broker, Topic("BTC/regtest/newBlocks", handler))
+
+    broker.route("BTC/regtest/newBlocks", "block")
+
+    assert subscriber.messages == [("BTC/regtest/newBlocks", "block")]
+    assert handler.closed == 1
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+import aiohttp
+import asyncio
+import json
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from wsutils.broker import Broker
+from wsutils.constants import *
+from wsutils.subscribers import WSSubscriber
+
+
+async def talkToSubscriber(handler):
+
+    results = []
+
+    async def serve(request):
+        subscriber = WSSubscriber()
+        await subscriber.websocket.prepare(request)
+        await handler(subscriber, results)
+        return subscriber.websocket
+
+    app = web.Application()
+    app.router.add_get("/ws", serve)
+    server = TestServer(app)
+    await server.start_server()
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.ws_connect(server.make_url("/ws")) as websocket:
+                received = [json.loads(msg.data) async for msg in websocket if msg.type == aiohttp.WSMsgType.TEXT]
+    finally:
+        await server.close()
+
+    return received, results
+
+
+def testResponsesAreQueuedAndNeverDropped(singleton, monkeypatch):
+
+    monkeypatch.setenv(WS_SUBSCRIBER_QUEUE_SIZE_ENV, "2")
+    broker = singleton(Broker)
+
+    async def handler(subscriber, results):
+
+        for index in range(5):
+            subscriber.onMessage("topic", {"n": index})
+
+        # Responses go after the notifications already queued and do not count against the queue size
+        await subscriber.sendMessage({"id": 1})
+
+        for index in range(5, 8):
+            subscriber.onMessage("topic", {"n": index})
+
+        await subscriber.sendMessage({"id": 2})
+        await subscriber.close(broker)
+
+    received, _ = asyncio.run(talkToSubscriber(handler))
+
+    assert received == [{"n": 3}, {"n": 4}, {"id": 1}, {"n": 6}, {"n": 7}, {"id": 2}]
+
+
+def testSendErrorsReachTheResponder():
+
+    async def run():
+
+        # Without a prepared websocket the writer cannot send, the error is raised where the response was sent
+        subscriber = WSSubscriber()
+        subscriber.onMessage("topic", {"n": 0})
+
+        try:
+            await subscriber.sendMessage({"id": 1})
+        except RuntimeError:
+            return True
+
+        return False
+
+    assert asyncio.run(run())
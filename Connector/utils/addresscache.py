@@ -0,0 +1,166 @@
+#!/usr/bin/python
+import asyncio
+from collections import OrderedDict
+from logger.logger import Logger
+from patterns import Singleton
+from rpcutils import error
+from rpcutils.rpcsocketconnector import RPCSocketConnector
+from rpcutils.socketpool import SocketPool
+from . import jsoncodec, utils
+from .constants import *
+from .loadbalancer import getEndpoints
+
+
+class AddressCache(object, metaclass=Singleton.Singleton):
+
+    def __init__(self):
+        self._maxEntries = utils.getEnvProperty(ADDRESS_CACHE_SIZE_ENV, DEFAULT_ADDRESS_CACHE_SIZE)
+        self._statuses = OrderedDict()  # (Endpoint, Script hash) -> Status kept up to date by the subscription
+        self._entries = OrderedDict()  # (Coin, Network, Script hash) -> [Status, {Method: Encoded result}]
+        self._hits = 0
+        self._misses = 0
+        self._statusRequests = 0
+        SocketPool().addSubscriptionHandler(SCRIPT_HASH_SUBSCRIBE_METHOD, self._onStatus, self._onSubscriptionLost)
+
+    def _onStatus(self, endpoint, scriptHash, status):
+
+        key = (endpoint, scriptHash)
+        self._statuses[key] = status
+        self._statuses.move_to_end(key)
+
+        # Subscriptions are dropped with their status, so each connection only keeps as many as the cache holds
+        while len(self._statuses) > self._maxEntries:
+            (replica, evicted), _ = self._statuses.popitem(last=False)
+            SocketPool().unsubscribe(replica, SCRIPT_HASH_SUBSCRIBE_METHOD, evicted)
+
+    def _onSubscriptionLost(self, endpoint, scriptHash):
+        self._statuses.pop((endpoint, scriptHash), None)
+
+    def _getKnownStatuses(self, endpoint, scriptHashes):
+
+        # Script hash -> (Replica, Status), the replica a status comes from is the one its results are read from
+        statuses = {}
+        for scriptHash in scriptHashes:
+            for replica in getEndpoints(endpoint):
+                if (replica, scriptHash) in self._statuses:
+                    statuses[scriptHash] = (replica, self._statuses[(replica, scriptHash)])
+                    break
+
+        return statuses
+
+    async def request(self, config, endpoint, id, method, scriptHash):
+        return (await self.requestBatch(config, endpoint, id, method, [scriptHash]))[0]
+
+    async def requestBatch(self, config, endpoint, id, method, scriptHashes):
+
+        if self._maxEntries <= 0:
+            return await self._fetch(endpoint, id, method, scriptHashes)
+
+        statuses = self._getKnownStatuses(endpoint, scriptHashes)
+
+        # Subscribing returns the current status, the pooled connection reports it along with the replica that
+        # answered and keeps it updated while it lives
+        unknown = [scriptHash for scriptHash in dict.fromkeys(scriptHashes) if scriptHash not in statuses]
+        if unknown:
+            self._statusRequests += len(unknown)
+            await self._fetch(endpoint, id, SCRIPT_HASH_SUBSCRIBE_METHOD, unknown)
+            statuses.update(self._getKnownStatuses(endpoint, unknown))
+
+        results = {}
+        for scriptHash in scriptHashes:
+            result = self._get(config, scriptHash, method, statuses[scriptHash][1]) if scriptHash in statuses else None
+            if result is not None:
+                self._hits += 1
+                results[scriptHash] = result
+
+        missing = [scriptHash for scriptHash in dict.fromkeys(scriptHashes) if scriptHash not in results]
+        if missing:
+            self._misses += len(missing)
+            await self._fetchMissing(config, endpoint, id, method, missing, statuses, results)
+
+        # Results are stored encoded so callers always get their own copy
+        return [jsoncodec.loads(results[scriptHash]) for scriptHash in scriptHashes]
+
+    async def _fetchMissing(self, config, endpoint, id, method, scriptHashes, statuses, results):
+
+        # Results are read from the replica their status came from, script hashes without a tracked status
+        # (subscribed outside the pool) go to any replica and are not stored
+        replicas = {}
+        for scriptHash in scriptHashes:
+            replicas.setdefault(statuses[scriptHash][0] if scriptHash in statuses else None, []).append(scriptHash)
+
+        fetched = await asyncio.gather(
+            *[self._fetchFromReplica(endpoint, replica, id, method, replicaHashes) for replica, replicaHashes in replicas.items()]
+        )
+
+        for replicaHashes, (pinned, replicaResults) in zip(replicas.values(), fetched):
+            for scriptHash, result in zip(replicaHashes, replicaResults):
+                # Results are stored under the status read before fetching them, a newer status only causes a refetch
+                results[scriptHash] = jsoncodec.dumps(result)
+                if pinned:
+                    self._put(config, scriptHash, method, statuses[scriptHash][1], results[scriptHash])
+
+    async def _fetchFromReplica(self, endpoint, replica, id, method, scriptHashes):
+
+        if replica is None:
+            return False, await self._fetch(endpoint, id, method, scriptHashes)
+
+        try:
+            return True, await self._fetch(replica, id, method, scriptHashes)
+        except (error.RpcNotFoundError, error.RpcBadGatewayError):
+            if getEndpoints(endpoint) == [replica]:
+                raise
+
+        # Another replica may not have caught up with the status, what it answers is returned but not stored
+        Logger.printWarning(f"Replica {replica} failed, {method} is read from another replica without caching it")
+        return False, await self._fetch(endpoint, id, method, scriptHashes)
+
+    async def _fetch(self, endpoint, id, method, scriptHashes):
+
+        if len(scriptHashes) == 1:
+            return [await RPCSocketConnector.request(endpoint=endpoint, id=id, method=method, params=scriptHashes)]
+
+        return await RPCSocketConnector.requestBatch(
+            endpoint=endpoint,
+            id=id,
+            method=method,
+            paramsList=[[scriptHash] for scriptHash in scriptHashes]
+        )
+
+    def _get(self, config, scriptHash, method, status):
+
+        key = (config.coin, config.networkName, scriptHash)
+        entry = self._entries.get(key, None)
+
+        if entry is None or entry[0] != status:
+            return None
+
+        self._entries.move_to_end(key)
+
+        return entry[1].get(method, None)
+
+    def _put(self, config, scriptHash, method, status, data):
+
+        key = (config.coin, config.networkName, scriptHash)
+        entry = self._entries.get(key, None)
+
+        if entry is None or entry[0] != status:
+            entry = [status, {}]
+            self._entries[key] = entry
+
+        entry[1][method] = data
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._maxEntries:
+            self._entries.popitem(last=False)
+
+    @property
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self._maxEntries,
+            "subscriptions": len(self._statuses),
+            "hits": self._hits,
+            "misses": self._misses,
+            "statusRequests": self._statusRequests
+        }
@@ -0,0 +1,65 @@
+#!/usr/bin/python
+import math
+from . import historycursor, utils
+
+
+def isPendingHeight(height):
+    # Mempool entries have a height of 0, or -1 when they spend outputs of other unconfirmed transactions
+    return height <= 0
+
+
+def getAddressHistoryOwner(config, params):
+    return (
+        config.coin,
+        config.networkName,
+        params["address"],
+        params["status"] if "status" in params else None,
+        params["order"] if "order" in params else None
+    )
+
+
+def sortAddressHistory(params, addrHistory):
+
+    # Newest first, mempool entries ahead of every confirmed one whatever their position in the history
+    history = sorted(
+        addrHistory[::-1],
+        key=lambda item: math.inf if isPendingHeight(item["height"]) else item["height"],
+        reverse=True
+    )
+
+    if "status" in params and params["status"] == "pending":
+        history = [item for item in history if isPendingHeight(item["height"])]
+    elif "status" in params and params["status"] == "confirmed":
+        history = [item for item in history if not isPendingHeight(item["height"])]
+
+    txs = [item["tx_hash"] for item in history]
+
+    # Pages are walked in the requested order, oldest first reverses the history
+    return txs if "order" not in params or params["order"] == "desc" else txs[::-1]
+
+
+def parseAddressHistory(params, txs, snapshotId=None, cursor=None, owner=None):
+
+    paginatedTxs, nextCursor = historycursor.paginateElements(
+        elements=txs,
+        snapshotId=snapshotId,
+        cursor=cursor,
+        page=params["page"] if "page" in params else None,
+        pageSize=params["pageSize"] if "pageSize" in params else None,
+        owner=owner,
+        withCursor="cursor" in params
+    )
+
+    response = {
+        "address": params["address"],
+        "txHashes": paginatedTxs,
+        "maxPage": utils.getMaxPage(
+            numElements=len(txs),
+            pageSize=params["pageSize"] if "pageSize" in params else None
+        )
+    }
+
+    if nextCursor is not None:
+        response["nextCursor"] = nextCursor
+
+    return response
@@ -0,0 +1,110 @@
+#!/usr/bin/python
+import time
+from logger.logger import Logger
+from patterns import Singleton
+from . import utils
+from .constants import *
+from .singleflight import SingleFlight
+
+
+class ChainTipTracker(object, metaclass=Singleton.Singleton):
+
+    def __init__(self):
+        self._pollInterval = utils.getEnvProperty(CHAIN_TIP_POLL_INTERVAL_ENV, DEFAULT_CHAIN_TIP_POLL_INTERVAL, float)
+        self._pushMaxAge = utils.getEnvProperty(CHAIN_TIP_PUSH_MAX_AGE_ENV, DEFAULT_CHAIN_TIP_PUSH_MAX_AGE, float)
+        self._tips = {}  # (Coin, Network) -> [Height, Hash, Update time]
+        self._pushing = set()  # (Coin, Network) with a live block notifications stream
+        self._blockTimes = {}  # (Coin, Network) -> Average seconds between blocks
+        self._hits = 0
+        self._polls = 0
+        self._pushes = 0
+
+    def update(self, coin, network, height, hash, pushed=False):
+
+        key = (coin, network)
+        tip = self._tips.get(key, None)
+
+        if pushed:
+            self._pushes += 1
+            self._pushing.add(key)
+        elif tip is not None and height < tip[0]:
+            # Replicas lagging behind the known tip do not move it back, they only confirm it is still alive
+            tip[2] = time.monotonic()
+            return
+        elif tip is not None and height > tip[0] and key in self._pushing:
+            Logger.printWarning(f"Block notifications for {coin} {network} are behind the node, falling back to polling")
+            self._pushing.discard(key)
+
+        self._tips[key] = [height, hash, time.monotonic()]
+
+    def setPushing(self, coin, network, pushing):
+
+        if pushing:
+            self._pushing.add((coin, network))
+        else:
+            self._pushing.discard((coin, network))
+
+    def setBlockTime(self, coin, network, blockTime):
+        self._blockTimes[(coin, network)] = blockTime
+
+    def getMaxAge(self, coin, network):
+
+        key = (coin, network)
+
+        if key not in self._pushing:
+            return self._pollInterval
+
+        # A live stream goes quiet until the next block, it is only double checked once several blocks could have been missed
+        return max(self._pollInterval, self._pushMaxAge * self._blockTimes.get(key, 0))
+
+    def getTip(self, coin, network):
+
+        key = (coin, network)
+        tip = self._tips.get(key, None)
+
+        if tip is None:
+            return None
+
+        if time.monotonic() - tip[2] > self.getMaxAge(coin, network):
+            return None
+
+        return tip[0], tip[1]
+
+    async def getOrFetch(self, coin, network, function):
+
+        tip = self.getTip(coin, network)
+
+        if tip is not None:
+            self._hits += 1
+            return tip
+
+        async def poll():
+            self._polls += 1
+            height, hash = await function()
+            self.update(coin, network, height, hash)
+            return tuple(self._tips[(coin, network)][:2])
+
+        # Polls are shared by every caller asking for the same network tip at once
+        return await SingleFlight().do((CHAIN_TIP_KEY, coin, network), poll)
+
+    def remove(self, coin, network):
+        self._tips.pop((coin, network), None)
+        self._pushing.discard((coin, network))
+        self._blockTimes.pop((coin, network), None)
+
+    @property
+    def stats(self):
+        return {
+            "tips": {
+                f"{coin}/{network}": {
+                    "height": tip[0],
+                    "hash": tip[1],
+                    "age": round(time.monotonic() - tip[2], 3),
+                    "pushing": (coin, network) in self._pushing
+                }
+                for (coin, network), tip in self._tips.items()
+            },
+            "hits": self._hits,
+            "polls": self._polls,
+            "pushes": self._pushes
+        }
@@ -0,0 +1,186 @@
+#!/usr/bin/python
+import asyncio
+import contextvars
+import itertools
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from logger.logger import Logger
+from patterns import Singleton
+from . import utils
+from .constants import *
+
+currentFlow = contextvars.ContextVar("currentFlow", default=None)
+flowIds = itertools.count(1)
+
+
+def startFlow():
+    # Every upstream call made while serving a client request, subtasks included, belongs to the same flow
+    currentFlow.set(next(flowIds))
+
+
+class AdaptiveLimit:
+
+    def __init__(self, endpoint, initial, minimum, maximum, backoff, tolerance):
+        self._endpoint = endpoint
+        self._limit = float(initial)
+        self._minimum = minimum
+        self._maximum = maximum
+        self._backoff = backoff
+        self._tolerance = tolerance
+        self._inFlight = 0
+        self._baselines = {}  # Method -> Latency
+        self._lastDecrease = 0.0
+        self._waiters = OrderedDict()  # Flow -> deque([Future])
+
+    async def acquire(self, flow):
+
+        if self._inFlight < int(self._limit) and not self._waiters:
+            self._inFlight += 1
+            return
+
+        future = asyncio.get_event_loop().create_future()
+
+        if flow not in self._waiters:
+            self._waiters[flow] = deque()
+        self._waiters[flow].append(future)
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                self._removeWaiter(flow, future)
+            raise
+
+    def release(self):
+        self._inFlight -= 1
+        self._wakeUp()
+
+    def _wakeUp(self):
+
+        while self._waiters and self._inFlight < int(self._limit):
+
+            # Flows are served round robin, so a bulk request queues behind itself and not in front of others
+            flow, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+
+            del self._waiters[flow]
+            if queue:
+                self._waiters[flow] = queue
+
+            if future.done():
+                continue
+
+            self._inFlight += 1
+            future.set_result(None)
+
+    def _removeWaiter(self, flow, future):
+
+        queue = self._waiters.get(flow, None)
+        if queue is None or future not in queue:
+            return
+
+        queue.remove(future)
+        if not queue:
+            del self._waiters[flow]
+
+    def onSuccess(self, latency, method=None):
+
+        # Methods differ in latency by orders of magnitude, each one is only compared against its own history
+        baseline = self._baselines.get(method, None)
+        baseline = latency if baseline is None else \
+            LIMITER_BASELINE_DECAY * latency + (1 - LIMITER_BASELINE_DECAY) * baseline
+        self._baselines[method] = baseline
+
+        if latency > baseline * self._tolerance:
+            self._decrease(f"latency spike of {latency:.3f}s on {method}", baseline)
+            return
+
+        # The limit only grows while it is actually the bottleneck
+        if self._waiters or self._inFlight + 1 >= int(self._limit):
+            self._limit = min(self._maximum, self._limit + 1 / self._limit)
+            self._wakeUp()
+
+    def onError(self, method=None):
+        self._decrease("upstream error", self._baselines.get(method, None))
+
+    def _decrease(self, reason, roundTrip):
+
+        # Decreases are spaced by one round trip so a single burst of errors only cuts the limit once
+        now = time.monotonic()
+        if roundTrip is not None and now - self._lastDecrease < roundTrip:
+            return
+
+        self._lastDecrease = now
+        self._limit = max(self._minimum, self._limit * self._backoff)
+
+        Logger.printWarning(f"Reducing concurrency limit for {self._endpoint} to {int(self._limit)} after {reason}")
+
+    @property
+    def stats(self):
+        return {
+            "limit": int(self._limit),
+            "inFlight": self._inFlight,
+            "queued": sum(len(queue) for queue in self._waiters.values()),
+            "baselineLatency": dict(self._baselines)
+        }
+
+
+class ConcurrencyLimiter(object, metaclass=Singleton.Singleton):
+
+    def __init__(self):
+        self._initial = utils.getEnvProperty(LIMITER_INITIAL_ENV, DEFAULT_LIMITER_INITIAL)
+        self._minimum = max(1, utils.getEnvProperty(LIMITER_MIN_ENV, DEFAULT_LIMITER_MIN))
+        self._maximum = max(self._minimum, utils.getEnvProperty(LIMITER_MAX_ENV, DEFAULT_LIMITER_MAX))
+        self._backoff = utils.getEnvProperty(LIMITER_BACKOFF_ENV, DEFAULT_LIMITER_BACKOFF, float)
+        self._tolerance = utils.getEnvProperty(LIMITER_LATENCY_TOLERANCE_ENV, DEFAULT_LIMITER_LATENCY_TOLERANCE, float)
+        self._limits = {}  # (Event loop, Endpoint) -> AdaptiveLimit
+
+    def getLimit(self, endpoint):
+
+        # Waiters are futures bound to a loop, so every loop (websocket threads) has its own limits
+        key = (asyncio.get_event_loop(), endpoint)
+
+        if key not in self._limits:
+            self._limits[key] = AdaptiveLimit(
+                endpoint=endpoint,
+                initial=min(max(self._initial, self._minimum), self._maximum),
+                minimum=self._minimum,
+                maximum=self._maximum,
+                backoff=self._backoff,
+                tolerance=self._tolerance
+            )
+
+        return self._limits[key]
+
+    @asynccontextmanager
+    async def slot(self, endpoint, errors=(OSError, asyncio.TimeoutError), method=None):
+
+        limit = self.getLimit(endpoint)
+
+        await limit.acquire(currentFlow.get())
+        start = time.monotonic()
+
+        try:
+            yield
+        except errors:
+            limit.release()
+            limit.onError(method)
+            raise
+        except BaseException:
+            limit.release()
+            raise
+
+        limit.release()
+        limit.onSuccess(time.monotonic() - start, method)
+
+    async def request(self, endpoint, function, errors=(OSError, asyncio.TimeoutError), method=None):
+
+        async with self.slot(endpoint, errors, method):
+            return await function()
+
+    @property
+    def stats(self):
+        return {endpoint: limit.stats for (loop, endpoint), limit in self._limits.items()}
@@ -8,3 +8,74 @@ DEFAULT_PAGE_SIZE = 50
 TRANSACTIONS_LOG_FILE = "transactionsLog.log"
 DATA_FOLDER = "./data"
 CURRENT_CONFIG_FILE = f"{DATA_FOLDER}/currentConfig.json"
+SINGLE_FLIGHT_ENABLED_ENV = "SINGLE_FLIGHT_ENABLED"
+DEFAULT_SINGLE_FLIGHT_ENABLED = 1
+LB_EWMA_DECAY_ENV = "LB_EWMA_DECAY"
+DEFAULT_LB_EWMA_DECAY = 0.3
+LB_ERROR_PENALTY_ENV = "LB_ERROR_PENALTY"
+DEFAULT_LB_ERROR_PENALTY = 10
+LB_EJECT_FAILURES_ENV = "LB_EJECT_FAILURES"
+DEFAULT_LB_EJECT_FAILURES = 3
+LB_EJECT_TIME_ENV = "LB_EJECT_TIME"
+DEFAULT_LB_EJECT_TIME = 10
+LB_MAX_EJECT_TIME_ENV = "LB_MAX_EJECT_TIME"
+DEFAULT_LB_MAX_EJECT_TIME = 300
+LB_MAX_ATTEMPTS_ENV = "LB_MAX_ATTEMPTS"
+DEFAULT_LB_MAX_ATTEMPTS = 2
+LIMITER_INITIAL_ENV = "LIMITER_INITIAL"
+DEFAULT_LIMITER_INITIAL = 8
+LIMITER_MIN_ENV = "LIMITER_MIN"
+DEFAULT_LIMITER_MIN = 1
+LIMITER_MAX_ENV = "LIMITER_MAX"
+DEFAULT_LIMITER_MAX = 64
+LIMITER_BACKOFF_ENV = "LIMITER_BACKOFF"
+DEFAULT_LIMITER_BACKOFF = 0.5
+LIMITER_LATENCY_TOLERANCE_ENV = "LIMITER_LATENCY_TOLERANCE"
+DEFAULT_LIMITER_LATENCY_TOLERANCE = 2.0
+LIMITER_BASELINE_DECAY = 0.1
+UPSTREAM_TIMEOUT_ENV = "UPSTREAM_TIMEOUT"
+DEFAULT_UPSTREAM_TIMEOUT = 30
+HEDGE_PERCENTILE_ENV = "HEDGE_PERCENTILE"
+DEFAULT_HEDGE_PERCENTILE = 0.95
+HEDGE_SAMPLES_ENV = "HEDGE_SAMPLES"
+DEFAULT_HEDGE_SAMPLES = 200
+HEDGE_MIN_SAMPLES_ENV = "HEDGE_MIN_SAMPLES"
+DEFAULT_HEDGE_MIN_SAMPLES = 20
+JSON_CODEC_ENV = "JSON_CODEC"
+JSON_CODEC_ORJSON = "orjson"
+JSON_CODEC_STDLIB = "json"
+IMMUTABLE_CACHE_SIZE_ENV = "IMMUTABLE_CACHE_SIZE"
+DEFAULT_IMMUTABLE_CACHE_SIZE = 2 ** 26  # Bytes
+IMMUTABLE_CACHE_MIN_CONFIRMATIONS_ENV = "IMMUTABLE_CACHE_MIN_CONFIRMATIONS"
+DEFAULT_IMMUTABLE_CACHE_MIN_CONFIRMATIONS = 6
+SKETCH_WIDTH = 2 ** 14
+SKETCH_DEPTH = 4
+SKETCH_MAX_COUNT = 15
+SKETCH_SAMPLE_SIZE = 10 * SKETCH_WIDTH
+CHAIN_TIP_KEY = "chainTip"
+CHAIN_TIP_POLL_INTERVAL_ENV = "CHAIN_TIP_POLL_INTERVAL"
+DEFAULT_CHAIN_TIP_POLL_INTERVAL = 1  # Seconds
+CHAIN_TIP_PUSH_MAX_AGE_ENV = "CHAIN_TIP_PUSH_MAX_AGE"
+DEFAULT_CHAIN_TIP_PUSH_MAX_AGE = 3  # Block times
+BLOCK_NOTIFIER_RETRY_TIME = 5  # Seconds
+REORG_WINDOW_SIZE_ENV = "REORG_WINDOW_SIZE"
+DEFAULT_REORG_WINDOW_SIZE = 100  # Blocks
+PREVOUT_CACHE_SIZE_ENV = "PREVOUT_CACHE_SIZE"
+DEFAULT_PREVOUT_CACHE_SIZE = 2 ** 18  # Outputs
+PREVOUT_FETCH_CONCURRENCY_ENV = "PREVOUT_FETCH_CONCURRENCY"
+DEFAULT_PREVOUT_FETCH_CONCURRENCY = 16
+ADDRESS_CACHE_SIZE_ENV = "ADDRESS_CACHE_SIZE"
+DEFAULT_ADDRESS_CACHE_SIZE = 2 ** 16  # Script hashes
+SCRIPT_HASH_SUBSCRIBE_METHOD = "blockchain.scripthash.subscribe"
+HISTORY_SNAPSHOT_COUNT_ENV = "HISTORY_SNAPSHOT_COUNT"
+DEFAULT_HISTORY_SNAPSHOT_COUNT = 1024
+HISTORY_SNAPSHOT_SIZE_ENV = "HISTORY_SNAPSHOT_SIZE"
+DEFAULT_HISTORY_SNAPSHOT_SIZE = 2 ** 25  # Bytes
+HISTORY_SNAPSHOT_TTL_ENV = "HISTORY_SNAPSHOT_TTL"
+DEFAULT_HISTORY_SNAPSHOT_TTL = 60  # Seconds
+HISTORY_SNAPSHOT_ID_SIZE = 8  # Bytes
+ELEMENTS_CURSOR_FIELDS = {
+    "s": (None, (str, type(None))),  # Snapshot id
+    "p": (0, int),  # Elements already returned
+    "h": (None, (str, type(None)))  # Last element returned
+}
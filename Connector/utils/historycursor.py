@@ -0,0 +1,170 @@
+#!/usr/bin/python
+import base64
+import binascii
+import secrets
+import time
+from collections import OrderedDict
+from patterns import Singleton
+from . import jsoncodec, utils
+from .constants import *
+
+
+def encodeCursor(state):
+    return base64.urlsafe_b64encode(jsoncodec.dumps(state)).decode().rstrip("=")
+
+
+def decodeCursor(cursor):
+
+    try:
+        state = jsoncodec.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError, UnicodeError):
+        raise ValueError("Cursor not valid")
+
+    if not isinstance(state, dict):
+        raise ValueError("Cursor not valid")
+
+    return state
+
+
+def parseCursorState(state, fields):
+
+    # Fields map each name to its default and the types it accepts. Anything else is not a cursor we issued.
+    if not isinstance(state, dict):
+        raise ValueError("Cursor not valid")
+
+    parsed = {}
+    for name, (default, types) in fields.items():
+        parsed[name] = state.get(name, default)
+        if not isinstance(parsed[name], types) or (isinstance(parsed[name], int) and parsed[name] < 0):
+            raise ValueError("Cursor not valid")
+
+    return parsed
+
+
+def decodeElementsCursor(cursor):
+    return parseCursorState(decodeCursor(cursor), ELEMENTS_CURSOR_FIELDS)
+
+
+def resumePosition(elements, position, lastElement):
+
+    # Inside the same snapshot the position is exact. Otherwise the page resumes after the last element
+    # returned, which may have moved if the history changed in between.
+    if lastElement is None or (0 < position <= len(elements) and elements[position - 1] == lastElement):
+        return min(position, len(elements))
+
+    try:
+        return elements.index(lastElement) + 1
+    except ValueError:
+        return min(position, len(elements))
+
+
+class HistorySnapshots(object, metaclass=Singleton.Singleton):
+
+    def __init__(self):
+        self._maxSnapshots = utils.getEnvProperty(HISTORY_SNAPSHOT_COUNT_ENV, DEFAULT_HISTORY_SNAPSHOT_COUNT)
+        self._maxSize = utils.getEnvProperty(HISTORY_SNAPSHOT_SIZE_ENV, DEFAULT_HISTORY_SNAPSHOT_SIZE)
+        self._ttl = utils.getEnvProperty(HISTORY_SNAPSHOT_TTL_ENV, DEFAULT_HISTORY_SNAPSHOT_TTL, float)
+        self._snapshots = OrderedDict()  # Snapshot id -> (Owner, Elements, Expiry time, Size)
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._rejections = 0
+
+    def save(self, owner, elements):
+
+        if self._maxSnapshots <= 0:
+            return None
+
+        # Snapshots are measured by their encoded size, histories too large for the budget are reloaded every page
+        size = len(jsoncodec.dumps(elements))
+        if size > self._maxSize:
+            self._rejections += 1
+            return None
+
+        snapshotId = secrets.token_hex(HISTORY_SNAPSHOT_ID_SIZE)
+        self._snapshots[snapshotId] = (owner, elements, time.monotonic() + self._ttl, size)
+        self._size += size
+
+        self._evict()
+
+        return snapshotId
+
+    def load(self, owner, snapshotId):
+
+        if snapshotId is None:
+            return None
+
+        snapshot = self._snapshots.get(snapshotId, None)
+
+        # Cursors are handed to clients, one for another address or order must not read this snapshot
+        if snapshot is None or snapshot[0] != owner or self._isExpired(snapshotId):
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        self._snapshots.move_to_end(snapshotId)
+
+        return snapshot[1]
+
+    def _evict(self):
+
+        # Least recently used snapshots go first, along with expired ones reaching the front
+        while self._snapshots:
+            snapshotId = next(iter(self._snapshots))
+            if len(self._snapshots) <= self._maxSnapshots and self._size <= self._maxSize and not self._isExpired(snapshotId):
+                break
+            self._remove(snapshotId)
+
+    def _isExpired(self, snapshotId):
+        return self._snapshots[snapshotId][2] < time.monotonic()
+
+    def _remove(self, snapshotId):
+        self._size -= self._snapshots.pop(snapshotId)[3]
+
+    @property
+    def stats(self):
+        return {
+            "snapshots": len(self._snapshots),
+            "maxSnapshots": self._maxSnapshots,
+            "size": self._size,
+            "maxSize": self._maxSize,
+            "hits": self._hits,
+            "misses": self._misses,
+            "rejections": self._rejections
+        }
+
+
+async def loadSnapshot(owner, cursor, fetch):
+
+    # Walking with a cursor keeps reading the elements loaded for its first page, otherwise they are fetched again
+    elements = HistorySnapshots().load(owner, cursor["s"]) if cursor is not None else None
+    if elements is not None:
+        return elements, cursor["s"]
+
+    return await fetch(), None
+
+
+def keepSnapshot(owner, elements, snapshotId):
+
+    # Elements are only saved once a cursor to the next page is handed out, later pages reuse that snapshot
+    if snapshotId is not None or owner is None:
+        return snapshotId
+
+    return HistorySnapshots().save(owner, elements)
+
+
+def paginateElements(elements, snapshotId=None, cursor=None, page=None, pageSize=None, owner=None, withCursor=True):
+
+    offset, limit = utils.getPageWindow(page, pageSize)
+    position = resumePosition(elements, cursor["p"], cursor["h"]) if cursor is not None else min(offset, len(elements))
+
+    # Only requests walking with cursors get one for the next page, and only they keep a snapshot
+    pageElements = elements[position:position + limit]
+    if not withCursor or position + len(pageElements) >= len(elements):
+        return pageElements, None
+
+    return pageElements, encodeCursor({
+        "s": keepSnapshot(owner, elements, snapshotId),
+        "p": position + len(pageElements),
+        "h": pageElements[-1]
+    })
@@ -0,0 +1,158 @@
+#!/usr/bin/python
+from collections import OrderedDict
+from logger.logger import Logger
+from patterns import Singleton
+from . import jsoncodec, utils
+from .constants import *
+
+
+class FrequencySketch:
+
+    def __init__(self, width=SKETCH_WIDTH, depth=SKETCH_DEPTH, sampleSize=SKETCH_SAMPLE_SIZE):
+        self._width = width
+        self._tables = [[0] * width for _ in range(depth)]
+        self._sampleSize = sampleSize
+        self._additions = 0
+
+    def _indexes(self, key):
+        keyHash = hash(key)
+        return [hash((row, keyHash)) % self._width for row in range(len(self._tables))]
+
+    def increment(self, key):
+
+        for table, index in zip(self._tables, self._indexes(key)):
+            if table[index] < SKETCH_MAX_COUNT:
+                table[index] += 1
+
+        self._additions += 1
+
+        # Counters are halved periodically so old popularity fades away
+        if self._additions >= self._sampleSize:
+            self._additions //= 2
+            for table in self._tables:
+                for index in range(self._width):
+                    table[index] >>= 1
+
+    def estimate(self, key):
+        return min(table[index] for table, index in zip(self._tables, self._indexes(key)))
+
+
+class ImmutableCache(object, metaclass=Singleton.Singleton):
+
+    def __init__(self):
+        self._maxSize = utils.getEnvProperty(IMMUTABLE_CACHE_SIZE_ENV, DEFAULT_IMMUTABLE_CACHE_SIZE)
+        self._minConfirmations = utils.getEnvProperty(IMMUTABLE_CACHE_MIN_CONFIRMATIONS_ENV, DEFAULT_IMMUTABLE_CACHE_MIN_CONFIRMATIONS)
+        self._entries = OrderedDict()  # Key -> Encoded value
+        self._dependencies = {}  # Key -> Block hashes the value depends on
+        self._dependants = {}  # (Coin, Network, Block hash) -> {Key}
+        self._size = 0
+        self._sketch = FrequencySketch()
+        self._hits = 0
+        self._misses = 0
+        self._admissions = 0
+        self._rejections = 0
+        self._evictions = 0
+
+    def get(self, coin, network, hash, kind=""):
+
+        key = (coin, network, kind, hash)
+        self._sketch.increment(key)
+
+        data = self._entries.get(key, None)
+
+        if data is None:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        self._entries.move_to_end(key)
+
+        # Values are stored encoded so callers always get their own copy
+        return jsoncodec.loads(data)
+
+    def put(self, coin, network, hash, value, confirmations, kind="", blockHashes=()):
+
+        if self._maxSize <= 0 or confirmations is None or confirmations < self._minConfirmations:
+            return False
+
+        key = (coin, network, kind, hash)
+
+        if key in self._entries:
+            return True
+
+        data = jsoncodec.dumps(value)
+
+        if len(data) > self._maxSize:
+            self._rejections += 1
+            return False
+
+        # TinyLFU admission, a new entry only replaces the least recently used one if it is requested more often
+        if self._size + len(data) > self._maxSize:
+            victim = next(iter(self._entries))
+            if self._sketch.estimate(key) <= self._sketch.estimate(victim):
+                self._rejections += 1
+                return False
+
+        while self._size + len(data) > self._maxSize:
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+
+        self._entries[key] = data
+        self._size += len(data)
+        self._admissions += 1
+
+        if blockHashes:
+            self._dependencies[key] = [blockHash for blockHash in blockHashes if blockHash is not None]
+            for blockHash in self._dependencies[key]:
+                self._dependants.setdefault((coin, network, blockHash), set()).add(key)
+
+        return True
+
+    def invalidateBlock(self, coin, network, blockHash):
+
+        # Blocks are expected to be stored with their own hash among their block hashes
+        keys = self._dependants.pop((coin, network, blockHash), set())
+
+        for key in keys:
+            self._remove(key)
+
+        if keys:
+            Logger.printInfo(f"Invalidated {len(keys)} cached objects of {coin} {network} depending on block {blockHash}")
+
+        return len(keys)
+
+    def _remove(self, key):
+
+        data = self._entries.pop(key, None)
+        if data is None:
+            return
+
+        self._size -= len(data)
+
+        for blockHash in self._dependencies.pop(key, []):
+            dependants = self._dependants.get((key[0], key[1], blockHash), None)
+            if dependants is not None:
+                dependants.discard(key)
+                if not dependants:
+                    del self._dependants[(key[0], key[1], blockHash)]
+
+    @property
+    def enabled(self):
+        return self._maxSize > 0
+
+    @property
+    def minConfirmations(self):
+        return self._minConfirmations
+
+    @property
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "size": self._size,
+            "maxSize": self._maxSize,
+            "hits": self._hits,
+            "misses": self._misses,
+            "admissions": self._admissions,
+            "rejections": self._rejections,
+            "evictions": self._evictions
+        }
@@ -0,0 +1,49 @@
+#!/usr/bin/python
+import json
+import os
+import re
+from logger.logger import Logger
+from .constants import *
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson parses integers past 64 bits as floats, so payloads with such long numbers are left to the stdlib
+bigNumberPattern = re.compile(rb"\d{20,}")
+
+codec = os.environ.get(JSON_CODEC_ENV, JSON_CODEC_ORJSON if orjson is not None else JSON_CODEC_STDLIB)
+
+if codec == JSON_CODEC_ORJSON and orjson is None:
+    Logger.printWarning(f"{JSON_CODEC_ORJSON} is not installed. Using {JSON_CODEC_STDLIB} codec")
+    codec = JSON_CODEC_STDLIB
+elif codec not in (JSON_CODEC_ORJSON, JSON_CODEC_STDLIB):
+    Logger.printError(f"{JSON_CODEC_ENV} value {codec} not valid. Using {JSON_CODEC_STDLIB} codec")
+    codec = JSON_CODEC_STDLIB
+
+
+def dumps(obj, sortKeys=False):
+
+    if codec == JSON_CODEC_ORJSON:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sortKeys else 0)
+        except TypeError:
+            # Integers past 64 bits, non string keys and other types orjson refuses
+            pass
+
+    return json.dumps(obj, sort_keys=sortKeys).encode()
+
+
+def dumpsString(obj):
+    return dumps(obj).decode()
+
+
+def loads(data):
+
+    if codec == JSON_CODEC_ORJSON:
+        raw = data.encode() if isinstance(data, str) else data
+        if bigNumberPattern.search(raw) is None:
+            return orjson.loads(raw)
+
+    return json.loads(data)
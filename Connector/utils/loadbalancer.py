@@ -0,0 +1,325 @@
+#!/usr/bin/python
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import AsyncExitStack
+from logger.logger import Logger
+from patterns import Singleton
+from . import utils
+from .constants import *
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class QueuedPastDeadlineError(Exception):
+    pass
+
+
+class Deadline:
+
+    def __init__(self, timeout):
+        self._timeout = timeout
+        self._expiry = None
+
+    def start(self):
+
+        # The clock starts with the first attempt holding an upstream slot, time queued before it is not counted
+        if self._expiry is None:
+            self._expiry = time.monotonic() + self._timeout
+
+        return max(0, self._expiry - time.monotonic())
+
+    @property
+    def expired(self):
+        return self._expiry is not None and time.monotonic() >= self._expiry
+
+
+class Replica:
+
+    def __init__(self, endpoint):
+        self._endpoint = endpoint
+        self._latency = None
+        self._errorRate = 0.0
+        self._inFlight = 0
+        self._failures = 0
+        self._ejections = 0
+        self._ejectedUntil = None
+        self._probing = False
+
+    def score(self, errorPenalty):
+        # Replicas without samples score 0 so they get traffic and a latency estimate straight away
+        latency = self._latency if self._latency is not None else 0.0
+        return latency * (self._inFlight + 1) * (1 + errorPenalty * self._errorRate)
+
+    def record(self, latency, success, decay):
+
+        if success:
+            self._latency = latency if self._latency is None else decay * latency + (1 - decay) * self._latency
+
+        self._errorRate = decay * (0.0 if success else 1.0) + (1 - decay) * self._errorRate
+        self._failures = 0 if success else self._failures + 1
+
+    def eject(self, ejectTime, maxEjectTime):
+        self._ejections += 1
+        self._ejectedUntil = time.monotonic() + min(ejectTime * 2 ** (self._ejections - 1), maxEjectTime)
+        self._probing = False
+
+    def restore(self):
+        self._ejections = 0
+        self._ejectedUntil = None
+        self._probing = False
+        self._errorRate = 0.0
+
+    @property
+    def endpoint(self):
+        return self._endpoint
+
+    @property
+    def ejected(self):
+        return self._ejectedUntil is not None
+
+    @property
+    def ejectedUntil(self):
+        return self._ejectedUntil
+
+    @property
+    def probeable(self):
+        return self.ejected and not self._probing and time.monotonic() >= self._ejectedUntil
+
+    @property
+    def probing(self):
+        return self._probing
+
+    @probing.setter
+    def probing(self, value):
+        self._probing = value
+
+    @property
+    def inFlight(self):
+        return self._inFlight
+
+    @inFlight.setter
+    def inFlight(self, value):
+        self._inFlight = value
+
+    @property
+    def failures(self):
+        return self._failures
+
+    @property
+    def stats(self):
+        return {
+            "latency": self._latency,
+            "errorRate": self._errorRate,
+            "inFlight": self._inFlight,
+            "ejected": self.ejected
+        }
+
+
+class LoadBalancer(object, metaclass=Singleton.Singleton):
+
+    def __init__(self):
+        self._decay = utils.getEnvProperty(LB_EWMA_DECAY_ENV, DEFAULT_LB_EWMA_DECAY, float)
+        self._errorPenalty = utils.getEnvProperty(LB_ERROR_PENALTY_ENV, DEFAULT_LB_ERROR_PENALTY, float)
+        self._ejectFailures = max(1, utils.getEnvProperty(LB_EJECT_FAILURES_ENV, DEFAULT_LB_EJECT_FAILURES))
+        self._ejectTime = utils.getEnvProperty(LB_EJECT_TIME_ENV, DEFAULT_LB_EJECT_TIME, float)
+        self._maxEjectTime = utils.getEnvProperty(LB_MAX_EJECT_TIME_ENV, DEFAULT_LB_MAX_EJECT_TIME, float)
+        self._maxAttempts = max(1, utils.getEnvProperty(LB_MAX_ATTEMPTS_ENV, DEFAULT_LB_MAX_ATTEMPTS))
+        self._timeout = utils.getEnvProperty(UPSTREAM_TIMEOUT_ENV, DEFAULT_UPSTREAM_TIMEOUT, float)
+        self._hedgePercentile = utils.getEnvProperty(HEDGE_PERCENTILE_ENV, DEFAULT_HEDGE_PERCENTILE, float)
+        self._hedgeSamples = max(1, utils.getEnvProperty(HEDGE_SAMPLES_ENV, DEFAULT_HEDGE_SAMPLES))
+        self._hedgeMinSamples = max(1, utils.getEnvProperty(HEDGE_MIN_SAMPLES_ENV, DEFAULT_HEDGE_MIN_SAMPLES))
+        self._replicas = {}  # Endpoint -> Replica
+        self._latencies = {}  # Method -> deque([Latency])
+        self._hedged = 0
+
+    def getReplica(self, endpoint):
+
+        if endpoint not in self._replicas:
+            self._replicas[endpoint] = Replica(endpoint)
+
+        return self._replicas[endpoint]
+
+    def pick(self, endpoints, exclude=(), failFast=False):
+
+        endpoints = getEndpoints(endpoints)
+
+        replicas = [self.getReplica(endpoint) for endpoint in endpoints if endpoint not in exclude]
+        if not replicas:
+            replicas = [self.getReplica(endpoint) for endpoint in endpoints]
+
+        # Ejected replicas get back a single probe request once their ejection time is over
+        for replica in replicas:
+            if replica.probeable:
+                replica.probing = True
+                Logger.printInfo(f"Probing ejected replica {replica.endpoint}")
+                return replica.endpoint
+
+        healthy = [replica for replica in replicas if not replica.ejected]
+
+        if not healthy:
+            if failFast:
+                raise CircuitOpenError(f"Every replica of {endpoints} is ejected")
+            return min(replicas, key=lambda replica: replica.ejectedUntil).endpoint
+
+        # Power of two choices keeps the least loaded replicas from being flooded with every request
+        candidates = random.sample(healthy, 2) if len(healthy) > 2 else healthy
+
+        return min(candidates, key=lambda replica: replica.score(self._errorPenalty)).endpoint
+
+    def record(self, endpoint, latency, success):
+
+        replica = self.getReplica(endpoint)
+        replica.record(latency=latency, success=success, decay=self._decay)
+
+        if success:
+            if replica.ejected and replica.probing:
+                Logger.printInfo(f"Replica {endpoint} is healthy again")
+                replica.restore()
+            return
+
+        if replica.probing or (not replica.ejected and replica.failures >= self._ejectFailures):
+            Logger.printWarning(f"Ejecting replica {endpoint} after {replica.failures} consecutive failures")
+            replica.eject(ejectTime=self._ejectTime, maxEjectTime=self._maxEjectTime)
+
+    async def request(self, endpoints, function, errors=(OSError,), method=None, timeout=None, hedge=False, slot=None):
+
+        endpoints = getEndpoints(endpoints)
+        errors = tuple(errors) + (asyncio.TimeoutError,)
+        deadline = Deadline(timeout if timeout is not None else self._timeout)
+        tried = []
+        lastError = None
+
+        while True:
+
+            try:
+                endpoint = self.pick(endpoints, exclude=tried, failFast=True)
+            except CircuitOpenError:
+                if lastError is not None:
+                    raise lastError
+                raise
+
+            tried.append(endpoint)
+
+            try:
+                if hedge and len(endpoints) > len(tried):
+                    return await self._hedgedAttempt(endpoints, endpoint, function, errors, method, deadline, tried, slot)
+                return await self._attempt(endpoint, function, errors, method, deadline, slot)
+            except errors as err:
+                if len(tried) >= min(self._maxAttempts, len(endpoints)) or deadline.expired:
+                    raise
+
+                lastError = err
+                Logger.printWarning(f"Request to replica {endpoint} failed, retrying on another replica: {str(err)}")
+
+    async def _hedgedAttempt(self, endpoints, endpoint, function, errors, method, deadline, tried, slot):
+
+        delay = self.getHedgeDelay(method)
+
+        attempts = {asyncio.ensure_future(self._attempt(endpoint, function, errors, method, deadline, slot))}
+
+        if delay is not None:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+
+            if not done:
+                hedgeEndpoint = self.pick(endpoints, exclude=tried)
+
+                # The hedge is only sent when there is a healthy replica other than the one already waited on
+                if hedgeEndpoint not in tried and not self.getReplica(hedgeEndpoint).ejected:
+                    Logger.printDebug(f"Hedging {method} to {hedgeEndpoint} after {delay:.3f}s")
+                    tried.append(hedgeEndpoint)
+                    self._hedged += 1
+                    attempts.add(asyncio.ensure_future(self._attempt(hedgeEndpoint, function, errors, method, deadline, slot)))
+
+        try:
+            while True:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+
+                # Both attempts may finish at once, a failure is only raised when no attempt succeeded or is left
+                succeeded = [attempt for attempt in done if attempt.exception() is None]
+
+                if succeeded:
+                    return succeeded[0].result()
+                if not attempts:
+                    return done.pop().result()
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+    async def _attempt(self, endpoint, function, errors, method, deadline, slot):
+
+        replica = self.getReplica(endpoint)
+        replica.inFlight += 1
+
+        try:
+            async with AsyncExitStack() as stack:
+
+                context = slot(endpoint) if slot is not None else None
+                if context is not None:
+                    await stack.enter_async_context(context)
+
+                if deadline.expired:
+                    raise QueuedPastDeadlineError()
+
+                return await self._call(endpoint, function, errors, method, deadline)
+
+        except QueuedPastDeadlineError:
+            # The deadline ran out while waiting for a slot, which tells nothing about the replica or its limit
+            replica.probing = False
+            raise asyncio.TimeoutError() from None
+        except asyncio.CancelledError:
+            replica.probing = False
+            raise
+        finally:
+            replica.inFlight -= 1
+
+    async def _call(self, endpoint, function, errors, method, deadline):
+
+        start = time.monotonic()
+
+        try:
+            response = await asyncio.wait_for(function(endpoint), timeout=deadline.start())
+        except asyncio.CancelledError:
+            raise
+        except errors:
+            # Only errors given by the caller are replica failures, the rest are answers from the node
+            self.record(endpoint=endpoint, latency=time.monotonic() - start, success=False)
+            raise
+        except Exception:
+            self.record(endpoint=endpoint, latency=time.monotonic() - start, success=True)
+            raise
+
+        latency = time.monotonic() - start
+        self.record(endpoint=endpoint, latency=latency, success=True)
+
+        if method is not None:
+            if method not in self._latencies:
+                self._latencies[method] = deque(maxlen=self._hedgeSamples)
+            self._latencies[method].append(latency)
+
+        return response
+
+    def getHedgeDelay(self, method):
+
+        latencies = self._latencies.get(method, None)
+
+        if latencies is None or len(latencies) < self._hedgeMinSamples:
+            return None
+
+        latencies = sorted(latencies)
+
+        return latencies[min(len(latencies) - 1, int(len(latencies) * self._hedgePercentile))]
+
+    @property
+    def stats(self):
+        return {
+            "hedged": self._hedged,
+            "replicas": {endpoint: replica.stats for endpoint, replica in self._replicas.items()}
+        }
+
+
+def getEndpoints(endpoints):
+    return [endpoints] if isinstance(endpoints, str) else list(endpoints)
@@ -0,0 +1,82 @@
+#!/usr/bin/python
+import asyncio
+from collections import OrderedDict
+from patterns import Singleton
+from . import utils
+from .constants import *
+
+
+class PrevoutCache(object, metaclass=Singleton.Singleton):
+
+    def __init__(self):
+        self._maxEntries = utils.getEnvProperty(PREVOUT_CACHE_SIZE_ENV, DEFAULT_PREVOUT_CACHE_SIZE)
+        self._fetchConcurrency = max(1, utils.getEnvProperty(PREVOUT_FETCH_CONCURRENCY_ENV, DEFAULT_PREVOUT_FETCH_CONCURRENCY))
+        self._entries = OrderedDict()  # (Coin, Network, Txid, Vout) -> (Address, Amount)
+        self._hits = 0
+        self._misses = 0
+        self._fetches = 0
+
+    def get(self, coin, network, txid, vout):
+
+        key = (coin, network, txid, vout)
+        prevout = self._entries.get(key, None)
+
+        if prevout is not None:
+            self._entries.move_to_end(key)
+
+        return prevout
+
+    def put(self, coin, network, txid, vout, address, amount):
+
+        if self._maxEntries <= 0:
+            return
+
+        key = (coin, network, txid, vout)
+        self._entries[key] = (address, amount)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._maxEntries:
+            self._entries.popitem(last=False)
+
+    async def resolve(self, coin, network, outpoints, fetch):
+
+        # Outputs are identified by the hash of the transaction creating them, so they never change once seen
+        prevouts = {}
+        missing = []
+
+        for txid, vout in outpoints:
+            prevout = self.get(coin, network, txid, vout)
+            if prevout is not None:
+                self._hits += 1
+                prevouts[(txid, vout)] = prevout
+            else:
+                self._misses += 1
+                if txid not in missing:
+                    missing.append(txid)
+
+        semaphore = asyncio.Semaphore(self._fetchConcurrency)
+
+        async def fetchOutputs(txid):
+
+            async with semaphore:
+                self._fetches += 1
+                outputs = await fetch(txid)
+
+            # Every output of the parent is kept, inputs spending siblings of the same transaction are common
+            for vout, address, amount in outputs:
+                self.put(coin, network, txid, vout, address, amount)
+                prevouts[(txid, vout)] = (address, amount)
+
+        await asyncio.gather(*[fetchOutputs(txid) for txid in missing])
+
+        return [prevouts.get((txid, vout), (None, None)) for txid, vout in outpoints]
+
+    @property
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self._maxEntries,
+            "hits": self._hits,
+            "misses": self._misses,
+            "fetches": self._fetches
+        }
@@ -0,0 +1,93 @@
+#!/usr/bin/python
+import asyncio
+from logger.logger import Logger
+from patterns import Singleton
+from wsutils import topics
+from wsutils.broker import Broker
+from wsutils.publishers import Publisher
+from . import utils
+from .constants import *
+from .immutablecache import ImmutableCache
+
+
+class ReorgDetector(object, metaclass=Singleton.Singleton):
+
+    def __init__(self):
+        self._windowSize = max(1, utils.getEnvProperty(REORG_WINDOW_SIZE_ENV, DEFAULT_REORG_WINDOW_SIZE))
+        self._windows = {}  # (Coin, Network) -> {Height: Hash}
+        self._locks = {}  # (Coin, Network) -> Lock serializing the notifications of a network
+        self._reorgs = 0
+        self._orphaned = 0
+
+    async def onNewBlock(self, coin, network, height, hash, parentHash, getBlockHash):
+
+        key = (coin, network)
+
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+
+        async with self._locks[key]:
+
+            window = self._windows.setdefault(key, {})
+
+            if window.get(height, None) == hash:
+                return []
+
+            # A different block at a known height, and every block above it, belongs to the abandoned branch
+            orphaned = [(blockHeight, window.pop(blockHeight)) for blockHeight in sorted(window) if blockHeight >= height]
+
+            # Ancestors are walked back until the new branch joins the known one
+            ancestorHeight, ancestorHash = height - 1, parentHash
+            while ancestorHeight in window and window[ancestorHeight] != ancestorHash:
+                orphaned.append((ancestorHeight, window[ancestorHeight]))
+                window[ancestorHeight] = ancestorHash
+                ancestorHeight -= 1
+                if ancestorHeight in window:
+                    ancestorHash = await getBlockHash(ancestorHeight)
+
+            window[height] = hash
+
+            for blockHeight in sorted(window)[:-self._windowSize]:
+                del window[blockHeight]
+
+            if orphaned:
+                self._onReorg(coin, network, height, hash, sorted(orphaned))
+
+            return [blockHash for _, blockHash in sorted(orphaned)]
+
+    def _onReorg(self, coin, network, height, hash, orphaned):
+
+        self._reorgs += 1
+        self._orphaned += len(orphaned)
+
+        Logger.printWarning(f"Reorganization detected in {coin} {network} from height {orphaned[0][0]}, "
+                            f"{len(orphaned)} blocks orphaned")
+
+        for _, blockHash in orphaned:
+            ImmutableCache().invalidateBlock(coin, network, blockHash)
+
+        Publisher().publish(
+            broker=Broker(),
+            topic=f"{coin}{topics.TOPIC_SEPARATOR}{network}{topics.TOPIC_SEPARATOR}{topics.REORG_TOPIC}",
+            message={
+                "forkHeight": str(orphaned[0][0]),
+                "orphanedBlocks": [blockHash for _, blockHash in orphaned],
+                "latestBlockIndex": str(height),
+                "latestBlockHash": hash
+            }
+        )
+
+    def remove(self, coin, network):
+        self._windows.pop((coin, network), None)
+        self._locks.pop((coin, network), None)
+
+    @property
+    def stats(self):
+        return {
+            "windows": {
+                f"{coin}/{network}": len(window)
+                for (coin, network), window in self._windows.items()
+            },
+            "reorgs": self._reorgs,
+            "orphanedBlocks": self._orphaned
+        }
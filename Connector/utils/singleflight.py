@@ -0,0 +1,65 @@
+#!/usr/bin/python
+import asyncio
+import copy
+from logger.logger import Logger
+from patterns import Singleton
+from . import jsoncodec, utils
+from .constants import *
+
+
+class SingleFlight(object, metaclass=Singleton.Singleton):
+
+    def __init__(self):
+        self._enabled = bool(utils.getEnvProperty(SINGLE_FLIGHT_ENABLED_ENV, DEFAULT_SINGLE_FLIGHT_ENABLED))
+        self._calls = {}  # (Event loop, Key) -> [Task, Callers]
+        self._requests = 0
+        self._collapsed = 0
+
+    async def do(self, key, function):
+
+        self._requests += 1
+
+        if not self._enabled:
+            return await function()
+
+        # Tasks are bound to the loop they were created in, so every loop (websocket threads) has its own flights
+        callKey = (asyncio.get_event_loop(), key)
+        call = self._calls.get(callKey, None)
+
+        if call is None:
+            call = [asyncio.ensure_future(function()), 1]
+            self._calls[callKey] = call
+            call[0].add_done_callback(lambda task: self._onDone(callKey, call, task))
+        else:
+            Logger.printDebug(f"Collapsing in-flight request {key}")
+            self._collapsed += 1
+            call[1] += 1
+
+        # The upstream call is shielded so a cancelled caller does not cancel it for the rest of callers
+        result = await asyncio.shield(call[0])
+
+        # Shared results are copied so a caller modifying its response does not affect the others
+        return copy.deepcopy(result) if call[1] > 1 else result
+
+    def _onDone(self, callKey, call, task):
+
+        if self._calls.get(callKey, None) is call:
+            del self._calls[callKey]
+
+        # Marks the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    @property
+    def stats(self):
+        return {
+            "enabled": self._enabled,
+            "requests": self._requests,
+            "collapsed": self._collapsed,
+            "inFlight": len(self._calls)
+        }
+
+
+def getRequestKey(endpoint, method, params):
+    endpoint = endpoint if isinstance(endpoint, str) else tuple(endpoint)
+    return (endpoint, method, jsoncodec.dumps(params, sortKeys=True))
@@ -28,6 +28,20 @@ def getConfigProperty(propertyName):
         raise error.InternalServerError()
 
 
+def getEnvProperty(propertyName, default, cast=int):
+
+    value = os.environ.get(propertyName, None)
+
+    if value is None:
+        return default
+
+    try:
+        return cast(value)
+    except ValueError:
+        Logger.printError(f"{propertyName} value {value} not valid. Using default value: {default}")
+        return default
+
+
 def getAvailableCurrencies():
 
     availableCurrenciesFile = getAvailableCurrenciesFile()
@@ -98,6 +112,17 @@ def getMaxPage(numElements, pageSize=None):
     return numElements // pageSize if (numElements % pageSize) == 0 else (numElements // pageSize) + 1
 
 
+def getPageWindow(page=None, pageSize=None):
+
+    if not pageSize:
+        pageSize = DEFAULT_PAGE_SIZE
+
+    if not page:
+        page = DEFAULT_PAGE
+
+    return pageSize * page, pageSize
+
+
 def removeDuplicates(elements):
 
     seen = set()
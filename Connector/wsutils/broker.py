@@ -1,91 +1,104 @@
 #!/usr/bin/python3
-import re
-import threading
-from logger import logger
+import asyncio
+from logger.logger import Logger
 from patterns import Singleton
 from .subscribers import SubscriberInterface
 from .constants import *
+from .topics import TOPIC_SEPARATOR
+
+
+class TopicNode:
+
+    def __init__(self):
+        self.children = {}  # Topic name segment -> TopicNode
+        self.subscribers = {}  # Subscriber -> None, kept as an ordered set
+        self.closingHandler = None
+        self.isTopic = False
 
 
 class Broker(object, metaclass=Singleton.Singleton):
 
     def __init__(self):
 
-        self.topicSubscriptions = {}  # Topic -> {"Subs":[Sub1, Sub2], "ClosingFunc":func}
+        self.topics = TopicNode()  # Topic names split by their separator, coin/network/topic/address
         self.subs = {}
+        self.loop = None  # Server loop websocket subscribers live in
 
     def register(self, subscriber):
-        logger.printInfo(f"New subscriber with id [{subscriber.subscriberID}] registered")
+        Logger.printInfo(f"New subscriber with id [{subscriber.subscriberID}] registered")
         self.subs[subscriber.subscriberID] = subscriber
+        self.loop = asyncio.get_event_loop()
 
     def unregister(self, subscriber):
-        logger.printInfo(f"Subscriber with id [{subscriber.subscriberID}] unregistered")
+        Logger.printInfo(f"Subscriber with id [{subscriber.subscriberID}] unregistered")
         del self.subs[subscriber.subscriberID]
 
     def attach(self, subscriber, topic):
 
-        logger.printInfo(f"Attaching subscriber {subscriber.subscriberID} to topic [{topic.name}]")
+        Logger.printInfo(f"Attaching subscriber {subscriber.subscriberID} to topic [{topic.name}]")
 
         if not issubclass(type(subscriber), SubscriberInterface):
-            logger.printWarning("Trying to attach unknown subscriber class")
+            Logger.printWarning("Trying to attach unknown subscriber class")
             return {
                 SUBSCRIBED: False
             }
 
-        if topic.name not in self.topicSubscriptions:
-            self.topicSubscriptions[topic.name] = {
-                SUBSCRIBERS: [],
-                CLOSING_TOPIC_HANDLER: topic.closingHandler
-            }
+        node = self._getNode(topic.name, create=True)
+
+        if not node.isTopic:
+            node.isTopic = True
+            node.closingHandler = topic.closingHandler
 
-        if subscriber not in self.topicSubscriptions[topic.name][SUBSCRIBERS]:
-            logger.printInfo(f"Subscriber {subscriber.subscriberID} attached successfully to topic [{topic.name}]")
-            self.topicSubscriptions[topic.name][SUBSCRIBERS].append(subscriber)
+        if subscriber not in node.subscribers:
+            Logger.printInfo(f"Subscriber {subscriber.subscriberID} attached successfully to topic [{topic.name}]")
+            node.subscribers[subscriber] = None
             return {
                 SUBSCRIBED: True
             }
         else:
-            logger.printInfo(f"Subscriber {subscriber.subscriberID} already attached to topic [{topic.name}]")
+            Logger.printInfo(f"Subscriber {subscriber.subscriberID} already attached to topic [{topic.name}]")
             return {
                 SUBSCRIBED: False
             }
 
     def detach(self, subscriber, topicName=""):
 
-        logger.printInfo(f"Detaching subscriber {subscriber.subscriberID} from topic [{topicName}]")
+        Logger.printInfo(f"Detaching subscriber {subscriber.subscriberID} from topic [{topicName}]")
 
         if not issubclass(type(subscriber), SubscriberInterface):
-            logger.printWarning("Trying to detach unknown subscriber class")
+            Logger.printWarning("Trying to detach unknown subscriber class")
             return {
                 UNSUBSCRIBED: False
             }
 
-        if topicName not in self.topicSubscriptions:
-            logger.printWarning(
+        node = self._getNode(topicName)
+
+        if node is None or not node.isTopic:
+            Logger.printWarning(
                 f"Trying to detach subscriber {subscriber.subscriberID} from unknown topic [{topicName}]"
             )
             return {
                 UNSUBSCRIBED: False
             }
-        elif subscriber in self.topicSubscriptions[topicName][SUBSCRIBERS]:
-            self.topicSubscriptions[topicName][SUBSCRIBERS].remove(subscriber)
-            logger.printInfo(f"Subscriber {subscriber.subscriberID} detached from topic [{topicName}]")
+        elif subscriber in node.subscribers:
+            del node.subscribers[subscriber]
+            Logger.printInfo(f"Subscriber {subscriber.subscriberID} detached from topic [{topicName}]")
 
-            if not self.topicHasSubscribers(topicName=topicName):
+            if not node.subscribers:
 
-                logger.printWarning(f"No more subscribers for topic [{topicName}]")
-                closingHandler = self.topicSubscriptions[topicName][CLOSING_TOPIC_HANDLER]
-                logger.printInfo(f"Calling closing func to topic [{topicName}]")
+                Logger.printWarning(f"No more subscribers for topic [{topicName}]")
+                closingHandler = node.closingHandler
+                Logger.printInfo(f"Calling closing func to topic [{topicName}]")
                 if closingHandler is not None:
                     closingHandler.close()
 
-                del self.topicSubscriptions[topicName]
+                self._removeTopic(topicName)
 
             return {
                 UNSUBSCRIBED: True
             }
         else:
-            logger.printWarning(
+            Logger.printWarning(
                 f"Subscriber {subscriber.subscriberID} can not be detached because"
                 f" it is not subscribed to topic [{topicName}]")
             return {
@@ -94,24 +107,37 @@ class Broker(object, metaclass=Singleton.Singleton):
 
     def route(self, topicName="", message=""):
 
-        logger.printInfo(f"Routing message of topic [{topicName}]: {message}")
+        Logger.printInfo(f"Routing message of topic [{topicName}]: {message}")
+
+        if self.loop is None or self.loop.is_closed():
+            self._route(topicName, message)
+            return
+
+        try:
+            runningLoop = asyncio.get_running_loop()
+        except RuntimeError:
+            runningLoop = None
+
+        # Node listeners publish from their own threads, delivery always happens on the server loop
+        if runningLoop is self.loop:
+            self._route(topicName, message)
+        else:
+            self.loop.call_soon_threadsafe(self._route, topicName, message)
 
-        if topicName in self.topicSubscriptions:
+    def _route(self, topicName, message):
 
-            for subscriber in self.topicSubscriptions[topicName][SUBSCRIBERS]:
+        node = self._getNode(topicName)
 
-                threading.Thread(
-                    target=_notifySubscriber,
-                    args=(subscriber, topicName, message),
-                    daemon=True
-                ).start()
+        if node is not None and node.isTopic:
+            for subscriber in list(node.subscribers):
+                subscriber.onMessage(topicName, message)
 
     def removeSubscriber(self, subscriber):
 
-        logger.printInfo(f"Removing subscriber {subscriber.subscriberID} from subsbribed topics")
+        Logger.printInfo(f"Removing subscriber {subscriber.subscriberID} from subsbribed topics")
 
         if not issubclass(type(subscriber), SubscriberInterface):
-            logger.printWarning("Trying to remove unknown subscriber class")
+            Logger.printWarning("Trying to remove unknown subscriber class")
             return False
 
         for topicName in subscriber.topicsSubscribed:
@@ -120,39 +146,67 @@ class Broker(object, metaclass=Singleton.Singleton):
         return True
 
     def isTopic(self, topicName):
-        return topicName in self.topicSubscriptions
+        node = self._getNode(topicName)
+        return node is not None and node.isTopic
 
     def getSubTopics(self, topicName):
 
-        subTopics = []
+        # Names of the topics below topicName, relative to it. Only the matching branch of the tree is walked.
+        node = self._getNode(topicName)
+        if node is None:
+            return []
 
-        for topic in self.topicSubscriptions:
-            matches = re.finditer(f"{topicName}([a-z0-9A-Z/]+)", topic, re.MULTILINE)
-            found = False
-            for match in matches:
-                for group in match.groups():
-                    subTopics.append(group[1:])
-                    found = True
-                    break
-                if found:
-                    break
-
-        return subTopics
+        return [subTopic for subTopic, _ in self._walk(node, []) if subTopic]
 
     def topicHasSubscribers(self, topicName):
-        if topicName in self.topicSubscriptions:
-            return len(self.topicSubscriptions[topicName][SUBSCRIBERS]) != 0
-        return False
+        node = self._getNode(topicName)
+        return node is not None and len(node.subscribers) != 0
 
     def getTopicSubscribers(self, topicName):
 
-        if topicName in self.topicSubscriptions:
-            return self.topicSubscriptions[topicName][SUBSCRIBERS]
+        node = self._getNode(topicName)
+        if node is not None:
+            return list(node.subscribers)
         return []
 
     def getTopicNameSubscriptions(self):
-        return list(self.topicSubscriptions.keys())
+        return [topicName for topicName, _ in self._walk(self.topics, [])]
+
+    def _getNode(self, topicName, create=False):
+
+        node = self.topics
+
+        for segment in topicName.split(TOPIC_SEPARATOR):
+            child = node.children.get(segment, None)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[segment] = TopicNode()
+            node = child
+
+        return node
+
+    def _removeTopic(self, topicName):
+
+        path = [self.topics]
+        segments = topicName.split(TOPIC_SEPARATOR)
+
+        for segment in segments:
+            path.append(path[-1].children[segment])
+
+        path[-1].isTopic = False
+        path[-1].closingHandler = None
+
+        # Branches left without topics are pruned so walks only visit live topics
+        for segment, parent, node in zip(reversed(segments), reversed(path[:-1]), reversed(path[1:])):
+            if node.isTopic or node.children:
+                break
+            del parent.children[segment]
+
+    def _walk(self, node, path):
 
+        if node.isTopic:
+            yield TOPIC_SEPARATOR.join(path), node
 
-def _notifySubscriber(subscriber, topicName, message):
-    subscriber.onMessage(topicName, message)
+        for segment, child in node.children.items():
+            yield from self._walk(child, path + [segment])
@@ -1,6 +1,6 @@
 #!/usr/bin/python3
 from aiohttp import ClientSession
-from logger import logger
+from logger.logger import Logger
 
 
 class ClientWebSocket(ClientSession):
@@ -22,7 +22,7 @@ class ClientWebSocket(ClientSession):
         """Send a message to the WebSocket."""
         assert self.websocket is not None, "You must connect first!"
         await self.websocket.send_json(message)
-        logger.printInfo(f"Sent: {message}")
+        Logger.printInfo(f"Sent: {message}")
 
     async def receive(self):
         """Receive one message from the WebSocket."""
@@ -35,6 +35,6 @@ class ClientWebSocket(ClientSession):
 
         while await self.websocket.receive():
             message = await self.receive()
-            logger.printInfo(f"Received: {message}")
+            Logger.printInfo(f"Received: {message}")
             if message == "Echo 9!":
                 break
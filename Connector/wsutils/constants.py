@@ -4,5 +4,7 @@ WS_METHOD = "ws"
 CLOSE_METHOD = "close"
 SUBSCRIBED = "subscribed"
 UNSUBSCRIBED = "unsubscribed"
-SUBSCRIBERS = "subscribers"
-CLOSING_TOPIC_HANDLER = "closingTopicHandler"
+
+WS_SUBSCRIBER_QUEUE_SIZE_ENV = "WS_SUBSCRIBER_QUEUE_SIZE"
+DEFAULT_WS_SUBSCRIBER_QUEUE_SIZE = 256  # Messages
+ENCODED_MESSAGES_CACHE_SIZE = 8
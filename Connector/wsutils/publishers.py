@@ -1,6 +1,6 @@
 #!/usr/bin/python3
 import abc
-from logger import logger
+from logger.logger import Logger
 
 
 class PublisherInterface(metaclass=abc.ABCMeta):
@@ -14,5 +14,5 @@ class PublisherInterface(metaclass=abc.ABCMeta):
 class Publisher():
 
     def publish(self, broker, topic, message):
-        logger.printInfo(f"Publishing new message for topic [{topic}]: {message}")
+        Logger.printInfo(f"Publishing new message for topic [{topic}]: {message}")
         broker.route(topic, message)
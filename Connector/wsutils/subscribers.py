@@ -2,9 +2,13 @@
 import abc
 import asyncio
 from aiohttp import web, WSCloseCode
-import json
+from collections import deque, OrderedDict
+from utils import jsoncodec, utils
 import uuid
-from logger import logger
+from logger.logger import Logger
+from .constants import *
+
+encodedMessages = OrderedDict()  # Message id -> (Message, Encoded message)
 
 
 class SubscriberInterface(metaclass=abc.ABCMeta):
@@ -22,20 +26,18 @@ class Subscriber:
 
     def __init__(self):
         self.subscriberID = uuid.uuid4()
-        self._topicsSubscribed = []
+        self._topicsSubscribed = {}  # Topic name -> None, kept as an ordered set
 
     @property
     def topicsSubscribed(self):
-        return self._topicsSubscribed
+        return list(self._topicsSubscribed)
 
     def subscribeToTopic(self, broker, topic):
-        if topic.name not in self._topicsSubscribed:
-            self._topicsSubscribed.append(topic.name)
+        self._topicsSubscribed[topic.name] = None
         return broker.attach(self, topic)
 
     def unsubscribeFromTopic(self, broker, topicName):
-        if topicName in self._topicsSubscribed:
-            self._topicsSubscribed.remove(topicName)
+        self._topicsSubscribed.pop(topicName, None)
         return broker.detach(self, topicName)
 
     def close(self, broker):
@@ -49,38 +51,125 @@ class WSSubscriber(Subscriber):
     def __init__(self):
         super().__init__()
         self.websocket = web.WebSocketResponse(heartbeat=60)
+        self._queueSize = max(1, utils.getEnvProperty(WS_SUBSCRIBER_QUEUE_SIZE_ENV, DEFAULT_WS_SUBSCRIBER_QUEUE_SIZE))
+        self._queue = deque()  # (Message, Future resolved once a response is sent, None for notifications)
+        self._notifications = 0
+        self._ready = asyncio.Event()
+        self._writer = None
+        self._dropped = 0
 
     def onMessage(self, topicName, message):
-        logger.printInfo(f"New message for WS Subscriber {self.subscriberID} for topic [{topicName}]: {message}")
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(notify(self.websocket, message))
+
+        Logger.printInfo(f"New message for WS Subscriber {self.subscriberID} for topic [{topicName}]: {message}")
+
+        # The broker calls this on the server loop, a subscriber not keeping up loses its oldest notifications
+        if self._notifications >= self._queueSize:
+            self._dropNotification()
+            self._dropped += 1
+            Logger.printWarning(f"WS Subscriber {self.subscriberID} is not keeping up, {self._dropped} messages dropped")
+
+        self._notifications += 1
+        self._enqueue(message, None)
+
         return message, topicName
 
+    async def sendMessage(self, message):
+
+        # Responses share the queue with notifications so only the writer task sends, but they are never dropped
+        sent = asyncio.get_event_loop().create_future()
+        self._enqueue(message, sent)
+
+        await sent
+
+    def _enqueue(self, message, sent):
+
+        self._queue.append((message, sent))
+        self._ready.set()
+
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.ensure_future(self._write())
+
+    def _dropNotification(self):
+
+        for index, (_, sent) in enumerate(self._queue):
+            if sent is None:
+                del self._queue[index]
+                self._notifications -= 1
+                return
+
+    async def _write(self):
+
+        # Responses left behind fail like a direct send on the connection would
+        failure = ConnectionResetError("Connection closed")
+
+        try:
+            while not self.websocket.closed:
+
+                if not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+
+                message, sent = self._queue.popleft()
+
+                if sent is None:
+                    self._notifications -= 1
+                elif sent.done():
+                    continue
+
+                try:
+                    await self.websocket.send_str(encodeMessage(message) if sent is None else jsoncodec.dumpsString(message))
+                except (ConnectionResetError, RuntimeError) as err:
+                    Logger.printError(f"Can not send message to WS Subscriber {self.subscriberID}: {err}")
+                    self._queue.appendleft((message, sent))
+                    failure = err
+                    return
+
+                if sent is not None and not sent.done():
+                    sent.set_result(None)
+
+        finally:
+            self._failResponses(failure)
+
+    def _failResponses(self, failure):
+
+        while self._queue:
+            _, sent = self._queue.popleft()
+            if sent is not None and not sent.done():
+                sent.set_exception(failure)
+
+        self._notifications = 0
+
     async def close(self, broker):
+
         super().close(broker)
+
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+
         await self.websocket.close(code=WSCloseCode.GOING_AWAY, message="Connection closed".encode())
 
-    async def sendMessage(self, message):
-        await self.websocket.send_str(
-            json.dumps(
-                message
-            )
-        )
 
+def encodeMessage(message):
 
-async def notify(ws, message):
-    await ws.send_str(
-        json.dumps(
-            message
-        )
-    )
+    # A message fanned out to many subscribers is the same object, it is encoded once for all of them
+    key = id(message)
+    if key in encodedMessages and encodedMessages[key][0] is message:
+        return encodedMessages[key][1]
+
+    encodedMessages[key] = (message, jsoncodec.dumpsString(message))
+
+    while len(encodedMessages) > ENCODED_MESSAGES_CACHE_SIZE:
+        encodedMessages.popitem(last=False)
+
+    return encodedMessages[key][1]
 
 
 class DummySubscriber(Subscriber):
 
     def onMessage(self, topicName, message):
-        logger.printInfo(f"New message for Dummy Subscriber {self.subscriberID} for topic [{topicName}]: {message}")
+        Logger.printInfo(f"New message for Dummy Subscriber {self.subscriberID} for topic [{topicName}]: {message}")
         return message, topicName
 
 
@@ -91,5 +180,5 @@ class ListenerSubscriber(Subscriber):
         self.messageReceived = False
 
     def onMessage(self, topicName, message):
-        logger.printInfo(f"New message for Listener Subscriber {self.subscriberID} for topic [{topicName}]: {message}")
+        Logger.printInfo(f"New message for Listener Subscriber {self.subscriberID} for topic [{topicName}]: {message}")
         self.messageReceived = True
@@ -2,6 +2,7 @@
 TOPIC_SEPARATOR = "/"
 ADDRESS_BALANCE_TOPIC = "adressBalance"
 NEW_BLOCKS_TOPIC = "newBlocks"
+REORG_TOPIC = "reorg"
 
 
 class Topic():
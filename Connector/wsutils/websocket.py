@@ -1,5 +1,5 @@
 #!/usr/bin/python
-from logger import logger
+from logger.logger import Logger
 
 # TODO: Create sync lock over webSockets
 webSockets = {}  # {coin-> network -> []}
@@ -35,7 +35,7 @@ class WebSocket:
         elif coin in webSockets and config.networkName not in webSockets[coin]:
             webSockets[coin][config.networkName] = []
 
-        logger.printInfo(f"Registering new WebSocket for {config.networkName} network for {coin} currency")
+        Logger.printInfo(f"Registering new WebSocket for {config.networkName} network for {coin} currency")
         webSockets[coin][config.networkName].append(ws)
 
         return ws
@@ -44,11 +44,11 @@ class WebSocket:
 async def startWebSockets(coin, networkName):
 
     if coin not in webSockets:
-        logger.printInfo(f"There are no websockets for {coin} currency")
+        Logger.printInfo(f"There are no websockets for {coin} currency")
         return
 
     if networkName not in webSockets[coin]:
-        logger.printInfo(f"There are no websockets for {networkName} network for{coin} currency")
+        Logger.printInfo(f"There are no websockets for {networkName} network for{coin} currency")
         return
 
     for webSocket in webSockets[coin][networkName]:
@@ -58,17 +58,17 @@ async def startWebSockets(coin, networkName):
 async def stopWebSockets(coin, networkName):
 
     if coin not in webSockets:
-        logger.printInfo(f"There are no websockets for {coin} currency")
+        Logger.printInfo(f"There are no websockets for {coin} currency")
         return False
 
     if networkName not in webSockets[coin]:
-        logger.printInfo(f"There are no websockets for {networkName} network for{coin} currency")
+        Logger.printInfo(f"There are no websockets for {networkName} network for{coin} currency")
         return False
 
     for webSocket in webSockets[coin][networkName]:
         await webSocket.stop()
 
-    logger.printInfo(f"Websockets stopped for {networkName} network for {coin} currency")
+    Logger.printInfo(f"Websockets stopped for {networkName} network for {coin} currency")
     del webSockets[coin][networkName]
     if len(webSockets[coin]) == 0:
         del webSockets[coin]
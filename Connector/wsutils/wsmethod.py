@@ -144,6 +144,8 @@ class RouteTableDef:
             await subscriber.sendMessage(response)
             await subscriber.close(broker.Broker())
         finally:
+            # Dropped connections leave their topics and stop their writer too
+            await subscriber.close(broker.Broker())
             broker.Broker().unregister(subscriber)
 
         return subscriber.websocket
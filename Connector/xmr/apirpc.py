@@ -25,7 +25,7 @@ async def syncing(id, params, config):
         )
 
     blockchainInfo = await RPCConnector.request(
-        endpoint=config.rpcEndpoint,
+        endpoint=config.monerodRpcEndpoint,
         id=id,
         method=GET_INFO,
         params=None
@@ -40,7 +40,7 @@ async def syncing(id, params, config):
 
     if not blockchainInfo["synchronized"]:
         syncInfo = await RPCConnector.request(
-            endpoint=config.rpcEndpoint,
+            endpoint=config.monerodRpcEndpoint,
             id=id,
             method=GET_SYNC_INFO,
             params=None
@@ -12,8 +12,11 @@ class Config:
         self._monerodRpcEndpoint = ""
 
     def loadConfig(self, config):
-        self.monerodRpcEndpoint = ["monerodRpcEndpoint"]
 
+        try:
+            self.monerodRpcEndpoint = config["monerodRpcEndpoint"]
+        except KeyError:
+            return False, "Can not load config"
         return True, None
 
     @property